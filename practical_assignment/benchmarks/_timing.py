@@ -0,0 +1,28 @@
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def time_call(func: Callable[..., Any], /, *args: Any, repeat: int = 1, **kwargs: Any) -> tuple[float, Any]:
+    """
+    Call `func` `repeat` times and return the best wall time in seconds, together with the last result.
+    """
+    best = float("inf")
+    result = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def print_table(rows: list[tuple], /, *, header: tuple[str, ...]) -> None:
+    widths = [
+        max(len(str(cell)) for cell in column)
+        for column in zip(header, *rows)
+    ]
+
+    for row in (header, *rows):
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,82 @@
+"""
+Throughput and latency of `ComponentClassifier` on CPU:
+crops per second for a few batch sizes, and the latency of a single crop,
+on the crops `find_single_components_in` cuts out of the RESISTORS images.
+
+The weights are trained on the COMPONENTS crops the first time, and kept in the cache directory.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.classifier
+"""
+import os
+import statistics
+import time
+
+from lib.public import (
+    db,
+    find_single_components_in,
+    annotated_component_crops_of,
+    ClassifierSettings,
+    ComponentClassifier,
+)
+from ._timing import print_table, time_call
+
+RESISTOR_IMAGES = ("RESISTORS/RESISTORS-1.png", "RESISTORS/RESISTORS-2.png")
+
+
+def weights_path() -> str:
+    return f"{db.cache_dir}/component-classifier.weights.h5"
+
+
+def trained_classifier() -> ComponentClassifier:
+    classifier = ComponentClassifier(weights_path())
+
+    if not os.path.isfile(weights_path()):
+        crops, labels = annotated_component_crops_of(db)
+        seconds, history = time_call(classifier.fit, crops, labels)
+        classifier.save()
+        print(f"Trained on {len(crops)} crops in {seconds:.1f}s, final accuracy {history['accuracy'][-1]:.3f}")
+
+    return classifier
+
+
+def run(*, batch_sizes: tuple[int, ...] = (1, 8, 32, 64), crop_count: int = 256, latency_calls: int = 50) -> None:
+    trained_classifier()
+
+    crops = []
+    for location in RESISTOR_IMAGES:
+        # The RESISTORS images are RGBA, so they're loaded as the BGR `find_single_components_in` expects,
+        # which already returns its crops in the RGB the classifier is trained on.
+        crops.extend(find_single_components_in(db.get_img_located_at(location, channel_mode="BGR"), 245, 5000)[0])
+    crops = (crops * (crop_count // len(crops) + 1))[:crop_count]
+
+    rows = []
+    for batch_size in batch_sizes:
+        classifier = ComponentClassifier(weights_path(), settings=ClassifierSettings(batch_size=batch_size))
+
+        # The first call builds the model, loads the weights and compiles the graph.
+        first_seconds, _ = time_call(classifier.classify, crops[:1])
+        seconds, _ = time_call(classifier.classify, crops, repeat=3)
+
+        latencies = []
+        for _ in range(latency_calls):
+            start = time.perf_counter()
+            classifier.classify(crops[:1])
+            latencies.append(time.perf_counter() - start)
+
+        rows.append((
+            str(batch_size),
+            f"{first_seconds:.2f}",
+            f"{len(crops) / seconds:.0f}",
+            f"{statistics.median(latencies) * 1000:.1f}",
+            f"{max(latencies) * 1000:.1f}",
+        ))
+
+    print(f"{len(crops)} crops")
+    print_table(
+        rows, header=("batch size", "first call s", "crops/s", "single crop ms (median)", "single crop ms (max)")
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+"""
+Benchmark `find_single_components_in` against the BOARD1–3 images,
+next to `find_component_set_in` and the memory each of them holds per board.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.components
+"""
+import cv2
+
+from lib.public import db, find_component_set_in, find_single_components_in
+from ._timing import time_call, print_table
+
+# The same thresholds part-2 uses for each board set, as (bg_threshold, min_size).
+BOARD_SETTINGS = {
+    1: (140, 100),
+    2: (130, 1500),
+    3: (130, 1500),
+}
+
+
+def run(*, repeat: int = 1) -> None:
+    rows = []
+
+    for board, (bg_threshold, min_size) in BOARD_SETTINGS.items():
+        for i in range(3):
+            img = cv2.imread(f"{db.boards_dir}/BOARD{board}-{i + 1}.jpg")
+
+            seconds, (components, components_binary) = time_call(
+                find_single_components_in, img, bg_threshold, min_size, repeat=repeat
+            )
+            set_seconds, component_set = time_call(find_component_set_in, img, bg_threshold, min_size, repeat=repeat)
+
+            # The lists own every crop and mask, the set shares the image and only owns its records and masks.
+            list_bytes = sum(array.nbytes for array in (*components, *components_binary))
+            rows.append((
+                f"BOARD{board}-{i + 1}",
+                f"{img.shape[1]}x{img.shape[0]}",
+                len(components),
+                f"{seconds:.3f}",
+                f"{set_seconds:.3f}",
+                f"{list_bytes / 1024 ** 2:.1f}",
+                f"{component_set.nbytes / 1024 ** 2:.2f}",
+            ))
+
+    print_table(
+        rows,
+        header=("image", "size", "components", "lists s", "set s", "lists MiB", "set MiB"),
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,175 @@
+"""
+Evaluate the component detectors against the annotations of the BOARDS and COMPONENTS images,
+for both accuracy (precision, recall, mAP) and speed (latency of each stage, peak memory of detecting and scoring).
+
+The results are also written as JSON, to track regressions of either over time.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.detection
+"""
+import datetime
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from lib.public import db, Detections, score_detections, find_component_boxes_in, find_green_board_in
+from ._timing import print_table
+
+# Labels of the annotations which are not components, so no detector is expected to find them.
+IGNORED_LABELS = ("pcb", "tracks", "text", "hole")
+
+
+def detect_components_of(img: np.ndarray, /, *, bg_threshold: int = 130, min_size: int = 1500) -> Detections:
+    """
+    The components `find_single_components_in` keeps, as boxes instead of crops, scored by their pixel count.
+    """
+    components = find_component_boxes_in(img, bg_threshold, min_size)
+
+    return Detections(
+        boxes=np.stack(
+            [components["left"], components["top"], components["right"], components["bottom"]], axis=1
+        ).astype(np.int64),
+        scores=components["area"].astype(np.float64),
+    )
+
+
+def detect_non_green_of(img: np.ndarray, /, *, min_area: int = 1500) -> Detections:
+    """
+    The part-3 colour-ratio detector: after the same contrast stretch,
+    everything on the board which is not green by the G/R, G/B and R/B ratios is a component.
+    """
+    rgb = cv2.convertScaleAbs(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), alpha=0.93, beta=65)
+    green_board = find_green_board_in(rgb)
+
+    if green_board.bbox is None:
+        return Detections(np.empty((0, 4), dtype=np.int64), np.empty(0))
+
+    # Only look inside the board.
+    left, top, right, bottom = green_board.bbox
+    not_green = 1 - green_board.mask[top:bottom + 1, left:right + 1]
+    count, _, stats, _ = cv2.connectedComponentsWithStats(not_green, connectivity=8)
+
+    # Skip the background label, and the small specks.
+    stats = stats[1:count]
+    stats = stats[stats[:, cv2.CC_STAT_AREA] >= min_area]
+
+    lefts = stats[:, cv2.CC_STAT_LEFT] + left
+    tops = stats[:, cv2.CC_STAT_TOP] + top
+
+    return Detections(
+        boxes=np.stack(
+            [lefts, tops, lefts + stats[:, cv2.CC_STAT_WIDTH] - 1, tops + stats[:, cv2.CC_STAT_HEIGHT] - 1], axis=1
+        ).astype(np.int64),
+        scores=stats[:, cv2.CC_STAT_AREA].astype(np.float64),
+    )
+
+
+DETECTORS: dict[str, Callable[[np.ndarray], Detections]] = {
+    "components": detect_components_of,
+    "colour ratio": detect_non_green_of,
+}
+
+
+@contextmanager
+def _measure(stages: dict[str, dict[str, float]], stage: str):
+    # Wall time of a stage, accumulated over all images.
+    start = time.perf_counter()
+
+    yield
+
+    stages.setdefault(stage, {"seconds": 0.0})["seconds"] += time.perf_counter() - start
+
+
+def _measure_peak_bytes(stages: dict[str, dict[str, float]], stage: str, call: Callable[[], object], /) -> None:
+    # Peak traced memory of a stage, in a run of its own, since tracing slows down every allocation it times.
+    tracemalloc.start()
+    try:
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    measured = stages.setdefault(stage, {"seconds": 0.0})
+    measured["peak_bytes"] = max(measured.get("peak_bytes", 0), peak_bytes - start_bytes)
+
+
+def evaluate(
+        detector: Callable[[np.ndarray], Detections], /, *, iou_threshold: float = 0.5
+) -> dict[str, object]:
+    annotations = db.annotations
+    stages: dict[str, dict[str, float]] = {}
+    results = []
+
+    for image_id, image in enumerate(annotations.images):
+        with _measure(stages, "load"):
+            img = db.get_img_located_at(image.location, channel_mode="BGR")
+
+        with _measure(stages, "detect"):
+            detections = detector(img)
+        _measure_peak_bytes(stages, "detect", lambda: detector(img))
+
+        boxes = annotations.boxes_of_image(image_id)
+        labels = np.array(annotations.labels)[boxes["label"]]
+        kept = ~np.isin(labels, IGNORED_LABELS)
+        ground_truth = np.stack([boxes["xmin"], boxes["ymin"], boxes["xmax"], boxes["ymax"]], axis=1)[kept]
+
+        results.append((ground_truth, labels[kept], detections))
+
+    with _measure(stages, "score"):
+        scores, mean_average_precision = score_detections(results, iou_threshold=iou_threshold)
+    _measure_peak_bytes(stages, "score", lambda: score_detections(results, iou_threshold=iou_threshold))
+
+    for measured in stages.values():
+        measured["seconds_per_image"] = measured["seconds"] / len(annotations.images)
+
+    return {
+        "images": len(annotations.images),
+        "iou_threshold": iou_threshold,
+        "mAP": mean_average_precision,
+        "labels": [score._asdict() for score in scores],
+        "stages": stages,
+    }
+
+
+def run(*, output: str = "benchmarks/results/detection.json", iou_threshold: float = 0.5) -> None:
+    report = {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "detectors": {name: evaluate(detector, iou_threshold=iou_threshold) for name, detector in DETECTORS.items()},
+    }
+
+    rows = []
+    for name, result in report["detectors"].items():
+        (score,) = result["labels"]
+        rows.append((
+            name,
+            f"{score['precision']:.3f}",
+            f"{score['recall']:.3f}",
+            f"{result['mAP']:.3f}",
+            *(f"{result['stages'][stage]['seconds_per_image']:.3f}" for stage in ("load", "detect")),
+            f"{result['stages']['detect']['peak_bytes'] / 1024 ** 2:.0f}",
+        ))
+
+    print_table(
+        rows, header=("detector", "precision", "recall", "mAP", "load s/img", "detect s/img", "detect peak MiB")
+    )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Written to {output}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,137 @@
+"""
+Locate the COMPONENTS templates on the annotated boards with `TemplateLocator`,
+for accuracy against the annotations (precision, recall, mAP) and for latency,
+next to a brute-force `cv2.matchTemplate` at full size for a few templates.
+
+The found boxes are written as VOC XML next to the JSON report, to open them in the same tools as the annotations.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.locator
+"""
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from lib.public import (
+    db,
+    annotation_xml_of,
+    detections_of,
+    score_detections,
+    LocatorSettings,
+    Template,
+    TemplateLocator,
+)
+from .detection import IGNORED_LABELS
+from ._timing import print_table, time_call
+
+SETTINGS = LocatorSettings(scales=(0.3, 0.35, 0.4), candidates=8, max_matches=5)
+
+
+def templates_of_components() -> list[Template]:
+    """
+    Every COMPONENTS image cropped to its annotated box, labeled as the boards are, e.g. "BUCK-1.jpg" is "buck".
+    """
+    annotations = db.annotations
+    templates = []
+
+    for image_id, image in enumerate(annotations.images):
+        if not image.location.startswith("COMPONENTS/"):
+            continue
+
+        img = db.get_img_located_at(image.location, channel_mode="BGR")
+        for box in annotations.boxes_of_image(image_id):
+            label = os.path.basename(image.location).split("-")[0].lower()
+            templates.append(Template(label, img[box["ymin"]:box["ymax"] + 1, box["xmin"]:box["xmax"] + 1]))
+
+    return templates
+
+
+def _brute_force_seconds_of(board: np.ndarray, template: Template, scale: float) -> float:
+    # The same right angles at full size, without the pyramid nor the DFT.
+    gray_board = cv2.cvtColor(board, cv2.COLOR_BGR2GRAY)
+    gray = cv2.resize(cv2.cvtColor(template.image, cv2.COLOR_BGR2GRAY), None, fx=scale, fy=scale)
+
+    start = time.perf_counter()
+    for quarter_turns in range(4):
+        cv2.matchTemplate(gray_board, np.ascontiguousarray(np.rot90(gray, quarter_turns)), cv2.TM_CCOEFF_NORMED)
+
+    return (time.perf_counter() - start) * len(SETTINGS.scales)
+
+
+def run(*, output_dir: str = "benchmarks/results/locator", brute_force_templates: int = 3) -> None:
+    annotations = db.annotations
+    templates = templates_of_components()
+    locator = TemplateLocator(SETTINGS)
+
+    rows = []
+    report = {"settings": SETTINGS._asdict(), "templates": len(templates), "boards": {}}
+    os.makedirs(output_dir, exist_ok=True)
+
+    for image_id, image in enumerate(annotations.images):
+        if not image.location.startswith("BOARDS/"):
+            continue
+
+        board = db.get_img_located_at(image.location, channel_mode="BGR")
+        locator.clear_pyramid_cache()
+
+        pyramid_seconds, pyramid = time_call(locator.pyramid_of, board, key=image.location)
+        first_seconds, matches = time_call(locator.locate, pyramid, templates)
+        cached_seconds, _ = time_call(locator.locate, pyramid, templates)
+
+        boxes = annotations.boxes_of_image(image_id)
+        labels = np.array(annotations.labels)[boxes["label"]]
+        kept = ~np.isin(labels, IGNORED_LABELS)
+        ground_truth = np.stack([boxes["xmin"], boxes["ymin"], boxes["xmax"], boxes["ymax"]], axis=1)[kept]
+        scores, mean_average_precision = score_detections(
+            [(ground_truth, labels[kept], detections_of(matches))]
+        )
+
+        brute_force_seconds = np.mean([
+            _brute_force_seconds_of(board, template, SETTINGS.scales[len(SETTINGS.scales) // 2])
+            for template in templates[:brute_force_templates]
+        ])
+
+        detected = [score for score in scores if score.detection_count]
+        true_positives = sum(score.true_positive_count for score in detected)
+        rows.append((
+            image.location,
+            str(len(matches)),
+            str(true_positives),
+            f"{mean_average_precision:.3f}",
+            f"{pyramid_seconds:.3f}",
+            f"{first_seconds / len(templates):.3f}",
+            f"{cached_seconds / len(templates):.3f}",
+            f"{brute_force_seconds:.3f}",
+        ))
+        report["boards"][image.location] = {
+            "mAP": mean_average_precision,
+            "labels": [score._asdict() for score in scores],
+            "pyramid_seconds": pyramid_seconds,
+            "seconds_per_template": first_seconds / len(templates),
+            "cached_seconds_per_template": cached_seconds / len(templates),
+            "brute_force_seconds_per_template": brute_force_seconds,
+        }
+
+        found_boxes = np.array([match.bbox for match in matches]).reshape(-1, 4)
+        with open(os.path.join(output_dir, image.xml_name), "w") as f:
+            f.write(annotation_xml_of(image, [match.label for match in matches], found_boxes))
+
+    print_table(
+        rows,
+        header=(
+            "board", "matches", "true positives", "mAP", "pyramid s", "s/template", "cached s/template",
+            "brute force s/template",
+        ),
+    )
+
+    with open(os.path.join(output_dir, "locator.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Written to {output_dir}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,44 @@
+"""
+Benchmark the speed and the quality (mean color error) of every `reduce_color` method.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.quantization
+"""
+from lib.public import db, reduce_color, mean_color_error_of, clear_palette_cache
+from ._timing import time_call, print_table
+
+METHODS = ("kmeans", "sample", "minibatch", "resistor")
+
+
+def run(
+        *,
+        to: int = 8,
+        images: tuple[str, ...] = ("RESISTORS/RESISTORS-1.png", "BOARDS/BOARD2-1.jpg"),
+        max_kmeans_pixels: int = 2_000_000,
+) -> None:
+    rows = []
+
+    for location in images:
+        img = db.get_img_located_at(location, channel_mode="RGB")
+
+        for method in METHODS:
+            # The exact k-means takes minutes on full-resolution boards (about 6m on a 12 MP board).
+            if method == "kmeans" and img.shape[0] * img.shape[1] > max_kmeans_pixels:
+                rows.append((location, method, "skipped", "-", "-"))
+                continue
+
+            clear_palette_cache()
+            seconds, reduced_img = time_call(reduce_color, img, to=to, method=method)
+
+            # The palette of the image is cached now, so this one only pays for hashing and assigning.
+            cached_seconds = "-" if method == "kmeans" else f"{time_call(reduce_color, img, to=to, method=method)[0]:.3f}"
+
+            rows.append((
+                location, method, f"{seconds:.3f}", cached_seconds, f"{mean_color_error_of(img, reduced_img):.2f}"
+            ))
+
+    print_table(rows, header=("image", "method", "seconds", "cached seconds", "mean color error"))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,42 @@
+"""
+Benchmark the throughput of `ResistorReader` on the RESISTORS images,
+read one by one in this process, and streamed from a pool of worker processes.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.resistors
+"""
+import glob
+import time
+
+from lib.public import db, ResistorReader
+from ._timing import time_call, print_table
+
+
+def run(*, rounds: int = 4, processes: int | None = None) -> None:
+    paths = sorted(glob.glob(f"{db.resistor_dir}/RESISTORS-*.png"))
+    reader = ResistorReader()
+    rows = []
+
+    for path in paths:
+        img = db.get_img_located_at(path.removeprefix("data_dir/"), channel_mode="BGR")
+        seconds, readings = time_call(reader.read, img, repeat=3)
+        rows.append((
+            path.rsplit("/", 1)[-1],
+            len(readings),
+            ", ".join(reading.value or "?" for reading in readings),
+            f"{seconds:.3f}",
+            f"{1 / seconds:.1f}",
+        ))
+
+    # Every image several times, so the pool has enough work to reach its steady throughput.
+    start = time.perf_counter()
+    results = reader.read_many(paths * rounds, processes=processes, img_cache_dir=f"{db.cache_dir}/images")
+    images = sum(1 for _ in results)
+    seconds = time.perf_counter() - start
+    rows.append((f"read_many x{rounds}", images, "-", f"{seconds:.3f}", f"{reader.images_per_second:.1f}"))
+
+    print_table(rows, header=("image", "resistors", "values", "seconds", "images/s"))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,41 @@
+"""
+Benchmark `remove_shadow_from` on the boards, per execution mode,
+together with the difference of each mode from the exact result.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.shadow
+"""
+import numpy as np
+
+from lib.public import db, remove_shadow_from, remove_shadow_from_many
+from ._timing import time_call, print_table
+
+MODES = {
+    "serial": dict(threads=1),
+    "threaded": dict(),
+    "background 1/2": dict(background_scale=0.5),
+    "background 1/4": dict(background_scale=0.25),
+}
+
+
+def run(*, boards: tuple[str, ...] = ("BOARD1-1", "BOARD2-1", "BOARD3-1"), repeat: int = 3) -> None:
+    rows = []
+    imgs = [db.get_img_located_at(f"BOARDS/{board}.jpg", channel_mode="BGR") for board in boards]
+
+    for board, img in zip(boards, imgs):
+        exact = remove_shadow_from(img, threads=1)
+        out = np.empty_like(exact)
+
+        for mode, options in MODES.items():
+            seconds, result = time_call(remove_shadow_from, img, out=out, repeat=repeat, **options)
+            diff = np.abs(result.astype(np.int16) - exact)
+            rows.append((board, mode, f"{seconds:.3f}", f"{diff.mean():.2f}", f"{np.percentile(diff, 90):.0f}"))
+
+    seconds, _ = time_call(remove_shadow_from_many, imgs, repeat=repeat)
+    rows.append(("all boards", "batched", f"{seconds:.3f}", "-", "-"))
+
+    print_table(rows, header=("image", "mode", "seconds", "mean abs diff", "p90 abs diff"))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,98 @@
+"""
+Find the moving objects of the videos of the repository with `FramePipeline`,
+for the frames per second of the decoder and of every stage, waiting for the stages,
+or decoding at the frame rate of the video and dropping the frames the stages can't keep up with,
+next to decoding and processing every frame one after the other, with the background recomputed
+as the median of the last frames instead of updated incrementally.
+
+Run from the `practical_assignment` directory:
+    python -m benchmarks.video
+"""
+import collections
+import time
+
+import cv2
+import numpy as np
+
+from lib.public import (
+    FramePipeline,
+    RunningBackground,
+    Stage,
+    moving_components_of,
+    remove_shadow_from,
+)
+from ._timing import print_table
+
+VIDEOS = ("../data/taxi.mp4", "../data/junction.mp4", "../data/pedestrians.mp4")
+
+# Frames the sequential baseline takes the median of, for its background.
+MEDIAN_FRAMES = 10
+
+
+def _pipeline_of(*, realtime: bool) -> FramePipeline:
+    background = RunningBackground()
+
+    return FramePipeline([
+        Stage("flat", lambda frame: remove_shadow_from(frame.image, background_scale=0.5, threads=1)),
+        Stage("foreground", lambda frame: background.update(frame.outputs["flat"])),
+        Stage("objects", lambda frame: moving_components_of(frame.image, frame.outputs["foreground"])),
+    ], drop_frames=realtime, realtime=realtime)
+
+
+def _sequential_fps_of(path: str, slow_consumer_seconds: float) -> tuple[int, float]:
+    # Everything in the calling thread, with a fresh frame and a background recomputed for every frame.
+    capture = cv2.VideoCapture(path)
+    recent = collections.deque(maxlen=MEDIAN_FRAMES)
+    frames = 0
+
+    start = time.perf_counter()
+    while True:
+        ok, image = capture.read()
+        if not ok:
+            break
+
+        flat = cv2.cvtColor(remove_shadow_from(image, background_scale=0.5, threads=1), cv2.COLOR_BGR2GRAY)
+        recent.append(flat)
+        background = np.median(np.stack(recent), axis=0).astype(np.uint8)
+        _, foreground = cv2.threshold(cv2.absdiff(flat, background), 30, 255, cv2.THRESH_BINARY)
+        moving_components_of(image, foreground)
+        time.sleep(slow_consumer_seconds)
+        frames += 1
+
+    capture.release()
+
+    return frames, frames / (time.perf_counter() - start)
+
+
+def run(*, slow_consumer_seconds: float = 0.02) -> None:
+    rows = []
+
+    for path in VIDEOS:
+        sequential_frames, sequential_fps = _sequential_fps_of(path, slow_consumer_seconds)
+        rows.append((path, "sequential, median background", str(sequential_frames), "0", f"{sequential_fps:.1f}", ""))
+
+        for realtime in (False, True):
+            pipeline = _pipeline_of(realtime=realtime)
+
+            start = time.perf_counter()
+            frames = 0
+            for _ in pipeline.run(path):
+                # Stands in for whatever the caller does with the frame, e.g. showing it.
+                time.sleep(slow_consumer_seconds)
+                frames += 1
+            fps = frames / (time.perf_counter() - start)
+
+            rows.append((
+                path,
+                "pipeline, real time, dropping frames" if realtime else "pipeline",
+                str(frames),
+                str(pipeline.dropped_frames),
+                f"{fps:.1f}",
+                ", ".join(f"{stats.name} {stats.fps:.0f}" for stats in pipeline.stats),
+            ))
+
+    print_table(rows, header=("video", "run", "frames", "dropped", "fps", "fps per stage"))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,251 @@
+import os
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from ._calculations import central_line_of
+
+
+# All transforms are 2x3 affine matrices in the convention of `cv2.warpAffine`,
+# mapping source coordinates to destination coordinates.
+
+def rotation_matrix_of(angle: float, center: Sequence[float], /) -> np.ndarray:
+    """
+    Rotation by `angle` degrees (counterclockwise, like `cv2.getRotationMatrix2D`) around `center` (x, y).
+    """
+    return cv2.getRotationMatrix2D((float(center[0]), float(center[1])), angle, 1.0)
+
+
+def translation_matrix_of(dx: float, dy: float, /) -> np.ndarray:
+    return np.array([[1.0, 0.0, dx], [0.0, 1.0, dy]])
+
+
+def scale_matrix_of(sx: float, sy: float, /) -> np.ndarray:
+    return np.array([[sx, 0.0, 0.0], [0.0, sy, 0.0]])
+
+
+def compose_affine(*matrices: np.ndarray) -> np.ndarray:
+    """
+    Compose affine matrices, which are applied in the given order.
+    """
+    composed = np.eye(3)
+
+    for matrix in matrices:
+        composed = np.vstack((matrix, (0.0, 0.0, 1.0))) @ composed
+
+    return composed[:2]
+
+
+def warp_with(
+        img: np.ndarray,
+        matrix: np.ndarray,
+        size: tuple[int, int],
+        /,
+        *,
+        border_value: int | tuple[int, ...] = (255, 255, 255),
+        interpolation: int = cv2.INTER_LINEAR,
+        out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Warp the image with the affine matrix, only computing the `size` (width, height) output.
+    """
+    return cv2.warpAffine(
+        src=img,
+        M=matrix,
+        dsize=size,
+        dst=out,
+        flags=interpolation,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=border_value,
+    )
+
+
+def alignment_matrix_of(
+        shape: tuple[int, ...],
+        /,
+        *,
+        angle: float = 0.0,
+        center: Sequence[float] | None = None,
+        crop: tuple[int, int, int, int] | None = None,
+        size: tuple[int, int] | None = None,
+) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    The single affine matrix of rotating, then cropping, then resizing an image of the given shape.
+
+    Args:
+        shape: shape of the image.
+        angle: rotation in degrees, in the convention of `rotate_img_by_angle`.
+        center: center (x, y) of the rotation, defaults to the center of the image.
+        crop: (left, top, width, height) of the region to keep, in the rotated image, defaults to the whole image.
+        size: (width, height) to resize the cropped region to, defaults to the size of the region.
+
+    Returns:
+        the matrix, and the (width, height) of the output.
+    """
+    height, width = shape[:2]
+
+    if center is None:
+        center = (width / 2, height / 2)
+    if crop is None:
+        crop = (0, 0, width, height)
+
+    left, top, crop_width, crop_height = crop
+    if size is None:
+        size = (crop_width, crop_height)
+
+    matrix = compose_affine(
+        rotation_matrix_of(angle, center),
+        translation_matrix_of(-left, -top),
+        # Scale around the pixel centers, as `cv2.resize` does.
+        translation_matrix_of(0.5, 0.5),
+        scale_matrix_of(size[0] / crop_width, size[1] / crop_height),
+        translation_matrix_of(-0.5, -0.5),
+    )
+
+    return matrix, size
+
+
+def align(
+        img: np.ndarray,
+        /,
+        *,
+        angle: float = 0.0,
+        center: Sequence[float] | None = None,
+        crop: tuple[int, int, int, int] | None = None,
+        size: tuple[int, int] | None = None,
+        border_value: int | tuple[int, ...] = (255, 255, 255),
+        interpolation: int = cv2.INTER_LINEAR,
+) -> np.ndarray:
+    """
+    Rotate, crop and resize the image in a single warp, which only computes the output region.
+
+    It gives the same result as `rotate_img_by_angle`, slicing the crop out, and `cv2.resize`,
+    up to the interpolation of the resize, without the two full-size intermediate images.
+    See `alignment_matrix_of` for the arguments.
+    """
+    matrix, output_size = alignment_matrix_of(img.shape, angle=angle, center=center, crop=crop, size=size)
+
+    return warp_with(img, matrix, output_size, border_value=border_value, interpolation=interpolation)
+
+
+def align_many(
+        imgs: Sequence[np.ndarray],
+        /,
+        *,
+        angles: Sequence[float] | None = None,
+        sizes: Sequence[tuple[int, int]] | None = None,
+        threads: int | None = None,
+        **options,
+) -> list[np.ndarray]:
+    """
+    `align` each image with its own angle and output size, in a thread pool.
+
+    Args:
+        imgs: the images.
+        angles: the angle of each image, defaults to 0.
+        sizes: the output (width, height) of each image, defaults to the size of each image.
+        threads: number of threads, defaults to the number of cores.
+        options: other arguments of `align`, shared by all images.
+    """
+    angles = [0.0] * len(imgs) if angles is None else angles
+    sizes = [None] * len(imgs) if sizes is None else sizes
+
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as executor:
+        return list(executor.map(
+            lambda img, angle, size: align(img, angle=angle, size=size, **options), imgs, angles, sizes
+        ))
+
+
+def estimate_angle_from_axis_of(binary: np.ndarray, /) -> float:
+    """
+    Estimate the angle which makes the principal axis of a component vertical,
+    in the convention of `rotate_img_by_angle`, from its binary mask.
+
+    This is the angle `rotate_image` rotates by, given `central_line_of` the mask.
+    """
+    (ax, ay), (bx, by) = central_line_of(binary)
+
+    return float(np.arctan2(by - ay, bx - ax) * 180 / np.pi - 90)
+
+
+class AlignmentFeatures(NamedTuple):
+    keypoints: Sequence[cv2.KeyPoint]
+
+    # One row of ORB descriptor bytes per keypoint, None when no keypoint was found.
+    descriptors: np.ndarray | None
+
+
+def alignment_features_of(img: np.ndarray, /, *, max_features: int = 2000) -> AlignmentFeatures:
+    """
+    The ORB features of an image which `estimate_alignment_onto` matches,
+    so the features of a reference can be computed once and matched against many images.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    keypoints, descriptors = cv2.ORB_create(nfeatures=max_features).detectAndCompute(gray, None)
+
+    return AlignmentFeatures(keypoints, descriptors)
+
+
+def estimate_alignment_onto(
+        img: np.ndarray,
+        reference_features: AlignmentFeatures,
+        /,
+        *,
+        max_features: int = 2000,
+        ransac_threshold: float = 3.0,
+) -> np.ndarray | None:
+    """
+    Like `estimate_alignment_of`, with the features of the reference already computed by `alignment_features_of`.
+    """
+    img_keypoints, img_descriptors = alignment_features_of(img, max_features=max_features)
+    reference_keypoints, reference_descriptors = reference_features
+
+    if img_descriptors is None or reference_descriptors is None:
+        return None
+
+    matches = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True).match(img_descriptors, reference_descriptors)
+    if len(matches) < 3:
+        return None
+
+    img_points = np.float32([img_keypoints[match.queryIdx].pt for match in matches])
+    reference_points = np.float32([reference_keypoints[match.trainIdx].pt for match in matches])
+
+    matrix, _ = cv2.estimateAffinePartial2D(
+        img_points, reference_points, method=cv2.RANSAC, ransacReprojThreshold=ransac_threshold
+    )
+
+    return matrix
+
+
+def estimate_alignment_of(
+        img: np.ndarray,
+        reference: np.ndarray,
+        /,
+        *,
+        max_features: int = 2000,
+        ransac_threshold: float = 3.0,
+) -> np.ndarray | None:
+    """
+    Estimate the rotation, uniform scale and translation which align `img` onto `reference`,
+    by matching ORB features of both images.
+
+    Returns:
+        the 2x3 matrix, which aligns `img` with `warp_with(img, matrix, (reference width, reference height))`,
+        or None when there are not enough matching features.
+    """
+    return estimate_alignment_onto(
+        img,
+        alignment_features_of(reference, max_features=max_features),
+        max_features=max_features,
+        ransac_threshold=ransac_threshold,
+    )
+
+
+def angle_of(matrix: np.ndarray, /) -> float:
+    """
+    The rotation angle in degrees of an affine matrix, in the convention of `rotate_img_by_angle`.
+    """
+    return float(np.degrees(np.arctan2(matrix[0, 1], matrix[0, 0])))
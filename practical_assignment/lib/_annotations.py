@@ -0,0 +1,342 @@
+import os
+import threading
+import xml.etree.ElementTree as ElementTree
+from typing import Final, NamedTuple
+
+import numpy as np
+
+# One row per annotated box, `image_id` and `label` index `AnnotationIndex.images` and `AnnotationIndex.labels`.
+ANNOTATION_DTYPE: Final[np.dtype] = np.dtype([
+    ("image_id", np.int32),
+    ("label", np.int32),
+    ("xmin", np.int32),
+    ("ymin", np.int32),
+    ("xmax", np.int32),
+    ("ymax", np.int32),
+])
+
+
+class AnnotatedImage(NamedTuple):
+    # Path of the image relative to the data directory, e.g. "BOARDS/BOARD3-1.jpg".
+    location: str
+    width: int
+    height: int
+
+    # Name of the XML file it's annotated in.
+    xml_name: str
+
+
+class _ParsedXml(NamedTuple):
+    image: AnnotatedImage
+    labels: list[str]
+
+    # (N, 4) xmin, ymin, xmax, ymax
+    boxes: np.ndarray
+
+
+def _parse_xml_at(path: str) -> _ParsedXml:
+    # A streaming parse, every element is dropped as soon as it's read,
+    # and any number of objects is handled the same way, whether there is one or many.
+    folder = filename = ""
+    width = height = 0
+    labels = []
+    boxes = []
+    box = {}
+    name = ""
+
+    for _, element in ElementTree.iterparse(path, events=("end",)):
+        tag = element.tag
+        text = (element.text or "").strip()
+
+        if tag == "folder":
+            folder = text
+        elif tag == "filename":
+            filename = text
+        elif tag == "width":
+            width = int(float(text))
+        elif tag == "height":
+            height = int(float(text))
+        elif tag == "name":
+            name = text
+        elif tag in ("xmin", "ymin", "xmax", "ymax"):
+            # Some tools write the coordinates as floats.
+            box[tag] = int(float(text))
+        elif tag == "object":
+            labels.append(name)
+            boxes.append((box["xmin"], box["ymin"], box["xmax"], box["ymax"]))
+            box = {}
+            name = ""
+
+        if tag != "annotation":
+            element.clear()
+
+    image = AnnotatedImage(f"{folder}/{filename}", width, height, os.path.basename(path))
+
+    return _ParsedXml(image, labels, np.array(boxes, dtype=np.int32).reshape(-1, 4))
+
+
+def annotation_xml_of(image: AnnotatedImage, labels: list[str], boxes: np.ndarray, /) -> str:
+    """
+    The VOC-style XML of boxes found in an image, the same layout as the files of the ANNOTATIONS directory,
+    so found boxes can be opened in the same tools as the annotations, and read back by `AnnotationIndex`.
+
+    Args:
+        image: the image the boxes are in.
+        labels: the label of each box.
+        boxes: (N, 4) inclusive (xmin, ymin, xmax, ymax) boxes.
+    """
+    if len(labels) != len(boxes):
+        raise ValueError(f"There should be a label per box, which are {len(labels)} labels for {len(boxes)} boxes.")
+
+    folder, _, filename = image.location.rpartition("/")
+
+    annotation = ElementTree.Element("annotation")
+    ElementTree.SubElement(annotation, "folder").text = folder
+    ElementTree.SubElement(annotation, "filename").text = filename
+    ElementTree.SubElement(annotation, "path").text = image.location
+    ElementTree.SubElement(ElementTree.SubElement(annotation, "source"), "database").text = "Unknown"
+
+    size = ElementTree.SubElement(annotation, "size")
+    ElementTree.SubElement(size, "width").text = str(image.width)
+    ElementTree.SubElement(size, "height").text = str(image.height)
+    ElementTree.SubElement(size, "depth").text = "3"
+    ElementTree.SubElement(annotation, "segmented").text = "0"
+
+    for label, box in zip(labels, np.asarray(boxes).reshape(-1, 4)):
+        element = ElementTree.SubElement(annotation, "object")
+        ElementTree.SubElement(element, "name").text = label
+        ElementTree.SubElement(element, "pose").text = "Unspecified"
+        ElementTree.SubElement(element, "truncated").text = "0"
+        ElementTree.SubElement(element, "difficult").text = "0"
+
+        bndbox = ElementTree.SubElement(element, "bndbox")
+        for tag, value in zip(("xmin", "ymin", "xmax", "ymax"), box):
+            ElementTree.SubElement(bndbox, tag).text = str(int(value))
+
+    ElementTree.indent(annotation, space="\t")
+
+    return ElementTree.tostring(annotation, encoding="unicode") + "\n"
+
+
+class AnnotationIndex:
+    """
+    An index of all boxes annotated in the VOC-style XML files of a directory.
+
+    The XML files are parsed once, and the index is kept on disk as columnar NumPy arrays,
+    so loading it again does not parse anything. `refresh` only parses the XML files
+    which are new or have changed since the index was built.
+
+    The boxes are sorted by image and then by `xmin`, and a permutation keeps them sorted by label,
+    so finding the boxes of an image or of a label is a binary search.
+    Finding the boxes of an image overlapping a region is two binary searches for the vertical slab of boxes
+    which can reach the region, knowing the widest box of the image, and a check of the boxes in that slab only.
+
+    e.g.
+        annotations = db.annotations
+        for box in annotations.boxes_of_image("BOARDS/BOARD3-1.jpg"):
+            print(annotations.labels[box["label"]], box["xmin"], box["ymin"], box["xmax"], box["ymax"])
+    """
+    __annotation_dir: Final[str]
+    __index_path: Final[str | None]
+
+    def __init__(self, *, annotation_dir: str, index_path: str | None = None):
+        """
+        Args:
+            annotation_dir: directory of the XML files.
+            index_path: `.npz` file to keep the index in, None to keep it in memory only.
+        """
+        self.__annotation_dir = annotation_dir
+        self.__index_path = index_path
+        self.__lock = threading.Lock()
+
+        self.__boxes = np.empty(0, dtype=ANNOTATION_DTYPE)
+        self.__images: list[AnnotatedImage] = []
+        self.__labels: list[str] = []
+        self.__xml_mtimes: dict[str, int] = {}
+
+        self.__load()
+        self.refresh()
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """
+        All boxes, sorted by image and then by `xmin`.
+        """
+        return self.__boxes
+
+    @property
+    def images(self) -> list[AnnotatedImage]:
+        return self.__images
+
+    @property
+    def labels(self) -> list[str]:
+        """
+        The sorted distinct labels.
+        """
+        return self.__labels
+
+    def image_id_of(self, location: str, /) -> int:
+        """
+        The id of an image from its path relative to the data directory, e.g. "BOARDS/BOARD3-1.jpg",
+        or the name of its XML file, e.g. "BOARD3-1.xml".
+        """
+        try:
+            return self.__image_ids[location]
+        except KeyError:
+            raise ValueError(f"There is no annotated image at {location}.") from None
+
+    def label_id_of(self, label: str, /) -> int:
+        label_id = int(np.searchsorted(self.__label_array, label))
+        if label_id == len(self.__labels) or self.__labels[label_id] != label:
+            raise ValueError(f"There is no box labeled {label}.")
+
+        return label_id
+
+    def boxes_of_image(self, image: str | int, /) -> np.ndarray:
+        """
+        The boxes of an image, given its location, XML name or id, sorted by `xmin`.
+        """
+        image_id = self.image_id_of(image) if isinstance(image, str) else image
+        start, stop = np.searchsorted(self.__boxes["image_id"], (image_id, image_id + 1))
+
+        return self.__boxes[start:stop]
+
+    def boxes_labeled(self, label: str | int, /) -> np.ndarray:
+        """
+        The boxes of a label, given its name or id, sorted by image.
+        """
+        label_id = self.label_id_of(label) if isinstance(label, str) else label
+        start, stop = np.searchsorted(self.__sorted_labels, (label_id, label_id + 1))
+
+        return self.__boxes[self.__by_label[start:stop]]
+
+    def boxes_overlapping(self, image: str | int, region: tuple[int, int, int, int], /) -> np.ndarray:
+        """
+        The boxes of an image which overlap a region, including the ones only touching it.
+
+        Args:
+            image: location, XML name or id of the image.
+            region: (xmin, ymin, xmax, ymax) of the region, in the coordinates of the annotations.
+        """
+        xmin, ymin, xmax, ymax = region
+        image_id = self.image_id_of(image) if isinstance(image, str) else image
+        boxes = self.boxes_of_image(image_id)
+
+        # The boxes are sorted by xmin, and none is wider than the widest one,
+        # so only the ones starting between the left edge minus that width and the right edge can overlap.
+        start = np.searchsorted(boxes["xmin"], xmin - self.__max_widths[image_id], side="left")
+        stop = np.searchsorted(boxes["xmin"], xmax, side="right")
+        boxes = boxes[start:stop]
+
+        return boxes[(boxes["xmax"] >= xmin) & (boxes["ymin"] <= ymax) & (boxes["ymax"] >= ymin)]
+
+    def __xml_mtimes_on_disk(self) -> dict[str, int]:
+        return {
+            entry.name: entry.stat().st_mtime_ns
+            for entry in os.scandir(self.__annotation_dir)
+            if entry.name.endswith(".xml")
+        }
+
+    def refresh(self) -> int:
+        """
+        Parse the XML files which are new or changed, and forget the removed ones.
+
+        Returns:
+            the number of parsed XML files.
+        """
+        with self.__lock:
+            xml_mtimes = self.__xml_mtimes_on_disk()
+            if xml_mtimes == self.__xml_mtimes:
+                return 0
+
+            # Keep the parsed results of the unchanged files.
+            parsed_of_xml: dict[str, _ParsedXml] = {}
+            for image_id, image in enumerate(self.__images):
+                if xml_mtimes.get(image.xml_name) == self.__xml_mtimes.get(image.xml_name):
+                    boxes = self.boxes_of_image(image_id)
+                    parsed_of_xml[image.xml_name] = _ParsedXml(
+                        image,
+                        [self.__labels[label_id] for label_id in boxes["label"]],
+                        np.stack([boxes["xmin"], boxes["ymin"], boxes["xmax"], boxes["ymax"]], axis=1),
+                    )
+
+            changed = [xml_name for xml_name in xml_mtimes if xml_name not in parsed_of_xml]
+            for xml_name in changed:
+                parsed_of_xml[xml_name] = _parse_xml_at(f"{self.__annotation_dir}/{xml_name}")
+
+            self.__build_from([parsed_of_xml[xml_name] for xml_name in sorted(parsed_of_xml)])
+            self.__xml_mtimes = xml_mtimes
+            self.__save()
+
+            return len(changed)
+
+    def __build_from(self, parsed: list[_ParsedXml]) -> None:
+        labels = sorted({label for parsed_xml in parsed for label in parsed_xml.labels})
+        label_ids = {label: label_id for label_id, label in enumerate(labels)}
+
+        boxes = np.empty(sum(len(parsed_xml.labels) for parsed_xml in parsed), dtype=ANNOTATION_DTYPE)
+        offset = 0
+        for image_id, parsed_xml in enumerate(parsed):
+            rows = boxes[offset:offset + len(parsed_xml.labels)]
+            rows["image_id"] = image_id
+            rows["label"] = [label_ids[label] for label in parsed_xml.labels]
+            rows["xmin"], rows["ymin"], rows["xmax"], rows["ymax"] = parsed_xml.boxes.T
+            offset += len(rows)
+
+        self.__boxes = np.sort(boxes, order=("image_id", "xmin", "ymin", "xmax", "ymax", "label"))
+        self.__boxes.flags.writeable = False
+        self.__images = [parsed_xml.image for parsed_xml in parsed]
+        self.__labels = labels
+        self.__index()
+
+    def __index(self) -> None:
+        self.__label_array = np.array(self.__labels, dtype=str)
+        self.__by_label = np.argsort(self.__boxes["label"], kind="stable")
+        self.__sorted_labels = self.__boxes["label"][self.__by_label]
+
+        # The width of the widest box of each image, which bounds how far left of a region an overlapping box starts.
+        self.__max_widths = np.zeros(len(self.__images), dtype=np.int64)
+        np.maximum.at(self.__max_widths, self.__boxes["image_id"], self.__boxes["xmax"] - self.__boxes["xmin"])
+
+        self.__image_ids = {}
+        for image_id, image in enumerate(self.__images):
+            self.__image_ids[image.location] = image_id
+            self.__image_ids[image.xml_name] = image_id
+
+    def __save(self) -> None:
+        if self.__index_path is None:
+            return
+
+        os.makedirs(os.path.dirname(self.__index_path) or ".", exist_ok=True)
+
+        # Write to a temporary file first, so a concurrent reader never sees a partial index.
+        temporary_path = f"{self.__index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez(
+                f,
+                boxes=self.__boxes,
+                labels=np.array(self.__labels, dtype=str),
+                locations=np.array([image.location for image in self.__images], dtype=str),
+                sizes=np.array([(image.width, image.height) for image in self.__images], dtype=np.int32).reshape(-1, 2),
+                xml_names=np.array([image.xml_name for image in self.__images], dtype=str),
+                xml_mtimes=np.array([self.__xml_mtimes[image.xml_name] for image in self.__images], dtype=np.int64),
+            )
+        os.replace(temporary_path, self.__index_path)
+
+    def __load(self) -> None:
+        if self.__index_path is None or not os.path.isfile(self.__index_path):
+            self.__index()
+            return
+
+        with np.load(self.__index_path, allow_pickle=False) as stored:
+            self.__boxes = stored["boxes"]
+            self.__boxes.flags.writeable = False
+            self.__labels = stored["labels"].tolist()
+            self.__images = [
+                AnnotatedImage(location, int(width), int(height), xml_name)
+                for location, (width, height), xml_name
+                in zip(stored["locations"].tolist(), stored["sizes"], stored["xml_names"].tolist())
+            ]
+            self.__xml_mtimes = dict(zip(stored["xml_names"].tolist(), stored["xml_mtimes"].tolist()))
+
+        self.__index()
@@ -0,0 +1,244 @@
+import functools
+import hashlib
+import multiprocessing as mp
+import os
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from ._box import find_single_components_in, rotate_img_by_angle
+from ._calculations import remove_shadow_from
+from ._image_store import _ImageStore
+from ._memoize import ResultCache
+
+
+class BoardSettings(NamedTuple):
+    # Same as the arguments of `find_single_components_in`.
+    bg_threshold: int = 245
+    min_size: int = 100
+
+    # Remove the shadow of the board with `remove_shadow_from` before finding its components.
+    remove_shadow: bool = False
+
+    # Rotate every found component by this angle with `rotate_img_by_angle`, in degrees.
+    rotate_by: float | None = None
+
+    # Only keep the tallest component, which is the board itself when the image holds a single board.
+    keep_largest: bool = False
+
+
+class BoardComponents(NamedTuple):
+    # The index of the board in the given paths.
+    index: int
+    path: str
+
+    # Same as the results of `find_single_components_in`.
+    components: list[np.ndarray]
+    components_binary: list[np.ndarray]
+
+    # Wall time the worker spent on the board, including loading it.
+    seconds: float
+
+
+@functools.cache
+def pool_context() -> mp.context.BaseContext:
+    """
+    The context the worker pools of the lib are started from, see `find_components_in_boards`.
+
+    Workers start from a fresh server process where the platform has one, and from a fresh interpreter otherwise,
+    e.g. on Windows, never from a fork of this process.
+    """
+    if "forkserver" in mp.get_all_start_methods():
+        return mp.get_context("forkserver")
+
+    return mp.get_context("spawn")
+
+
+# Decoded images of the worker process, created lazily in each worker.
+_worker_img_store: _ImageStore | None = None
+
+
+def _img_store_of(img_cache_dir: str | None) -> _ImageStore:
+    global _worker_img_store
+
+    if _worker_img_store is None:
+        # Every board is only loaded once by a worker, so the memory tier would only hold garbage.
+        _worker_img_store = _ImageStore(memory_budget=0, disk_dir=img_cache_dir)
+
+    return _worker_img_store
+
+
+def _extract_components_of_board(
+        task: tuple[int, str, BoardSettings, str | None]
+) -> tuple[int, str, str, list[tuple[int, tuple[int, ...], str, int]], float]:
+    index, path, settings, img_cache_dir = task
+    start = time.perf_counter()
+
+    img = _img_store_of(img_cache_dir).load(path, channel_mode="BGR")
+
+    if settings.remove_shadow:
+        img = remove_shadow_from(img)
+
+    components, components_binary = find_single_components_in(img, settings.bg_threshold, settings.min_size)
+
+    if settings.keep_largest and components:
+        largest = int(np.argmax([component.shape[0] for component in components]))
+        components, components_binary = [components[largest]], [components_binary[largest]]
+
+    if settings.rotate_by is not None:
+        components = [rotate_img_by_angle(component, settings.rotate_by) for component in components]
+        components_binary = [
+            rotate_img_by_angle(binary, settings.rotate_by, border_value=0, interpolation=cv2.INTER_NEAREST)
+            for binary in components_binary
+        ]
+
+    # Pack all results into a single shared memory block, and only send its layout back.
+    # layout: (which list the array belongs to, shape, dtype, offset in the block)
+    layout = []
+    offset = 0
+    for which, arrays in enumerate((components, components_binary)):
+        for array in arrays:
+            layout.append((which, array.shape, array.dtype.str, offset))
+            offset += array.nbytes
+
+    shared_memory = SharedMemory(create=True, size=max(offset, 1))
+    for (_, shape, dtype, array_offset), array in zip(layout, (*components, *components_binary)):
+        np.ndarray(shape, dtype=dtype, buffer=shared_memory.buf, offset=array_offset)[...] = array
+
+    name = shared_memory.name
+    shared_memory.close()
+
+    return index, path, name, layout, time.perf_counter() - start
+
+
+def _unlink(name: str) -> None:
+    shared_memory = SharedMemory(name=name)
+    shared_memory.close()
+    shared_memory.unlink()
+
+
+def _receive(
+        index: int, path: str, name: str, layout: list[tuple[int, tuple[int, ...], str, int]], seconds: float
+) -> BoardComponents:
+    shared_memory = SharedMemory(name=name)
+
+    # One copy of the whole block, then every result is a view of it.
+    block = np.empty(shared_memory.size, dtype=np.uint8)
+    block[:] = np.frombuffer(shared_memory.buf, dtype=np.uint8)
+
+    shared_memory.close()
+    shared_memory.unlink()
+
+    results: tuple[list[np.ndarray], list[np.ndarray]] = ([], [])
+    for which, shape, dtype, offset in layout:
+        results[which].append(np.ndarray(shape, dtype=dtype, buffer=block, offset=offset))
+
+    return BoardComponents(index, path, results[0], results[1], seconds)
+
+
+def _file_digest_of(path: str) -> str:
+    # Keyed by the bytes instead of the path, so a board replaced under the same path is not mistaken for the old one.
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=20)).hexdigest()
+
+
+def find_components_in_boards(
+        paths: Sequence[str],
+        /,
+        *,
+        settings: BoardSettings | Sequence[BoardSettings] | Mapping[str, BoardSettings] = BoardSettings(),
+        processes: int | None = None,
+        img_cache_dir: str | None = None,
+        cache: ResultCache | None = None,
+) -> Iterator[BoardComponents]:
+    """
+    Find the single components of many boards in a pool of worker processes.
+
+    The workers load the boards themselves from the paths, so no image is sent to them,
+    and they send the found components back through shared memory instead of pickling them.
+    Results are yielded as soon as each board is done, so they are not in the order of `paths`,
+    use `BoardComponents.index` to tell them apart.
+
+    Args:
+        paths: paths of the board images.
+        settings: the settings of all boards, one settings per board, or a mapping from path to settings.
+        processes: number of worker processes, defaults to the number of cores, and never more than the boards.
+        img_cache_dir: directory of the on-disk tier of `_ImageStore`, e.g. `f"{db.cache_dir}/images"`,
+            to skip decoding boards which have been decoded before.
+        cache: a `ResultCache` to load the components of boards found before with the same settings,
+            keyed by the bytes of the board and its settings. Only the other boards are sent to the workers,
+            so running again costs only hashing the boards and loading their results.
+
+    Yields:
+        the components of each board.
+    """
+    if isinstance(settings, BoardSettings):
+        settings_of_boards = [settings] * len(paths)
+    elif isinstance(settings, Mapping):
+        settings_of_boards = [settings[path] for path in paths]
+    else:
+        settings_of_boards = list(settings)
+
+    if len(settings_of_boards) != len(paths):
+        raise ValueError(f"There are {len(paths)} boards but {len(settings_of_boards)} settings.")
+
+    tasks = []
+    digests = {}
+    for index, (path, board_settings) in enumerate(zip(paths, settings_of_boards)):
+        if cache is None:
+            tasks.append((index, path, board_settings, img_cache_dir))
+            continue
+
+        start = time.perf_counter()
+        digests[index] = _file_digest_of(path)
+
+        try:
+            components, components_binary = cache.load(find_components_in_boards, digests[index], board_settings)
+        except KeyError:
+            tasks.append((index, path, board_settings, img_cache_dir))
+            continue
+
+        yield BoardComponents(index, path, components, components_binary, time.perf_counter() - start)
+
+    if not tasks:
+        return
+
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+
+    # Make sure the workers share the resource tracker of this process,
+    # so shared memory created by a worker is released when this process unlinks it.
+    # Only POSIX shared memory is tracked, the one of Windows is released with its last handle.
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+    # The workers start from a fresh server process or interpreter instead of a fork of this one,
+    # which could hold the threads of e.g. a `ContactSheetBackend` or a `FramePipeline` halfway through their work.
+    with pool_context().Pool(processes=processes) as pool:
+        results = pool.imap_unordered(_extract_components_of_board, tasks)
+        try:
+            for result in results:
+                board = _receive(*result)
+                if cache is not None:
+                    cache.store(
+                        (board.components, board.components_binary),
+                        find_components_in_boards, digests[board.index], settings_of_boards[board.index],
+                    )
+                yield board
+        finally:
+            # When the caller stops early, the blocks of the boards done but not received yet are released here,
+            # the ones of the boards still in progress are released by the resource tracker when this process exits.
+            pool.terminate()
+            while True:
+                try:
+                    _, _, name, _, _ = results.next(timeout=0)
+                except (StopIteration, mp.TimeoutError):
+                    break
+                except Exception:
+                    # A board which failed has no block, the ones after it still have to be released.
+                    continue
+                _unlink(name)
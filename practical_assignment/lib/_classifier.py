@@ -0,0 +1,323 @@
+import os
+import threading
+from collections.abc import Sequence
+from typing import Any, Final, NamedTuple
+
+import cv2
+import numpy as np
+
+from ._file import _FileAgent
+
+# The types of the components, as the COMPONENTS images are named and as the boards are annotated.
+COMPONENT_TYPES: Final[tuple[str, ...]] = (
+    "buck",
+    "cap1",
+    "cap2",
+    "con",
+    "dac",
+    "diode",
+    "enet",
+    "osc1",
+    "osc2",
+    "rect",
+    "regulator",
+    "resistor",
+    "transistor",
+)
+
+
+def _keras() -> Any:
+    # keras and JAX are slow to import, and only needed once something is classified,
+    # the backend and the device are chosen before the first import, unless already chosen.
+    os.environ.setdefault("KERAS_BACKEND", "jax")
+    os.environ.setdefault("JAX_PLATFORMS", "cpu")
+
+    import keras
+
+    return keras
+
+
+class ClassifierSettings(NamedTuple):
+    # Side of the square the crops are fitted in, the input of the model is (input_size, input_size, 3).
+    input_size: int = 64
+
+    # Number of crops of every call of the model, the last batch is padded up to it,
+    # so the jitted graph is compiled once and reused for every batch.
+    batch_size: int = 32
+
+    # Training, see `ComponentClassifier.fit`.
+    epochs: int = 40
+    learning_rate: float = 1e-3
+    augmentations: int = 24
+
+
+class Classification(NamedTuple):
+    label: str
+
+    # Probability of the label, and of every type of `COMPONENT_TYPES`.
+    score: float
+    probabilities: np.ndarray
+
+
+def fit_crop_to_size(crop: np.ndarray, size: int, /) -> np.ndarray:
+    """
+    Fit an RGB crop in a white square, keeping its aspect ratio, as the white canvas of `find_single_components_in`.
+
+    Returns:
+        uint8 array of shape (size, size, 3).
+    """
+    if crop.ndim == 2:
+        crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2RGB)
+
+    height, width = crop.shape[:2]
+    scale = size / max(height, width)
+    fitted_width = max(int(round(width * scale)), 1)
+    fitted_height = max(int(round(height * scale)), 1)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    fitted = cv2.resize(crop[:, :, :3], (fitted_width, fitted_height), interpolation=interpolation)
+
+    square = np.full((size, size, 3), 255, dtype=np.uint8)
+    top = (size - fitted_height) // 2
+    left = (size - fitted_width) // 2
+    square[top:top + fitted_height, left:left + fitted_width] = fitted
+
+    return square
+
+
+def _augmented_crops_of(crop: np.ndarray, count: int, rng: np.random.Generator) -> list[np.ndarray]:
+    # The components lie at any angle on the boards, and are lit differently from the COMPONENTS photos.
+    height, width = crop.shape[:2]
+    diagonal = int(np.ceil(np.hypot(height, width)))
+    canvas = np.full((diagonal, diagonal, 3), 255, dtype=np.uint8)
+    top, left = (diagonal - height) // 2, (diagonal - width) // 2
+    canvas[top:top + height, left:left + width] = crop[:, :, :3]
+
+    augmented = []
+    for _ in range(count):
+        matrix = cv2.getRotationMatrix2D(
+            (diagonal / 2, diagonal / 2), rng.uniform(0, 360), rng.uniform(0.85, 1.15)
+        )
+        rotated = cv2.warpAffine(canvas, matrix, (diagonal, diagonal), borderValue=(255, 255, 255))
+        if rng.random() < 0.5:
+            rotated = rotated[:, ::-1]
+
+        augmented.append(cv2.convertScaleAbs(rotated, alpha=rng.uniform(0.8, 1.2), beta=rng.uniform(-20, 20)))
+
+    return augmented
+
+
+class ComponentClassifier:
+    """
+    Tell the type of a component from its crop, with a small convolutional network on Keras with the JAX backend.
+
+    The crops are fitted in squares of the same size, see `fit_crop_to_size`,
+    and always go through the model in batches of `batch_size`, the last one padded with blank crops,
+    so the jitted graph is compiled for a single input shape.
+    The model is built, and its weights loaded from `weights_path`, only on the first use.
+
+    e.g.
+        classifier = ComponentClassifier(f"{db.cache_dir}/component-classifier.weights.h5")
+        components, _ = find_single_components_in(board)
+        for classification in classifier.classify(components):
+            print(classification.label, classification.score)
+    """
+
+    def __init__(
+            self,
+            weights_path: str | None = None,
+            /,
+            *,
+            settings: ClassifierSettings = ClassifierSettings(),
+            labels: Sequence[str] = COMPONENT_TYPES,
+    ):
+        """
+        Args:
+            weights_path: `.weights.h5` file the weights are loaded from, and saved to by `save`.
+                None or a missing file starts from untrained weights.
+            settings: input size, batch size and training settings.
+            labels: the types the model tells apart, in the order of its outputs.
+        """
+        self.__weights_path = weights_path
+        self.__settings = settings
+        self.__labels = tuple(labels)
+        self.__model = None
+        self.__lock = threading.Lock()
+
+    @property
+    def settings(self) -> ClassifierSettings:
+        return self.__settings
+
+    @property
+    def labels(self) -> tuple[str, ...]:
+        return self.__labels
+
+    @property
+    def model(self) -> Any:
+        """
+        The Keras model, built and loaded on the first access.
+        """
+        with self.__lock:
+            if self.__model is None:
+                self.__model = self.__build_model()
+                if self.__weights_path is not None and os.path.isfile(self.__weights_path):
+                    self.__model.load_weights(self.__weights_path)
+
+            return self.__model
+
+    def __build_model(self) -> Any:
+        keras = _keras()
+        size = self.__settings.input_size
+
+        model = keras.models.Sequential([
+            keras.layers.Input(shape=(size, size, 3)),
+            keras.layers.Rescaling(1 / 255),
+            keras.layers.Conv2D(16, kernel_size=(3, 3), padding='same', activation='relu'),
+            keras.layers.MaxPooling2D((2, 2), strides=2),
+            keras.layers.Conv2D(32, kernel_size=(3, 3), padding='same', activation='relu'),
+            keras.layers.MaxPooling2D((2, 2), strides=2),
+            keras.layers.Conv2D(64, kernel_size=(3, 3), padding='same', activation='relu'),
+            keras.layers.MaxPooling2D((2, 2), strides=2),
+            keras.layers.GlobalAveragePooling2D(),
+            keras.layers.Dense(64, activation='relu'),
+            keras.layers.Dense(len(self.__labels), activation='softmax'),
+        ])
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=self.__settings.learning_rate),
+            loss="sparse_categorical_crossentropy",
+            metrics=["accuracy"],
+            jit_compile=True,
+        )
+
+        return model
+
+    def batches_of(self, crops: Sequence[np.ndarray], /) -> np.ndarray:
+        """
+        The crops fitted in squares, padded with blank white squares up to a multiple of `batch_size`.
+
+        Returns:
+            uint8 array of shape (batches * batch_size, input_size, input_size, 3).
+        """
+        settings = self.__settings
+        padded_count = -(-len(crops) // settings.batch_size) * settings.batch_size
+
+        batches = np.full((padded_count, settings.input_size, settings.input_size, 3), 255, dtype=np.uint8)
+        for n, crop in enumerate(crops):
+            batches[n] = fit_crop_to_size(crop, settings.input_size)
+
+        return batches
+
+    def probabilities_of(self, crops: Sequence[np.ndarray], /) -> np.ndarray:
+        """
+        The probability of every label for every crop.
+
+        Returns:
+            float array of shape (len(crops), len(labels)).
+        """
+        if not crops:
+            return np.empty((0, len(self.__labels)), dtype=np.float32)
+
+        model = self.model
+        batch_size = self.__settings.batch_size
+        batches = self.batches_of(crops)
+
+        probabilities = np.concatenate([
+            np.asarray(model.predict_on_batch(batches[start:start + batch_size].astype(np.float32)))
+            for start in range(0, len(batches), batch_size)
+        ])
+
+        return probabilities[:len(crops)]
+
+    def classify(self, crops: Sequence[np.ndarray], /) -> list[Classification]:
+        """
+        The most probable type of each RGB crop, e.g. of the components of `find_single_components_in`.
+        """
+        return [
+            Classification(self.__labels[best], float(probabilities[best]), probabilities)
+            for probabilities in self.probabilities_of(crops)
+            for best in (int(np.argmax(probabilities)),)
+        ]
+
+    def fit(
+            self,
+            crops: Sequence[np.ndarray],
+            labels: Sequence[str],
+            /,
+            *,
+            seed: int = 0,
+            verbose: int = 0,
+    ) -> dict[str, list[float]]:
+        """
+        Train the model on RGB crops of components, each augmented `augmentations` times
+        with random rotations, scales, flips and lighting.
+
+        Returns:
+            the loss and accuracy of every epoch.
+        """
+        if len(crops) != len(labels):
+            raise ValueError(f"There should be a label per crop, which are {len(labels)} labels for {len(crops)} crops.")
+
+        settings = self.__settings
+        label_ids = {label: label_id for label_id, label in enumerate(self.__labels)}
+        unknown = sorted(set(labels) - label_ids.keys())
+        if unknown:
+            raise ValueError(f"The labels {', '.join(unknown)} are not any of {', '.join(self.__labels)}.")
+
+        rng = np.random.default_rng(seed)
+        augmented_crops = []
+        augmented_labels = []
+        for crop, label in zip(crops, labels):
+            for augmented in _augmented_crops_of(crop, settings.augmentations, rng):
+                augmented_crops.append(fit_crop_to_size(augmented, settings.input_size))
+                augmented_labels.append(label_ids[label])
+
+        # Drop the remainder, so every training batch has the same shape too.
+        count = len(augmented_crops) // settings.batch_size * settings.batch_size
+        order = rng.permutation(len(augmented_crops))[:count]
+
+        history = self.model.fit(
+            np.stack(augmented_crops)[order].astype(np.float32),
+            np.array(augmented_labels)[order],
+            batch_size=settings.batch_size,
+            epochs=settings.epochs,
+            shuffle=True,
+            verbose=verbose,
+        )
+
+        return history.history
+
+    def save(self, weights_path: str | None = None, /) -> None:
+        """
+        Save the weights to `weights_path`, by default the one they were loaded from.
+        """
+        weights_path = weights_path or self.__weights_path
+        if weights_path is None:
+            raise ValueError("There is no path to save the weights to.")
+
+        os.makedirs(os.path.dirname(weights_path) or ".", exist_ok=True)
+        self.model.save_weights(weights_path)
+        self.__weights_path = weights_path
+
+
+def annotated_component_crops_of(agent: _FileAgent, /) -> tuple[list[np.ndarray], list[str]]:
+    """
+    The RGB crops of the annotated boxes of the COMPONENTS images, and their types from the image names,
+    e.g. the box of "COMPONENTS/BUCK-1.jpg" is a "buck".
+
+    Args:
+        agent: the `db` of `lib.public`.
+    """
+    annotations = agent.annotations
+    crops = []
+    labels = []
+
+    for image_id, image in enumerate(annotations.images):
+        folder, _, filename = image.location.rpartition("/")
+        if folder != "COMPONENTS":
+            continue
+
+        img = agent.get_img_located_at(image.location, channel_mode="RGB")
+        for box in annotations.boxes_of_image(image_id):
+            crops.append(img[box["ymin"]:box["ymax"] + 1, box["xmin"]:box["xmax"] + 1])
+            labels.append(filename.split("-")[0].lower())
+
+    return crops, labels
@@ -3,6 +3,8 @@ from __future__ import annotations
 from enum import Enum, unique
 from collections.abc import Sequence
 
+import numpy as np
+
 
 @unique
 class ResistorColor(Enum):
@@ -36,9 +38,20 @@ class ResistorColorFinder:
     # __gold_rgb_range = (range(130, 230), range(90, 225), range(54, 225),)
     # __silver_rgb_range = (range(195, 205), range(195, 205), range(195, 205),)
 
+    # Colors without a measured range use their nominal color code RGB.
+    __fallback_rgbs = {
+        ResistorColor.BLUE: (0, 0, 255),
+        ResistorColor.GRAY: (128, 128, 128),
+        ResistorColor.GOLD: (212, 175, 55),
+        ResistorColor.SILVER: (192, 192, 192),
+    }
+
+    # The lookup table from every (r, g, b) to its `ResistorColor` value, built on first use.
+    __lut: np.ndarray | None = None
+
     @classmethod
-    def from_rgb(cls, rgb: Sequence[int, int, int]) -> ResistorColor:
-        all_ranges = (
+    def __all_ranges(cls) -> tuple:
+        return (
             cls.__black_rgb_range,
             cls.__brown_rgb_range,
             cls.__red_rgb_range,
@@ -51,19 +64,93 @@ class ResistorColorFinder:
             cls.__white_rgb_range,
         )
 
-        for i, color_ranges in enumerate(all_ranges):
+    @classmethod
+    def lut(cls) -> np.ndarray:
+        """
+        The 256x256x256 lookup table of `ResistorColor` values, indexed by [r, g, b].
+
+        It is built from the color ranges on first use and then shared.
+        Every range is a box in the RGB cube, so it's filled box by box,
+        from the lowest precedence to the highest, and the highest precedence always wins.
+        """
+        if cls.__lut is not None:
+            return cls.__lut
+
+        # Anything not covered by a range is GOLD, except the gray axis, which is SILVER.
+        lut = np.full((256, 256, 256), ResistorColor.GOLD.value, dtype=np.uint8)
+        gray_axis = np.arange(256)
+        lut[gray_axis, gray_axis, gray_axis] = ResistorColor.SILVER.value
+
+        for i, color_ranges in reversed(tuple(enumerate(cls.__all_ranges()))):
             if color_ranges is None:
                 continue
 
-            if all([
-                    rgb[0] in color_ranges[0],
-                    rgb[1] in color_ranges[1],
-                    rgb[2] in color_ranges[2],
-            ]):
-                return ResistorColor(i)
-        else:
-            if len(set(rgb)) == 1:
-                return ResistorColor.SILVER
-            else:
-                return ResistorColor.GOLD
+            r_range, g_range, b_range = color_ranges
+            lut[
+                r_range.start:r_range.stop,
+                g_range.start:g_range.stop,
+                b_range.start:b_range.stop,
+            ] = i
+
+        lut.flags.writeable = False
+        cls.__lut = lut
+
+        return lut
+
+    @classmethod
+    def reference_rgb_of(cls, color: ResistorColor) -> tuple[int, int, int]:
+        """
+        A representative RGB of the color, the center of its range when it has one.
+        """
+        if color == ResistorColor.NONE:
+            raise ValueError("NONE has no reference color.")
+
+        if color in cls.__fallback_rgbs:
+            return cls.__fallback_rgbs[color]
 
+        color_ranges = cls.__all_ranges()[color.value]
+        if color_ranges is None:
+            raise ValueError(f"{color} has no range nor reference color.")
+
+        return tuple((channel_range.start + channel_range.stop - 1) // 2 for channel_range in color_ranges)
+
+    @classmethod
+    def reference_palette(cls) -> np.ndarray:
+        """
+        The reference RGBs of all colors except NONE, as an uint8 array of shape (12, 3), ordered by color value.
+        """
+        return np.array([
+            cls.reference_rgb_of(color)
+            for color in ResistorColor
+            if color != ResistorColor.NONE
+        ], dtype=np.uint8)
+
+    @classmethod
+    def from_rgb_array(cls, pixels: np.ndarray, /) -> np.ndarray:
+        """
+        Classify many pixels at once.
+
+        Args:
+            pixels: uint8 array of shape (..., 3) in RGB order, e.g. (N, 3) or (H, W, 3).
+
+        Returns:
+            the `ResistorColor` values of the pixels, as an uint8 array of shape (...).
+        """
+        if pixels.dtype != np.uint8 or pixels.shape[-1:] != (3,):
+            raise ValueError(
+                f"pixels must be an uint8 array of shape (..., 3), which is {pixels.dtype} of shape {pixels.shape}."
+            )
+
+        return cls.lut()[pixels[..., 0], pixels[..., 1], pixels[..., 2]]
+
+    @classmethod
+    def from_rgb(cls, rgb: Sequence[int, int, int]) -> ResistorColor:
+        # All ranges only hold integers in [0, 256),
+        # so anything else can only fall back to GOLD or SILVER.
+        if all(float(v).is_integer() and 0 <= v < 256 for v in rgb):
+            return ResistorColor(int(cls.lut()[int(rgb[0]), int(rgb[1]), int(rgb[2])]))
+
+        if len(set(rgb)) == 1:
+            return ResistorColor.SILVER
+        else:
+            return ResistorColor.GOLD
@@ -0,0 +1,316 @@
+from collections.abc import Iterator, Sequence
+from typing import Final, overload
+
+import cv2
+import numpy as np
+
+from ._components import ComponentRegion, crop_value_count_of, label_components_of, scan_component_regions_of
+from ._moments import moments_of
+
+# One row per component of `find_component_boxes_in`, and the first fields of `COMPONENT_DTYPE`.
+COMPONENT_BOX_DTYPE: Final[np.dtype] = np.dtype([
+    # Label of the component in the labeled image it was cut from.
+    ("label", np.int32),
+
+    # The inclusive bounding box, as `ComponentRegion.bbox`.
+    ("left", np.int32),
+    ("top", np.int32),
+    ("right", np.int32),
+    ("bottom", np.int32),
+
+    # Number of pixels of the component.
+    ("area", np.int64),
+])
+
+# One row per component of a `ComponentSet`.
+COMPONENT_DTYPE: Final[np.dtype] = np.dtype([
+    *COMPONENT_BOX_DTYPE.descr,
+
+    # Center of mass, in image coordinates.
+    ("centroid_x", np.float64),
+    ("centroid_y", np.float64),
+
+    # Angle of the principal axis from the x axis, in degrees from -90 to 90, y pointing down.
+    ("orientation", np.float64),
+])
+
+
+class Component:
+    """
+    A single component of a `ComponentSet`, its pixels and mask are only unpacked when they are asked for.
+    """
+    __slots__ = ("__components", "__index")
+
+    def __init__(self, components: "ComponentSet", index: int, /):
+        self.__components = components
+        self.__index = index
+
+    @property
+    def record(self) -> np.void:
+        return self.__components.records[self.__index]
+
+    @property
+    def label(self) -> int:
+        return int(self.record["label"])
+
+    @property
+    def bbox(self) -> tuple[int, int, int, int]:
+        record = self.record
+        return int(record["left"]), int(record["top"]), int(record["right"]), int(record["bottom"])
+
+    @property
+    def area(self) -> int:
+        return int(self.record["area"])
+
+    @property
+    def centroid(self) -> tuple[float, float]:
+        record = self.record
+        return float(record["centroid_x"]), float(record["centroid_y"])
+
+    @property
+    def orientation(self) -> float:
+        return float(self.record["orientation"])
+
+    @property
+    def pixels(self) -> np.ndarray:
+        return self.__components.pixels_of(self.__index)
+
+    @property
+    def mask(self) -> np.ndarray:
+        return self.__components.mask_of(self.__index)
+
+    @property
+    def crop(self) -> np.ndarray:
+        return self.__components.crop_of(self.__index)
+
+    def __repr__(self) -> str:
+        return f"Component(label={self.label}, bbox={self.bbox}, area={self.area})"
+
+
+class _LazyArrays(Sequence):
+    # The crops or masks of a `ComponentSet`, made on every access, so they can stand in for the lists
+    # `find_single_components_in` returns without holding all of them at once.
+    __slots__ = ("__components", "__array_of")
+
+    def __init__(self, components: "ComponentSet", array_of, /):
+        self.__components = components
+        self.__array_of = array_of
+
+    def __len__(self) -> int:
+        return len(self.__components)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.__array_of(i) for i in range(len(self))[index]]
+
+        return self.__array_of(range(len(self))[index])
+
+
+class ComponentSet(Sequence[Component]):
+    """
+    The components of an image, as one record per component, their masks bit-packed in a single buffer,
+    and the image itself, which their pixels are views of.
+
+    It holds the same components as `find_single_components_in`, in the same order,
+    but nothing is copied out of the image until a crop is asked for,
+    so it takes a few bits per pixel of the components instead of 4 bytes.
+
+    It's a sequence of `Component`, and `crops` and `masks` are sequences of the arrays
+    `find_single_components_in` returns, so existing code can index and iterate them.
+
+    e.g.
+        components = find_component_set_in(board, 130, 1500)
+        large = components[components.records["area"] > 10_000]
+        for component in large:
+            print(component.bbox, component.orientation)
+        show_images_in_row(large.crops)
+    """
+
+    def __init__(self, img: np.ndarray, records: np.ndarray, packed_masks: np.ndarray, mask_offsets: np.ndarray, /):
+        """
+        Args:
+            img: the image the components are cut from, kept as is.
+            records: structured array of `COMPONENT_DTYPE`.
+            packed_masks: the masks of all components, each bit-packed in raster order, one after the other.
+            mask_offsets: where the mask of each component starts in `packed_masks`.
+        """
+        if len(records) != len(mask_offsets):
+            raise ValueError(f"There should be a mask per record, which are {len(mask_offsets)} for {len(records)}.")
+
+        self.__img = img
+        self.__records = records
+        self.__packed_masks = packed_masks
+        self.__mask_offsets = mask_offsets
+
+    @property
+    def image(self) -> np.ndarray:
+        return self.__img
+
+    @property
+    def records(self) -> np.ndarray:
+        return self.__records
+
+    @property
+    def crops(self) -> Sequence[np.ndarray]:
+        """
+        The RGB crops on a white canvas, as the first list of `find_single_components_in`, made on access.
+        """
+        return _LazyArrays(self, self.crop_of)
+
+    @property
+    def masks(self) -> Sequence[np.ndarray]:
+        """
+        The uint8 binary masks, as the second list of `find_single_components_in`, unpacked on access.
+        """
+        return _LazyArrays(self, self.mask_of)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory the set holds on its own, without the image it shares.
+        """
+        return self.__records.nbytes + self.__mask_offsets.nbytes + self.__packed_masks.nbytes
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    @overload
+    def __getitem__(self, index: int) -> Component: ...
+
+    @overload
+    def __getitem__(self, index: slice | np.ndarray | Sequence[int]) -> "ComponentSet": ...
+
+    def __getitem__(self, index):
+        """
+        A single component, or the subset of a slice, a boolean mask or indices, sharing the image and the masks.
+        """
+        if isinstance(index, (int, np.integer)):
+            return Component(self, range(len(self))[index])
+
+        return ComponentSet(self.__img, self.__records[index], self.__packed_masks, self.__mask_offsets[index])
+
+    def __iter__(self) -> Iterator[Component]:
+        return (Component(self, i) for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"ComponentSet({len(self)} components of a {self.__img.shape[1]}x{self.__img.shape[0]} image)"
+
+    def __window_of(self, index: int) -> tuple[slice, slice]:
+        # The crop keeps the historical `[top:bottom, left:right]` convention of `crop_component_from`.
+        record = self.__records[index]
+        return slice(int(record["top"]), int(record["bottom"])), slice(int(record["left"]), int(record["right"]))
+
+    def pixels_of(self, index: int, /) -> np.ndarray:
+        """
+        The view of the image under the crop of a component, background pixels included.
+        """
+        return self.__img[self.__window_of(index)]
+
+    def mask_of(self, index: int, /) -> np.ndarray:
+        """
+        The binary mask of a component, 1 for the component, 0 otherwise, the size of its crop.
+        """
+        rows, cols = self.__window_of(index)
+        shape = (rows.stop - rows.start, cols.stop - cols.start)
+        start = int(self.__mask_offsets[index])
+        count = shape[0] * shape[1]
+
+        return np.unpackbits(self.__packed_masks[start:start + (count + 7) // 8], count=count).reshape(shape)
+
+    def crop_of(self, index: int, /) -> np.ndarray:
+        """
+        The RGB crop of a component on a white canvas, as `find_single_components_in` returns it.
+        """
+        pixels = self.pixels_of(index)
+        mask = self.mask_of(index).view(bool)
+
+        crop = np.full(pixels.shape, 255, dtype=pixels.dtype)
+        crop[mask] = pixels[mask]
+
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB) if crop.ndim == 3 else crop
+
+
+def _kept_components_of(
+        img: np.ndarray, labeled_component_set: np.ndarray, /, *, min_size: int
+) -> Iterator[tuple[ComponentRegion, np.ndarray]]:
+    # The components `separate_components_of` keeps, in its order, with their masks the size of their crops.
+    components = scan_component_regions_of(labeled_component_set)
+
+    # Same as `separate_components_of`, the background is not a component.
+    if components and labeled_component_set.min() != 0:
+        components = components[1:]
+
+    for component in components:
+        if crop_value_count_of(img, component) <= min_size:
+            continue
+
+        left, top, right, bottom = component.bbox
+        mask = labeled_component_set[top:bottom, left:right] == component.label
+
+        # The crop is white but where the component is, so its non-zero values are all of it
+        # but the zero values of the component pixels, which is what `separate_components_of` counts.
+        pixels = img[top:bottom, left:right][mask]
+        if crop_value_count_of(img, component) - (pixels.size - np.count_nonzero(pixels)) <= min_size:
+            continue
+
+        yield component, mask
+
+
+def component_set_of(img: np.ndarray, labeled_component_set: np.ndarray, /, *, min_size: int = 100) -> ComponentSet:
+    """
+    The components larger than `min_size` of a BGR image, given its labeled image,
+    kept by the same rules and in the same order as `separate_components_of`.
+    """
+    records = []
+    packed_masks = []
+    mask_offsets = []
+    offset = 0
+
+    for component, mask in _kept_components_of(img, labeled_component_set, min_size=min_size):
+        left, top, right, bottom = component.bbox
+
+        # The orientation and centroid of the whole component, its last row and column included.
+        moments = moments_of(labeled_component_set[top:bottom + 1, left:right + 1] == component.label)
+        # The angle of the eigenvector of the largest eigenvalue of the inertia tensor, in closed form.
+        orientation = float(np.degrees(0.5 * np.arctan2(2 * moments.mu11, moments.mu20 - moments.mu02)))
+        centroid_x, centroid_y = moments.centroid
+
+        records.append((
+            component.label, left, top, right, bottom, component.pixel_count,
+            left + centroid_x, top + centroid_y, orientation,
+        ))
+
+        packed = np.packbits(mask)
+        packed_masks.append(packed)
+        mask_offsets.append(offset)
+        offset += packed.size
+
+    return ComponentSet(
+        img,
+        np.array(records, dtype=COMPONENT_DTYPE),
+        np.concatenate(packed_masks) if packed_masks else np.empty(0, dtype=np.uint8),
+        np.array(mask_offsets, dtype=np.int64),
+    )
+
+
+def find_component_set_in(img: np.ndarray, bg_threshold: int = 245, min_size: int = 100) -> ComponentSet:
+    """
+    The components of a BGR image as a `ComponentSet`, the same ones `find_single_components_in` returns as crops.
+    """
+    return component_set_of(img, label_components_of(img, bg_threshold=bg_threshold), min_size=min_size)
+
+
+def find_component_boxes_in(img: np.ndarray, bg_threshold: int = 245, min_size: int = 100) -> np.ndarray:
+    """
+    The boxes and areas of the components `find_single_components_in` returns, as a structured array
+    of `COMPONENT_BOX_DTYPE`, without cutting, packing or measuring anything more of them.
+    """
+    labeled_component_set = label_components_of(img, bg_threshold=bg_threshold)
+
+    return np.array(
+        [
+            (component.label, *component.bbox, component.pixel_count)
+            for component, _ in _kept_components_of(img, labeled_component_set, min_size=min_size)
+        ],
+        dtype=COMPONENT_BOX_DTYPE,
+    )
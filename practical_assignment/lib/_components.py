@@ -0,0 +1,171 @@
+from typing import Final, NamedTuple
+
+import cv2
+import numpy as np
+from scipy import ndimage
+
+# Number of labels counted by a single `np.bincount` call.
+_BINCOUNT_BLOCK_SIZE: Final[int] = 1 << 20
+
+
+class ComponentRegion(NamedTuple):
+    label: int
+
+    # The inclusive bounding box of the component, in (left, top, right, bottom) order.
+    # This is the same box `find_bounding_box_from` would return for the label.
+    bbox: tuple[int, int, int, int]
+
+    # Number of pixels carrying the label.
+    pixel_count: int
+
+    # The slice of the labeled image which covers the whole component.
+    region: tuple[slice, slice]
+
+
+def label_components_of(img: np.ndarray, /, *, bg_threshold: int = 245) -> np.ndarray:
+    """
+    Threshold a BGR image against a bright background and label its connected components.
+
+    Args:
+        img: BGR image, or a grayscale image which is used as is.
+        bg_threshold: pixels darker than this value are considered as foreground.
+
+    Returns:
+        the labeled image, background is 0 and components are labeled from 1 in raster order.
+    """
+    # skimage is slow to import, and only needed once something is labeled.
+    from skimage import measure
+
+    gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+    threshed_img = (gray_img < bg_threshold).view(np.uint8)
+
+    return measure.label(threshed_img, background=0)
+
+
+def scan_component_regions_of(labeled_component_set: np.ndarray, /) -> list[ComponentRegion]:
+    """
+    Collect the bounding box, pixel count and slice of every component in one scan.
+
+    Instead of comparing the whole labeled image against each label,
+    `ndimage.find_objects` finds the extents of all labels at once,
+    and `np.bincount` counts the pixels of all labels at once.
+
+    Args:
+        labeled_component_set: 2D labeled image, 0 is the background.
+
+    Returns:
+        the regions of all present labels, ordered by label.
+    """
+    if labeled_component_set.ndim != 2:
+        raise ValueError(
+            f"image must be a 2D numpy array, which has {labeled_component_set.ndim} dimensions."
+        )
+
+    # Count the pixels of all labels in blocks of rows,
+    # which bounds the temporaries `np.bincount` makes when it casts the labels.
+    label_count = int(labeled_component_set.max(initial=0)) + 1
+    rows_per_block = max(_BINCOUNT_BLOCK_SIZE // max(labeled_component_set.shape[1], 1), 1)
+    pixel_counts = np.zeros(label_count, dtype=np.int64)
+    for top in range(0, labeled_component_set.shape[0], rows_per_block):
+        pixel_counts += np.bincount(
+            labeled_component_set[top:top + rows_per_block].ravel(), minlength=label_count
+        )
+
+    regions: list[ComponentRegion] = []
+    for index, region in enumerate(ndimage.find_objects(labeled_component_set)):
+        # Labels which are not present in the image have no region.
+        if region is None:
+            continue
+
+        rows, cols = region
+        regions.append(ComponentRegion(
+            label=index + 1,
+            bbox=(cols.start, rows.start, cols.stop - 1, rows.stop - 1),
+            pixel_count=int(pixel_counts[index + 1]),
+            region=region,
+        ))
+
+    return regions
+
+
+def crop_component_from(
+        img: np.ndarray,
+        labeled_component_set: np.ndarray,
+        component: ComponentRegion,
+        /,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cut a single component out of the image, on a white canvas the size of its bounding box.
+
+    Only the bounding box of the component is touched, so the cost is independent of the image size.
+
+    Note that the crop keeps the historical `[top:bottom, left:right]` convention,
+    so the last row and column of the inclusive bounding box are not part of the crop.
+
+    Returns:
+        the component pixels on a white canvas (same channel order as `img`),
+        and the binary mask of the component (1 for the component, 0 otherwise).
+    """
+    left, top, right, bottom = component.bbox
+
+    component_mask = labeled_component_set[top:bottom, left:right] == component.label
+
+    target_component = np.full((bottom - top, right - left) + img.shape[2:], 255, dtype=img.dtype)
+    target_component[component_mask] = img[top:bottom, left:right][component_mask]
+
+    return target_component, component_mask.view(np.uint8)
+
+
+def crop_value_count_of(img: np.ndarray, component: ComponentRegion, /) -> int:
+    """
+    The number of values in the crop `crop_component_from` would produce for the component.
+
+    Every value of the crop is either the white background or a component pixel,
+    so this is an upper bound of its non-zero values and can reject small components before any allocation.
+    """
+    left, top, right, bottom = component.bbox
+
+    return max(bottom - top, 0) * max(right - left, 0) * int(np.prod(img.shape[2:], dtype=int))
+
+
+def separate_components_of(
+        img: np.ndarray, labeled_component_set: np.ndarray, /, *, min_size: int = 100
+) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """
+    Cut every component larger than `min_size` out of a BGR image, given its labeled image.
+
+    Returns:
+        the RGB crops of the components on a white canvas, and their binary masks.
+    """
+    # Find the bounding box, size and slice of every component in a single scan of the labeled image.
+    components = scan_component_regions_of(labeled_component_set)
+
+    # The first label is expected to be the background, which is not reported by the scan.
+    # If there is no background at all, the first component takes its place and is skipped as well.
+    if components and labeled_component_set.min() != 0:
+        components = components[1:]
+
+    separated_components: list[np.ndarray] = []
+    separated_components_binary: list[np.ndarray] = []
+
+    for component in components:
+        # A crop can not have more non-zero values than its size,
+        # so skip small components before allocating anything for them.
+        if crop_value_count_of(img, component) <= min_size:
+            continue
+
+        # separate each component into single image, only within its bounding box.
+        target_component, target_component_binary = crop_component_from(img, labeled_component_set, component)
+
+        # measure its size
+        n = np.count_nonzero(target_component)
+
+        # keep it if it's big enough (greater than min_size)
+        if n > min_size:
+            separated_components.append(
+                cv2.cvtColor(target_component, cv2.COLOR_BGR2RGB)
+            )
+            separated_components_binary.append(target_component_binary)
+
+    return separated_components, separated_components_binary
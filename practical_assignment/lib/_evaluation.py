@@ -0,0 +1,169 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+
+import numpy as np
+
+# All boxes are (N, 4) arrays of inclusive (xmin, ymin, xmax, ymax) pixel coordinates,
+# the convention of the VOC annotations and of `ComponentRegion.bbox`.
+
+
+class Detections(NamedTuple):
+    # (N, 4) boxes.
+    boxes: np.ndarray
+
+    # (N,) confidence of each box, higher is more confident.
+    scores: np.ndarray
+
+    # (N,) label of each box, or None for a detector which does not tell components apart.
+    labels: np.ndarray | None = None
+
+
+class DetectionScore(NamedTuple):
+    label: str
+    ground_truth_count: int
+    detection_count: int
+    true_positive_count: int
+    precision: float
+    recall: float
+    average_precision: float
+
+
+def iou_matrix_of(boxes: np.ndarray, other_boxes: np.ndarray, /) -> np.ndarray:
+    """
+    The intersection over union of every pair of boxes, computed all at once by broadcasting.
+
+    Returns:
+        (N, M) float array, where [i, j] is the IoU of `boxes[i]` and `other_boxes[j]`.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    other_boxes = np.asarray(other_boxes, dtype=np.float64).reshape(-1, 4)
+
+    # The coordinates are inclusive, so a box from x to x covers one pixel.
+    areas = (boxes[:, 2] - boxes[:, 0] + 1) * (boxes[:, 3] - boxes[:, 1] + 1)
+    other_areas = (other_boxes[:, 2] - other_boxes[:, 0] + 1) * (other_boxes[:, 3] - other_boxes[:, 1] + 1)
+
+    lefts = np.maximum(boxes[:, None, 0], other_boxes[None, :, 0])
+    tops = np.maximum(boxes[:, None, 1], other_boxes[None, :, 1])
+    rights = np.minimum(boxes[:, None, 2], other_boxes[None, :, 2])
+    bottoms = np.minimum(boxes[:, None, 3], other_boxes[None, :, 3])
+
+    widths = rights - lefts + 1
+    heights = bottoms - tops + 1
+    intersections = np.clip(widths, 0, None) * np.clip(heights, 0, None)
+
+    unions = areas[:, None] + other_areas[None, :] - intersections
+
+    return np.divide(intersections, unions, out=np.zeros_like(intersections), where=unions > 0)
+
+
+def match_detections_of(ious: np.ndarray, scores: np.ndarray, /, *, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    Tell which detections are true positives, the way the VOC evaluation does.
+
+    Each detection is matched to the ground truth box it overlaps the most.
+    It's a true positive if they overlap enough, and no more confident detection has been matched to that box.
+
+    Args:
+        ious: (detections, ground truths) IoU matrix, see `iou_matrix_of`.
+        scores: (detections,) confidences.
+
+    Returns:
+        (detections,) bool array, in the order of the detections.
+    """
+    is_true_positive = np.zeros(ious.shape[0], dtype=bool)
+    if ious.shape[0] == 0 or ious.shape[1] == 0:
+        return is_true_positive
+
+    best_ground_truths = ious.argmax(axis=1)
+    overlapping = ious[np.arange(ious.shape[0]), best_ground_truths] >= iou_threshold
+
+    # Among the overlapping detections of each ground truth box, only the most confident one is a true positive.
+    by_score = np.argsort(-np.asarray(scores), kind="stable")
+    candidates = by_score[overlapping[by_score]]
+    _, first_of_ground_truths = np.unique(best_ground_truths[candidates], return_index=True)
+    is_true_positive[candidates[first_of_ground_truths]] = True
+
+    return is_true_positive
+
+
+def average_precision_of(is_true_positive: np.ndarray, scores: np.ndarray, ground_truth_count: int, /) -> float:
+    """
+    The area under the interpolated precision-recall curve (the all-points VOC average precision).
+    """
+    if ground_truth_count == 0:
+        return float("nan")
+    if len(scores) == 0:
+        return 0.0
+
+    by_score = np.argsort(-np.asarray(scores), kind="stable")
+    true_positives = np.cumsum(is_true_positive[by_score])
+    recalls = true_positives / ground_truth_count
+    precisions = true_positives / np.arange(1, len(by_score) + 1)
+
+    # Make the precision monotonically decreasing, then sum it over the steps of the recall.
+    precisions = np.maximum.accumulate(precisions[::-1])[::-1]
+    recall_steps = np.diff(recalls, prepend=0.0)
+
+    return float(np.sum(recall_steps * precisions))
+
+
+def score_detections(
+        results: Iterable[tuple[np.ndarray, np.ndarray, Detections]],
+        /,
+        *,
+        iou_threshold: float = 0.5,
+) -> tuple[list[DetectionScore], float]:
+    """
+    Score detections against the ground truth of many images.
+
+    Detections without labels are scored against all ground truth boxes as a single "object" label.
+
+    Args:
+        results: for each image, the (N, 4) ground truth boxes, their (N,) labels, and the detections.
+
+    Returns:
+        the score of each label, and the mean average precision over the labels with ground truth.
+    """
+    # For each label: ground truth count, and the true positive flags and scores of the detections.
+    tallies: dict[str, tuple[int, list[np.ndarray], list[np.ndarray]]] = {}
+
+    for ground_truth_boxes, ground_truth_labels, detections in results:
+        if detections.labels is None:
+            ground_truth_labels = np.full(len(ground_truth_boxes), "object")
+            detection_labels = np.full(len(detections.boxes), "object")
+        else:
+            ground_truth_labels = np.asarray(ground_truth_labels)
+            detection_labels = np.asarray(detections.labels)
+
+        for label in np.union1d(ground_truth_labels, detection_labels):
+            of_ground_truth = ground_truth_labels == label
+            of_detections = detection_labels == label
+            scores = np.asarray(detections.scores)[of_detections]
+
+            ious = iou_matrix_of(detections.boxes[of_detections], ground_truth_boxes[of_ground_truth])
+            is_true_positive = match_detections_of(ious, scores, iou_threshold=iou_threshold)
+
+            count, true_positives, all_scores = tallies.get(str(label), (0, [], []))
+            true_positives.append(is_true_positive)
+            all_scores.append(scores)
+            tallies[str(label)] = (count + int(of_ground_truth.sum()), true_positives, all_scores)
+
+    detection_scores = []
+    for label, (ground_truth_count, true_positives, all_scores) in sorted(tallies.items()):
+        is_true_positive = np.concatenate(true_positives)
+        scores = np.concatenate(all_scores)
+        true_positive_count = int(is_true_positive.sum())
+
+        detection_scores.append(DetectionScore(
+            label=label,
+            ground_truth_count=ground_truth_count,
+            detection_count=len(scores),
+            true_positive_count=true_positive_count,
+            precision=true_positive_count / len(scores) if len(scores) else 0.0,
+            recall=true_positive_count / ground_truth_count if ground_truth_count else float("nan"),
+            average_precision=average_precision_of(is_true_positive, scores, ground_truth_count),
+        ))
+
+    average_precisions = [score.average_precision for score in detection_scores if score.ground_truth_count]
+
+    return detection_scores, float(np.mean(average_precisions)) if average_precisions else float("nan")
@@ -2,7 +2,9 @@ import os
 from typing import Final
 
 import numpy as np
-from PIL import Image
+
+from ._annotations import AnnotationIndex
+from ._image_store import _ImageStore
 
 
 class _FileAgent:
@@ -11,9 +13,16 @@ class _FileAgent:
     __COMPONENTS_DIR_NAME: Final[str] = "COMPONENTS"
     __BOARDS_DIR_NAME: Final[str] = "BOARDS"
     __ANNOTATION_DIR_NAME: Final[str] = "ANNOTATIONS"
+    __CACHE_DIR_NAME: Final[str] = ".cache"
 
-    def __init__(self, *, data_dir: str):
+    def __init__(self, *, data_dir: str, img_memory_budget: int = 512 * 1024 ** 2, use_disk_cache: bool = True):
         self.__data_dir = data_dir
+        self.__use_disk_cache = use_disk_cache
+        self.__annotations: AnnotationIndex | None = None
+        self.__img_store = _ImageStore(
+            memory_budget=img_memory_budget,
+            disk_dir=f"{self.cache_dir}/images" if use_disk_cache else None,
+        )
 
     @property
     def resistor_dir(self) -> str:
@@ -31,22 +40,59 @@ class _FileAgent:
     def annotation_dir(self) -> str:
         return f"{self.__data_dir}/{self.__ANNOTATION_DIR_NAME}"
 
+    @property
+    def cache_dir(self) -> str:
+        return f"{self.__data_dir}/{self.__CACHE_DIR_NAME}"
+
+    @property
+    def annotations(self) -> AnnotationIndex:
+        """
+        The index of the boxes annotated in `annotation_dir`, built on first use.
+
+        It's kept under `cache_dir`, and only the XML files changed since it was built are parsed again.
+        """
+        if self.__annotations is None:
+            self.__annotations = AnnotationIndex(
+                annotation_dir=self.annotation_dir,
+                index_path=f"{self.cache_dir}/annotations.npz" if self.__use_disk_cache else None,
+            )
+        else:
+            self.__annotations.refresh()
+
+        return self.__annotations
+
     def get_img_located_at(
             self,
             location_of_image: str,
             /,
             *,
             channel_mode: str | None = None,
+            writable: bool = False,
     ) -> np.ndarray:
         """
         Get the image named `name_of_image` from the data directory.
+
+        Decoded images are cached, in memory and as memory-mapped files under `cache_dir`,
+        so loading the same image again neither decodes nor copies it.
+        The cached array is shared, and therefore read-only,
+        callers which draw on the image in place, e.g. with `draw_central_line_on`, ask for a copy with `writable=True`.
+
+        Args:
+            location_of_image: path of the image, relative to the data directory.
+            channel_mode: any PIL mode, e.g. "RGB" or "L" for grayscale,
+                or "BGR" to get the channel order of `cv2.imread`.
+                None keeps the mode of the file.
+            writable: return a copy of the cached image, instead of the read-only cached image itself.
         """
-        img = Image.open(f"{self.__data_dir}/{location_of_image}")
+        img = self.__img_store.load(f"{self.__data_dir}/{location_of_image}", channel_mode=channel_mode)
 
-        if channel_mode is not None:
-            img = img.convert(channel_mode)
+        return np.array(img) if writable else img
 
-        return np.asarray(img)
+    def clear_img_cache(self, *, disk: bool = False) -> None:
+        """
+        Forget the cached decoded images, including the ones on disk if `disk` is True.
+        """
+        self.__img_store.clear(disk=disk)
 
     @staticmethod
     def check_if_file_exists(file_path: str) -> bool:
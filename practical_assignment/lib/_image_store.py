@@ -0,0 +1,149 @@
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Final
+
+import numpy as np
+
+
+class _ImageStore:
+    """
+    A store of decoded images, keyed by the path, the modification time and the channel mode of the image.
+
+    It has two tiers:
+        - an in-memory LRU, limited by the number of bytes of the arrays it holds.
+        - an optional on-disk tier, which keeps every decoded image as a `.npy` file,
+          and opens it memory-mapped, so loading it again does not decode nor copy anything.
+          Only the latest modification time of an image is kept, the file of an older one is removed.
+
+    All arrays handed out are read-only, since they are shared between callers.
+    """
+    __memory_budget: Final[int]
+    __disk_dir: Final[str | None]
+
+    # The channel modes which are not PIL modes, but are derived from the RGB decoding.
+    __DERIVED_MODES: Final[dict[str, str]] = {
+        "BGR": "RGB",
+    }
+
+    def __init__(self, *, memory_budget: int = 512 * 1024 ** 2, disk_dir: str | None = None):
+        self.__memory_budget = memory_budget
+        self.__disk_dir = disk_dir
+
+        self.__memory: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self.__memory_bytes = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.__memory_bytes
+
+    def __key_of(self, path: str, channel_mode: str | None) -> tuple:
+        return os.path.abspath(path), os.stat(path).st_mtime_ns, channel_mode
+
+    def __disk_prefix_of(self, key: tuple) -> str:
+        # Every modification time of the same image and channel mode shares the prefix, so the older ones can be found.
+        path, _, channel_mode = key
+        digest = hashlib.blake2b(repr((path, channel_mode)).encode(), digest_size=16).hexdigest()
+
+        return f"{self.__disk_dir}/{digest}-"
+
+    def __disk_path_of(self, key: tuple) -> str:
+        return f"{self.__disk_prefix_of(key)}{key[1]}.npy"
+
+    def __remember(self, key: tuple, img: np.ndarray) -> None:
+        with self.__lock:
+            if key in self.__memory:
+                return
+
+            # Images larger than the whole budget are never kept in memory.
+            if img.nbytes > self.__memory_budget:
+                return
+
+            self.__memory[key] = img
+            self.__memory_bytes += img.nbytes
+
+            while self.__memory_bytes > self.__memory_budget:
+                _, evicted = self.__memory.popitem(last=False)
+                self.__memory_bytes -= evicted.nbytes
+
+    def __decode(self, path: str, channel_mode: str | None) -> np.ndarray:
+        # PIL is only imported once an image has to be decoded.
+        from PIL import Image
+
+        with Image.open(path) as img:
+            if channel_mode is not None:
+                img = img.convert(self.__DERIVED_MODES.get(channel_mode, channel_mode))
+
+            decoded = np.asarray(img)
+
+        if channel_mode in self.__DERIVED_MODES:
+            decoded = np.ascontiguousarray(decoded[..., ::-1])
+
+        return decoded
+
+    def load(self, path: str, /, *, channel_mode: str | None = None) -> np.ndarray:
+        """
+        Load the decoded image located at `path`.
+
+        Args:
+            path: path of the image file.
+            channel_mode: any PIL mode (e.g. "RGB", "L"), or "BGR" for the channel order OpenCV uses.
+                None keeps the mode of the file.
+
+        Returns:
+            the read-only decoded image.
+        """
+        key = self.__key_of(path, channel_mode)
+
+        with self.__lock:
+            if (img := self.__memory.get(key)) is not None:
+                self.__memory.move_to_end(key)
+                return img
+
+        if self.__disk_dir is not None and os.path.isfile(disk_path := self.__disk_path_of(key)):
+            img = np.load(disk_path, mmap_mode="r")
+        else:
+            img = self.__decode(path, channel_mode)
+            img.flags.writeable = False
+
+            if self.__disk_dir is not None:
+                self.__save(img, key)
+
+        self.__remember(key, img)
+
+        return img
+
+    def __save(self, img: np.ndarray, key: tuple) -> None:
+        os.makedirs(self.__disk_dir, exist_ok=True)
+
+        # Write to a temporary file first, so a concurrent reader never sees a partial file.
+        disk_path = self.__disk_path_of(key)
+        temporary_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.save(f, img)
+        os.replace(temporary_path, disk_path)
+
+        # The image was decoded because it changed, or was never decoded, so the files of its older versions are stale.
+        for stale_path in glob.glob(f"{glob.escape(self.__disk_prefix_of(key))}*.npy"):
+            if stale_path != disk_path:
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    # Another process removed it first.
+                    pass
+
+    def clear(self, *, disk: bool = False) -> None:
+        """
+        Forget every image in memory, and also every image on disk if `disk` is True.
+        """
+        with self.__lock:
+            self.__memory.clear()
+            self.__memory_bytes = 0
+
+        if disk and self.__disk_dir is not None and os.path.isdir(self.__disk_dir):
+            for name in os.listdir(self.__disk_dir):
+                if name.endswith(".npy"):
+                    os.remove(f"{self.__disk_dir}/{name}")
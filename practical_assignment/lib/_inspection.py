@@ -0,0 +1,145 @@
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from ._alignment import align, alignment_features_of, estimate_alignment_onto, warp_with
+from ._components import scan_component_regions_of
+
+
+class Inspection(NamedTuple):
+    # The aligned test board, in the frame of the reference board.
+    aligned: np.ndarray
+
+    # 255 where the test board differs from the reference board, 0 elsewhere.
+    defect_mask: np.ndarray
+
+    # (left, top, right, bottom) of each defect region, inclusive, in the frame of the reference board.
+    defects: list[tuple[int, int, int, int]]
+
+
+class BoardInspector:
+    """
+    Compare test boards against a golden reference board.
+
+    Everything about the reference is prepared once, when the inspector is created, its features too when registering,
+    so inspecting N test boards costs N alignments and diffs, not N full pipelines.
+    The diff itself is fused into a few in-place operations on buffers reused between test boards.
+
+    e.g.
+        inspector = BoardInspector(board2_single, diff_threshold=50)
+        for board3_single in board3_singles:
+            defects = inspector.inspect(board3_single).defects
+    """
+
+    def __init__(
+            self,
+            reference: np.ndarray,
+            /,
+            *,
+            diff_threshold: int = 50,
+            blur_size: int = 0,
+            min_defect_size: int = 1,
+            register: bool = False,
+    ):
+        """
+        Args:
+            reference: the golden board, RGB or BGR, in the same channel order as the test boards.
+            diff_threshold: pixels whose gray `255 - |test - reference|` is below it are defects.
+                This is the same threshold part-2 applies to its gray diffs.
+            blur_size: size of a Gaussian blur applied to both boards before diffing, to ignore noise. 0 disables it.
+            min_defect_size: defect regions with fewer pixels are dropped.
+            register: align each test board onto the reference by matching features,
+                instead of only resizing it to the size of the reference.
+        """
+        self.__reference = reference
+        self.__diff_threshold = diff_threshold
+        self.__blur_size = blur_size
+        self.__min_defect_size = min_defect_size
+        self.__register = register
+
+        self.__size = (reference.shape[1], reference.shape[0])
+        self.__prepared_reference = self.__prepare(reference)
+        # Only the features of the test boards are computed when registering them, the ones of the reference are kept.
+        self.__reference_features = alignment_features_of(reference) if register else None
+
+        # Buffers reused by every inspection.
+        self.__diff = np.empty_like(self.__prepared_reference)
+        self.__gray_diff = np.empty(reference.shape[:2], dtype=np.uint8)
+
+    @property
+    def reference(self) -> np.ndarray:
+        return self.__reference
+
+    def __prepare(self, img: np.ndarray) -> np.ndarray:
+        if self.__blur_size > 0:
+            return cv2.GaussianBlur(img, (self.__blur_size, self.__blur_size), 0)
+
+        return img
+
+    def align(self, test: np.ndarray, /) -> np.ndarray:
+        """
+        Bring the test board into the frame of the reference board.
+        """
+        if self.__register:
+            matrix = estimate_alignment_onto(test, self.__reference_features)
+
+            if matrix is not None:
+                return warp_with(test, matrix, self.__size)
+
+        if (test.shape[1], test.shape[0]) == self.__size:
+            return test
+
+        return align(test, size=self.__size)
+
+    def defect_mask_of(self, aligned: np.ndarray, /) -> np.ndarray:
+        """
+        The defect mask of a test board which is already aligned to the reference.
+
+        Defects are 255 and the rest is 0, so it's the inverse of the filtered gray diffs of part-2,
+        which threshold the gray of `255 - cv2.absdiff(test, reference)` with copies and masked writes.
+        Here it's computed in place in the buffers of the inspector, so the mask is overwritten by the next call.
+        """
+        cv2.absdiff(self.__prepare(aligned), self.__prepared_reference, dst=self.__diff)
+
+        if self.__diff.ndim == 3:
+            # Invert before converting, the inverted gray differs from the gray of the inverted diff by rounding.
+            cv2.bitwise_not(self.__diff, dst=self.__diff)
+            cv2.cvtColor(self.__diff, cv2.COLOR_RGB2GRAY, dst=self.__gray_diff)
+        else:
+            cv2.bitwise_not(self.__diff, dst=self.__gray_diff)
+
+        # Pixels below the threshold are defects, i.e. `gray < threshold` becomes 255.
+        cv2.threshold(self.__gray_diff, self.__diff_threshold - 1, 255, cv2.THRESH_BINARY_INV, dst=self.__gray_diff)
+
+        return self.__gray_diff
+
+    def defects_of(self, defect_mask: np.ndarray, /) -> list[tuple[int, int, int, int]]:
+        """
+        The bounding boxes of the connected regions of a defect mask.
+        """
+        count, labeled = cv2.connectedComponents(defect_mask, connectivity=8, ltype=cv2.CV_32S)
+        if count <= 1:
+            return []
+
+        return [
+            region.bbox
+            for region in scan_component_regions_of(labeled)
+            if region.pixel_count >= self.__min_defect_size
+        ]
+
+    def inspect(self, test: np.ndarray, /) -> Inspection:
+        """
+        Align a test board to the reference, and find where it differs from it.
+
+        The returned mask is a copy, so it's not overwritten by later inspections.
+        """
+        aligned = self.align(test)
+        defect_mask = self.defect_mask_of(aligned).copy()
+
+        return Inspection(aligned, defect_mask, self.defects_of(defect_mask))
+
+    def inspect_many(self, tests: Iterable[np.ndarray], /) -> Iterator[Inspection]:
+        for test in tests:
+            yield self.inspect(test)
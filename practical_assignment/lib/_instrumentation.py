@@ -0,0 +1,302 @@
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter
+from collections.abc import Callable, Iterator, MutableMapping
+from contextlib import contextmanager
+from typing import Any, Final, NamedTuple
+
+# Set it to any value to profile the whole process, the report is printed when the process exits.
+PROFILE_ENV_VAR: Final[str] = "LIB_PROFILE"
+
+# Where the collapsed stacks of the whole process profile are written, defaults to `lib-profile.folded`.
+PROFILE_OUTPUT_ENV_VAR: Final[str] = "LIB_PROFILE_OUTPUT"
+
+
+class FunctionProfile(NamedTuple):
+    name: str
+    calls: int
+
+    # Wall time of all calls, and the part of it not spent in other instrumented functions.
+    total_seconds: float
+    self_seconds: float
+
+    # The most memory a single call allocated on top of what was allocated before it, 0 without memory tracing.
+    peak_allocated_bytes: int
+
+    # The shapes and dtypes of the array arguments, with how many calls had them, most common first.
+    input_shapes: list[tuple[str, int]]
+
+
+class _Frame:
+    __slots__ = ("name", "start", "start_bytes", "peak_bytes", "children_seconds")
+
+    def __init__(self, name: str, start_bytes: int):
+        self.name = name
+        self.start = time.perf_counter()
+        self.start_bytes = start_bytes
+        self.peak_bytes = start_bytes
+        self.children_seconds = 0.0
+
+
+def _shapes_of(args: tuple, kwargs: dict) -> str:
+    shapes = []
+
+    for value in (*args, *kwargs.values()):
+        if hasattr(value, "shape") and hasattr(value, "dtype"):
+            shapes.append(f"{tuple(value.shape)} {value.dtype}")
+        elif isinstance(value, (list, tuple)) and value and hasattr(value[0], "shape"):
+            shapes.append(f"{type(value).__name__}[{len(value)}] of {tuple(value[0].shape)} {value[0].dtype}")
+
+    return ", ".join(shapes) or "-"
+
+
+class Profile:
+    """
+    The calls of the instrumented lib functions while profiling, see `profiling`.
+
+    Calls are recorded from every thread, each thread with its own call stack.
+    Memory is traced with `tracemalloc`, which is shared by all threads,
+    so the allocations of concurrent calls are attributed to each other.
+    """
+
+    def __init__(self, *, trace_memory: bool = True):
+        self.__trace_memory = trace_memory
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+        self.__calls: Counter[str] = Counter()
+        self.__total_seconds: Counter[str] = Counter()
+        self.__self_seconds: Counter[str] = Counter()
+        self.__peak_bytes: Counter[str] = Counter()
+        self.__shapes: dict[str, Counter[str]] = {}
+
+        # Self time in microseconds of each call stack, joined by ";" as flamegraph tools expect.
+        self.__stacks: Counter[str] = Counter()
+
+    @property
+    def trace_memory(self) -> bool:
+        return self.__trace_memory
+
+    def __stack(self) -> list[_Frame]:
+        try:
+            return self.__local.stack
+        except AttributeError:
+            self.__local.stack = []
+            return self.__local.stack
+
+    def call(self, name: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        stack = self.__stack()
+        shapes = _shapes_of(args, kwargs)
+
+        if self.__trace_memory:
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            # The peak is reset for this call, so remember the one of the calling function.
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak_bytes)
+            tracemalloc.reset_peak()
+        else:
+            current_bytes = 0
+
+        frame = _Frame(name, current_bytes)
+        stack.append(frame)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - frame.start
+            stack.pop()
+
+            allocated_bytes = 0
+            if self.__trace_memory:
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                frame.peak_bytes = max(frame.peak_bytes, peak_bytes)
+                allocated_bytes = frame.peak_bytes - frame.start_bytes
+
+            if stack:
+                stack[-1].children_seconds += seconds
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, frame.peak_bytes)
+
+            path = ";".join([*(outer.name for outer in stack), name])
+            self_seconds = seconds - frame.children_seconds
+
+            with self.__lock:
+                self.__calls[name] += 1
+                self.__total_seconds[name] += seconds
+                self.__self_seconds[name] += self_seconds
+                self.__peak_bytes[name] = max(self.__peak_bytes[name], allocated_bytes)
+                self.__shapes.setdefault(name, Counter())[shapes] += 1
+                self.__stacks[path] += round(self_seconds * 1e6)
+
+    def functions(self) -> list[FunctionProfile]:
+        """
+        The profile of every called function, the slowest first.
+        """
+        with self.__lock:
+            return sorted(
+                (
+                    FunctionProfile(
+                        name=name,
+                        calls=calls,
+                        total_seconds=self.__total_seconds[name],
+                        self_seconds=self.__self_seconds[name],
+                        peak_allocated_bytes=self.__peak_bytes[name],
+                        input_shapes=self.__shapes[name].most_common(),
+                    )
+                    for name, calls in self.__calls.items()
+                ),
+                key=lambda function: function.total_seconds,
+                reverse=True,
+            )
+
+    def collapsed_stacks(self) -> dict[str, int]:
+        """
+        The self time in microseconds of every call stack, keyed by the function names joined by ";".
+        """
+        with self.__lock:
+            return dict(self.__stacks)
+
+    def write_collapsed_stacks(self, path: str, /) -> None:
+        """
+        Write the call stacks in the collapsed format, one `name;name;name microseconds` line per stack,
+        which `flamegraph.pl` and speedscope read as is.
+        """
+        with open(path, "w") as f:
+            for stack, microseconds in sorted(self.collapsed_stacks().items()):
+                f.write(f"{stack} {microseconds}\n")
+
+    def report(self, *, max_shapes: int = 3) -> str:
+        """
+        A table of the profile of every called function, the slowest first.
+        """
+        header = ("function", "calls", "total s", "self s", "ms/call", "peak MiB", "input shapes")
+        rows = [
+            (
+                function.name,
+                str(function.calls),
+                f"{function.total_seconds:.3f}",
+                f"{function.self_seconds:.3f}",
+                f"{function.total_seconds / function.calls * 1000:.2f}",
+                f"{function.peak_allocated_bytes / 1024 ** 2:.1f}" if self.__trace_memory else "-",
+                "; ".join(f"{shapes} x{count}" for shapes, count in function.input_shapes[:max_shapes]),
+            )
+            for function in self.functions()
+        ]
+
+        widths = [max(len(cell) for cell in column) for column in zip(header, *rows)]
+
+        return "\n".join(
+            "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+            for row in (header, *rows)
+        )
+
+
+# The profile the instrumented functions record to, None when profiling is off.
+_active_profile: Profile | None = None
+
+
+def _instrumented(func: Callable[..., Any]) -> Callable[..., Any]:
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def instrumented(*args, **kwargs):
+        # When profiling is off, this check is the only cost of the instrumentation.
+        profile = _active_profile
+        if profile is None:
+            return func(*args, **kwargs)
+
+        return profile.call(name, func, args, kwargs)
+
+    instrumented.__instrumented__ = True
+
+    return instrumented
+
+
+def instrument_functions_in(namespace: MutableMapping[str, Any], names: list[str], /) -> None:
+    """
+    Replace the lib functions of `namespace` listed in `names` with instrumented ones,
+    everywhere in the lib, so calls between lib functions are recorded as well.
+
+    The instrumented functions keep the module and name of the originals, so they are still pickled by reference.
+    """
+    package = __name__.rpartition(".")[0]
+    modules = [
+        module
+        for module_name, module in list(sys.modules.items())
+        if module is not None and (module_name == package or module_name.startswith(f"{package}."))
+    ]
+
+    for name in names:
+        func = namespace.get(name)
+        if not isinstance(func, types.FunctionType) or getattr(func, "__instrumented__", False):
+            continue
+        if not func.__module__.startswith(f"{package}.") or func.__module__ == __name__:
+            continue
+
+        instrumented = _instrumented(func)
+        namespace[name] = instrumented
+
+        # Every module which imported the original refers to the instrumented one instead.
+        for module in modules:
+            for attribute, value in list(vars(module).items()):
+                if value is func:
+                    setattr(module, attribute, instrumented)
+
+
+@contextmanager
+def profiling(*, trace_memory: bool = True) -> Iterator[Profile]:
+    """
+    Record the calls of the lib functions within the block.
+
+    e.g.
+        with profiling() as profile:
+            find_single_components_in(board)
+        print(profile.report())
+        profile.write_collapsed_stacks("components.folded")
+
+    Args:
+        trace_memory: record the memory allocated by each call with `tracemalloc`,
+            which slows down the allocations of the whole process while profiling.
+    """
+    global _active_profile
+
+    profile = Profile(trace_memory=trace_memory)
+    previous_profile = _active_profile
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    _active_profile = profile
+    try:
+        yield profile
+    finally:
+        _active_profile = previous_profile
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _profile_whole_process() -> None:
+    global _active_profile
+
+    profile = Profile()
+    tracemalloc.start()
+    _active_profile = profile
+
+    def report() -> None:
+        output = os.environ.get(PROFILE_OUTPUT_ENV_VAR, "lib-profile.folded")
+        profile.write_collapsed_stacks(output)
+
+        print(profile.report(), file=sys.stderr)
+        print(f"Collapsed stacks written to {output}", file=sys.stderr)
+
+    atexit.register(report)
+
+
+if os.environ.get(PROFILE_ENV_VAR):
+    _profile_whole_process()
@@ -0,0 +1,489 @@
+import concurrent.futures
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Final, NamedTuple
+
+import cv2
+import numpy as np
+
+from ._evaluation import Detections, iou_matrix_of
+
+# Windows of the board flatter than this variance per pixel can't be correlated, they score 0.
+_MIN_VARIANCE: Final[float] = 1e-2
+
+
+class LocatorSettings(NamedTuple):
+    # Number of `cv2.pyrDown` levels of the board pyramid, the search starts at the coarsest level a template fits.
+    levels: int = 3
+
+    # Sizes of the templates relative to the board,
+    # e.g. around 0.35 for the COMPONENTS photos, which are taken closer than the BOARDS ones.
+    scales: tuple[float, ...] = (1.0,)
+
+    # Angles searched over the whole board at the coarsest level, in degrees counterclockwise.
+    coarse_angles: tuple[float, ...] = (0.0, 90.0, 180.0, 270.0)
+
+    # Angles searched around each candidate at the next finer level, every level after halves the step.
+    fine_angle_range: float = 10.0
+    fine_angle_step: float = 5.0
+
+    # Number of peaks of the coarsest level which are refined, per template.
+    candidates: int = 5
+
+    # Distance in pixels around the position of a candidate which is searched at every finer level.
+    search_radius: int = 3
+
+    # The shortest side in pixels a template is matched with, so the search can't start coarser than that.
+    min_template_size: int = 8
+
+    # Normalized correlation below which a match is dropped, and the most matches kept per template.
+    min_score: float = 0.5
+    max_matches: int = 1
+
+
+class Template(NamedTuple):
+    label: str
+
+    # BGR image of the component alone, e.g. a COMPONENTS image cropped to its annotated box.
+    image: np.ndarray
+
+
+class TemplateMatch(NamedTuple):
+    label: str
+
+    # The inclusive (xmin, ymin, xmax, ymax) box of the rotated template in the board, as in the VOC annotations.
+    bbox: tuple[int, int, int, int]
+
+    # Where the center of the template is, in board pixels.
+    center: tuple[float, float]
+
+    angle: float
+    scale: float
+
+    # Normalized correlation at full size, from -1 to 1.
+    score: float
+
+
+class _Spectra(NamedTuple):
+    image_shape: tuple[int, int]
+    dft_shape: tuple[int, int]
+
+    # The `cv2.dft` packed spectra of the zero mean image and of its square.
+    image: np.ndarray
+    squared: np.ndarray
+
+    # The integral images of the zero mean image and of its square, for the windows of unmasked templates.
+    sums: np.ndarray
+    squared_sums: np.ndarray
+
+
+class _Candidate(NamedTuple):
+    score: float
+    level: int
+    center: tuple[float, float]
+    angle: float
+    scale: float
+
+
+def _padded(image: np.ndarray, dft_shape: tuple[int, int]) -> np.ndarray:
+    return cv2.copyMakeBorder(
+        image, 0, dft_shape[0] - image.shape[0], 0, dft_shape[1] - image.shape[1], cv2.BORDER_CONSTANT, value=0
+    )
+
+
+def _spectra_of(image: np.ndarray) -> _Spectra:
+    # Removing the mean does not change the normalized correlation, and keeps the window variances precise.
+    image = image.astype(np.float64)
+    image -= image.mean()
+
+    dft_shape = (cv2.getOptimalDFTSize(image.shape[0]), cv2.getOptimalDFTSize(image.shape[1]))
+    sums, squared_sums = cv2.integral2(image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    return _Spectra(
+        image_shape=image.shape,
+        dft_shape=dft_shape,
+        image=cv2.dft(_padded(image, dft_shape)),
+        squared=cv2.dft(_padded(image * image, dft_shape)),
+        sums=sums,
+        squared_sums=squared_sums,
+    )
+
+
+def _window_sums_of(integral: np.ndarray, window_shape: tuple[int, int], valid_shape: tuple[int, int]) -> np.ndarray:
+    height, width = window_shape
+    rows, columns = valid_shape
+
+    return (
+        integral[height:height + rows, width:width + columns] - integral[:rows, width:width + columns]
+        - integral[height:height + rows, :columns] + integral[:rows, :columns]
+    )
+
+
+def _correlation_of(spectrum: np.ndarray, other_spectrum: np.ndarray, valid_shape: tuple[int, int]) -> np.ndarray:
+    # The image padded to at least its own size does not wrap around for the positions where the template fits.
+    product = cv2.mulSpectrums(spectrum, other_spectrum, 0, conjB=True)
+
+    return cv2.idft(product, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)[:valid_shape[0], :valid_shape[1]]
+
+
+def _ncc_map_of(spectra: _Spectra, template: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    # The normalized correlation of the masked template at every position it fits in the image,
+    # from 3 correlations in the frequency domain: with the template, and with the mask for the window statistics.
+    valid_shape = (spectra.image_shape[0] - template.shape[0] + 1, spectra.image_shape[1] - template.shape[1] + 1)
+    if valid_shape[0] <= 0 or valid_shape[1] <= 0:
+        return np.empty((0, 0))
+
+    pixel_count = float(mask.sum())
+    zero_mean_template = (template - template[mask > 0].mean()) * mask
+    template_norm = float(np.sqrt(np.sum(zero_mean_template ** 2)))
+    if template_norm == 0:
+        return np.zeros(valid_shape)
+
+    template_spectrum = cv2.dft(_padded(zero_mean_template, spectra.dft_shape))
+    numerator = _correlation_of(spectra.image, template_spectrum, valid_shape)
+
+    if pixel_count == mask.size:
+        # Without a mask, the sums of the windows come from the integral images, without 2 more correlations.
+        sums = _window_sums_of(spectra.sums, template.shape, valid_shape)
+        squared_sums = _window_sums_of(spectra.squared_sums, template.shape, valid_shape)
+    else:
+        mask_spectrum = cv2.dft(_padded(mask, spectra.dft_shape))
+        sums = _correlation_of(spectra.image, mask_spectrum, valid_shape)
+        squared_sums = _correlation_of(spectra.squared, mask_spectrum, valid_shape)
+
+    # Sum of the squared deviations from the mean of each window.
+    variances = squared_sums - sums ** 2 / pixel_count
+    denominator = np.sqrt(np.maximum(variances, 0)) * template_norm
+
+    return np.divide(
+        numerator, denominator, out=np.zeros(valid_shape), where=variances > _MIN_VARIANCE * pixel_count
+    )
+
+
+def _rotated(template: np.ndarray, angle: float) -> tuple[np.ndarray, np.ndarray]:
+    # The template rotated counterclockwise on a canvas large enough to hold it, and the mask of its pixels.
+    if angle % 90 == 0:
+        quarter_turns = int(angle // 90) % 4
+        return np.ascontiguousarray(np.rot90(template, quarter_turns)), np.ones(
+            template.shape[::-1] if quarter_turns % 2 else template.shape, dtype=np.float64
+        )
+
+    height, width = template.shape
+    matrix = cv2.getRotationMatrix2D(((width - 1) / 2, (height - 1) / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    rotated_width = int(np.ceil(width * cos + height * sin))
+    rotated_height = int(np.ceil(width * sin + height * cos))
+    matrix[0, 2] += (rotated_width - width) / 2
+    matrix[1, 2] += (rotated_height - height) / 2
+
+    rotated = cv2.warpAffine(template, matrix, (rotated_width, rotated_height), flags=cv2.INTER_LINEAR)
+    mask = cv2.warpAffine(
+        np.ones_like(template), matrix, (rotated_width, rotated_height), flags=cv2.INTER_NEAREST
+    )
+
+    # The interpolated edge of the template is blended with the empty canvas, so it's left out.
+    return rotated, cv2.erode(mask, np.ones((3, 3), np.uint8))
+
+
+def _scaled(template: np.ndarray, factor: float) -> np.ndarray:
+    size = (max(int(round(template.shape[1] * factor)), 1), max(int(round(template.shape[0] * factor)), 1))
+    interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_LINEAR
+
+    return cv2.resize(template, size, interpolation=interpolation)
+
+
+def _bbox_of(center: tuple[float, float], size: tuple[float, float], angle: float) -> tuple[int, int, int, int]:
+    # The inclusive box around a (width, height) rectangle rotated around its center.
+    width, height = size
+    radians = np.deg2rad(angle)
+    cos, sin = abs(np.cos(radians)), abs(np.sin(radians))
+    box_width = width * cos + height * sin
+    box_height = width * sin + height * cos
+
+    xmin = int(round(center[0] - (box_width - 1) / 2))
+    ymin = int(round(center[1] - (box_height - 1) / 2))
+
+    return xmin, ymin, xmin + max(int(round(box_width)), 1) - 1, ymin + max(int(round(box_height)), 1) - 1
+
+
+class BoardPyramid:
+    """
+    The grayscale pyramid of a board, and the spectra of its levels, computed once and shared by every template.
+    """
+
+    def __init__(self, board: np.ndarray, /, *, levels: int = 3):
+        """
+        Args:
+            board: BGR or grayscale uint8 image.
+            levels: number of `cv2.pyrDown` levels below the full size board.
+        """
+        gray = cv2.cvtColor(board, cv2.COLOR_BGR2GRAY) if board.ndim == 3 else board
+
+        self.__levels = [gray]
+        for _ in range(levels):
+            self.__levels.append(cv2.pyrDown(self.__levels[-1]))
+
+        self.__spectra: dict[int, _Spectra] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def levels(self) -> int:
+        return len(self.__levels) - 1
+
+    def level(self, level: int, /) -> np.ndarray:
+        """
+        The board `2 ** level` times smaller, 0 is the full size board.
+        """
+        return self.__levels[level]
+
+    def spectra_of(self, level: int, /) -> _Spectra:
+        with self.__lock:
+            if level not in self.__spectra:
+                self.__spectra[level] = _spectra_of(self.__levels[level])
+
+            return self.__spectra[level]
+
+
+class TemplateLocator:
+    """
+    Find where templates of components are on boards, at any angle, coarse to fine.
+
+    Each template is correlated with the whole board only at the coarsest pyramid level it fits,
+    at every angle of `coarse_angles`, by the normalized correlation computed with the DFT,
+    where the spectra of the board are computed once and shared by all templates and angles.
+    The best peaks are then followed level by level down to the full size board,
+    each searched only within `search_radius` of where it was, and only at angles around the one it was found at.
+
+    The pyramids of the latest boards are kept, so locating more templates on the same board later
+    does not build its pyramid and spectra again.
+
+    e.g.
+        locator = TemplateLocator(LocatorSettings(scales=(0.3, 0.35, 0.4)))
+        board = db.get_img_located_at("BOARDS/BOARD3-1.jpg", channel_mode="BGR")
+        for match in locator.locate(board, templates):
+            print(match.label, match.bbox, match.score)
+    """
+
+    def __init__(self, settings: LocatorSettings = LocatorSettings(), /, *, pyramid_cache_size: int = 4):
+        self.__settings = settings
+        self.__pyramid_cache_size = pyramid_cache_size
+        self.__pyramids: OrderedDict[str, BoardPyramid] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @property
+    def settings(self) -> LocatorSettings:
+        return self.__settings
+
+    def pyramid_of(self, board: np.ndarray, /, *, key: str | None = None) -> BoardPyramid:
+        """
+        The pyramid of a board, built the first time the board is seen.
+
+        Args:
+            board: BGR or grayscale uint8 image.
+            key: what tells the board apart, e.g. its location, defaults to a digest of its pixels.
+        """
+        if key is None:
+            digest = hashlib.blake2b(f"{board.shape}{board.dtype.str}".encode(), digest_size=16)
+            digest.update(np.ascontiguousarray(board).data)
+            key = digest.hexdigest()
+
+        with self.__lock:
+            if key in self.__pyramids:
+                self.__pyramids.move_to_end(key)
+                return self.__pyramids[key]
+
+        pyramid = BoardPyramid(board, levels=self.__settings.levels)
+
+        with self.__lock:
+            self.__pyramids[key] = pyramid
+            while len(self.__pyramids) > self.__pyramid_cache_size:
+                self.__pyramids.popitem(last=False)
+
+        return pyramid
+
+    def clear_pyramid_cache(self) -> None:
+        with self.__lock:
+            self.__pyramids.clear()
+
+    def locate(
+            self,
+            board: np.ndarray | BoardPyramid,
+            templates: Sequence[Template],
+            /,
+            *,
+            key: str | None = None,
+            max_workers: int | None = None,
+    ) -> list[TemplateMatch]:
+        """
+        Find the templates on a board, each one in its own thread of a pool.
+
+        OpenCV releases the GIL in the DFT, so the templates are matched in parallel.
+
+        Args:
+            board: BGR or grayscale uint8 image, or its pyramid.
+            templates: the components to find.
+            key: what tells the board apart in the pyramid cache, see `pyramid_of`.
+            max_workers: number of threads, defaults to the one of `ThreadPoolExecutor`.
+
+        Returns:
+            the matches of all templates, the best first.
+        """
+        pyramid = board if isinstance(board, BoardPyramid) else self.pyramid_of(board, key=key)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            matches_of_templates = list(pool.map(lambda template: self.locate_template(pyramid, template), templates))
+
+        return sorted(
+            (match for matches in matches_of_templates for match in matches), key=lambda match: match.score, reverse=True
+        )
+
+    def locate_template(self, pyramid: BoardPyramid, template: Template, /) -> list[TemplateMatch]:
+        """
+        Find a single template on the board of a pyramid, see `locate`.
+        """
+        settings = self.__settings
+        gray = template.image if template.image.ndim == 2 else cv2.cvtColor(template.image, cv2.COLOR_BGR2GRAY)
+        gray = gray.astype(np.float64)
+
+        candidates = []
+        for scale in settings.scales:
+            candidates.extend(self.__coarse_candidates_of(pyramid, gray, scale))
+
+        candidates = sorted(candidates, reverse=True)[:settings.candidates]
+        refined = [self.__refined(pyramid, gray, candidate) for candidate in candidates]
+
+        matches = [
+            TemplateMatch(
+                label=template.label,
+                bbox=_bbox_of(
+                    candidate.center, (gray.shape[1] * candidate.scale, gray.shape[0] * candidate.scale), candidate.angle
+                ),
+                center=candidate.center,
+                angle=candidate.angle % 360,
+                scale=candidate.scale,
+                score=candidate.score,
+            )
+            for candidate in sorted(refined, reverse=True)
+            if candidate.score >= settings.min_score
+        ]
+
+        # Several candidates can end up on the same component.
+        kept = []
+        for match in matches:
+            if len(kept) == settings.max_matches:
+                break
+            if not kept or iou_matrix_of(np.array([match.bbox]), np.array([kept_match.bbox for kept_match in kept])).max() < 0.5:
+                kept.append(match)
+
+        return kept
+
+    def __start_level_of(self, pyramid: BoardPyramid, template: np.ndarray, scale: float) -> int:
+        # The coarsest level where the shortest side of the template is still `min_template_size`.
+        shortest_side = min(template.shape) * scale
+        levels = int(np.floor(np.log2(max(shortest_side / self.__settings.min_template_size, 1))))
+
+        return min(levels, pyramid.levels)
+
+    def __coarse_candidates_of(self, pyramid: BoardPyramid, template: np.ndarray, scale: float) -> list[_Candidate]:
+        settings = self.__settings
+        level = self.__start_level_of(pyramid, template, scale)
+        spectra = pyramid.spectra_of(level)
+        scaled = _scaled(template, scale / 2 ** level)
+
+        candidates = []
+        for angle in settings.coarse_angles:
+            rotated, mask = _rotated(scaled, angle)
+            ncc_map = _ncc_map_of(spectra, rotated, mask)
+            if ncc_map.size == 0:
+                continue
+
+            # The best peaks, each one hiding the positions closer than half the template around it.
+            suppression_radius = max(min(rotated.shape) // 2, 1)
+            for _ in range(settings.candidates):
+                y, x = np.unravel_index(int(np.argmax(ncc_map)), ncc_map.shape)
+                score = float(ncc_map[y, x])
+                if score <= 0:
+                    break
+
+                center = (x + (rotated.shape[1] - 1) / 2, y + (rotated.shape[0] - 1) / 2)
+                candidates.append(_Candidate(score, level, center, angle, scale))
+                ncc_map[
+                    max(y - suppression_radius, 0):y + suppression_radius + 1,
+                    max(x - suppression_radius, 0):x + suppression_radius + 1,
+                ] = -1
+
+        return candidates
+
+    def __refined(self, pyramid: BoardPyramid, template: np.ndarray, candidate: _Candidate) -> _Candidate:
+        settings = self.__settings
+        angle_step = settings.fine_angle_step
+        angles = candidate.angle + np.arange(
+            -settings.fine_angle_range, settings.fine_angle_range + angle_step / 2, angle_step
+        ) if settings.fine_angle_range > 0 and angle_step > 0 else np.array([candidate.angle])
+
+        for level in range(candidate.level - 1, -1, -1):
+            # `cv2.pyrDown` keeps every other pixel of the blurred level below, so a pixel x of a level is at 2x in it.
+            center = (candidate.center[0] * 2, candidate.center[1] * 2)
+            candidate = self.__best_around(pyramid.level(level), template, candidate._replace(
+                level=level, center=center
+            ), angles)
+
+            angle_step /= 2
+            angles = candidate.angle + np.array([-angle_step, 0, angle_step])
+
+        return candidate
+
+    def __best_around(
+            self, board: np.ndarray, template: np.ndarray, candidate: _Candidate, angles: np.ndarray
+    ) -> _Candidate:
+        # The best position within the search radius of the candidate, and the best angle, at the level of the candidate.
+        radius = self.__settings.search_radius
+        scaled = _scaled(template, candidate.scale / 2 ** candidate.level)
+
+        # A region large enough for the template at any angle, so its spectra are shared by all angles.
+        half_extent = int(np.ceil(np.hypot(*scaled.shape) / 2)) + radius + 1
+        center_x, center_y = candidate.center
+        left = max(int(round(center_x)) - half_extent, 0)
+        top = max(int(round(center_y)) - half_extent, 0)
+        region = board[top:int(round(center_y)) + half_extent + 1, left:int(round(center_x)) + half_extent + 1]
+        spectra = _spectra_of(region)
+
+        best = candidate._replace(score=-1.0)
+        for angle in angles:
+            rotated, mask = _rotated(scaled, float(angle))
+            ncc_map = _ncc_map_of(spectra, rotated, mask)
+            if ncc_map.size == 0:
+                continue
+
+            # Only the positions which put the center of the template within the radius.
+            half_height, half_width = (rotated.shape[0] - 1) / 2, (rotated.shape[1] - 1) / 2
+            expected_x = int(round(center_x - half_width)) - left
+            expected_y = int(round(center_y - half_height)) - top
+            window_left, window_top = max(expected_x - radius, 0), max(expected_y - radius, 0)
+            window = ncc_map[window_top:max(expected_y + radius + 1, 0), window_left:max(expected_x + radius + 1, 0)]
+            if window.size == 0:
+                continue
+
+            y, x = np.unravel_index(int(np.argmax(window)), window.shape)
+            score = float(window[y, x])
+            if score > best.score:
+                best = candidate._replace(
+                    score=score,
+                    center=(left + window_left + x + half_width, top + window_top + y + half_height),
+                    angle=float(angle),
+                )
+
+        return best
+
+
+def detections_of(matches: Sequence[TemplateMatch], /) -> Detections:
+    """
+    The matches as labeled `Detections`, to score them against the annotations with `score_detections`.
+    """
+    return Detections(
+        boxes=np.array([match.bbox for match in matches], dtype=np.int64).reshape(-1, 4),
+        scores=np.array([match.score for match in matches], dtype=np.float64),
+        labels=np.array([match.label for match in matches], dtype=str),
+    )
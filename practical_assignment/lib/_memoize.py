@@ -0,0 +1,245 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Callable
+from typing import Any, Final
+
+import numpy as np
+
+
+def _lib_fingerprint() -> str:
+    # Every result depends on the code of the lib, not only on the memoized function itself,
+    # so the source of the whole lib is part of every key, and changing any of it invalidates the results.
+    digest = hashlib.blake2b(digest_size=8)
+
+    for path in sorted(glob.glob(f"{os.path.dirname(__file__)}/*.py")):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+_LIB_FINGERPRINT: Final[str] = _lib_fingerprint()
+
+
+def _update_digest_with(digest: Any, value: Any) -> None:
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray{value.shape}{value.dtype.str}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_digest_with(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode())
+        for key in sorted(value):
+            _update_digest_with(digest, key)
+            _update_digest_with(digest, value[key])
+    elif value is None or isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+    else:
+        raise TypeError(f"{type(value).__name__} can not be part of a memoization key.")
+
+
+def _flatten(value: Any, arrays: dict[str, np.ndarray]) -> Any:
+    # Turn a result into a JSON structure, where every array is replaced by its name in `arrays`.
+    if isinstance(value, np.ndarray):
+        name = f"a{len(arrays)}"
+        arrays[name] = value
+        return {"array": name}
+    elif isinstance(value, (list, tuple)):
+        return {type(value).__name__: [_flatten(item, arrays) for item in value]}
+    elif isinstance(value, np.generic):
+        return {"value": value.item()}
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return {"value": value}
+    else:
+        raise TypeError(f"{type(value).__name__} can not be stored as a memoized result.")
+
+
+def _unflatten(structure: Any, arrays: Any) -> Any:
+    if "array" in structure:
+        return arrays[structure["array"]]
+    elif "list" in structure:
+        return [_unflatten(item, arrays) for item in structure["list"]]
+    elif "tuple" in structure:
+        return tuple(_unflatten(item, arrays) for item in structure["tuple"])
+    else:
+        return structure["value"]
+
+
+class _Memoized:
+    """
+    A memoized function, see `ResultCache.memoize`.
+
+    It is a plain object instead of a closure, so it can be pickled and sent to worker processes.
+    """
+
+    def __init__(self, cache: "ResultCache", func: Callable[..., Any]):
+        self.cache = cache
+        self.func = func
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.cache.call(self.func, *args, **kwargs)
+
+
+class ResultCache:
+    """
+    A content-addressed, on-disk cache of the results of pure functions.
+
+    A result is keyed by a hash of the function, the bytes of its array arguments, its other arguments,
+    and the source of the lib. It is stored losslessly as a compressed `.npz` file,
+    so the binary masks and crops come back exactly as they were computed.
+
+    When the files take more than `max_bytes`, the least recently used results are removed.
+    """
+    __directory: Final[str]
+    __max_bytes: Final[int]
+
+    def __init__(self, *, directory: str, max_bytes: int = 2 * 1024 ** 3):
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The lock can not be pickled, and is not shared with other processes anyway.
+        return {"directory": self.__directory, "max_bytes": self.__max_bytes}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    @property
+    def directory(self) -> str:
+        return self.__directory
+
+    @staticmethod
+    def __name_of(func: Callable[..., Any]) -> str:
+        return f"{func.__module__}.{func.__qualname__}"
+
+    def key_of(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{_LIB_FINGERPRINT}:{self.__name_of(func)}".encode())
+        _update_digest_with(digest, args)
+        _update_digest_with(digest, kwargs)
+
+        return digest.hexdigest()
+
+    def __path_of(self, func: Callable[..., Any], key: str) -> str:
+        return f"{self.__directory}/{self.__name_of(func)}-{key}.npz"
+
+    def load(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """
+        Load the result of `func` with the arguments, if it has been computed before.
+
+        Raises:
+            KeyError: when there is no stored result.
+        """
+        path = self.__path_of(func, self.key_of(func, *args, **kwargs))
+
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                result = _unflatten(json.loads(str(stored["structure"])), stored)
+
+            # Mark the result as recently used.
+            os.utime(path)
+        except FileNotFoundError:
+            raise KeyError(path) from None
+
+        return result
+
+    def store(self, result: Any, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> None:
+        """
+        Store `result` as the result of `func` with the arguments, for when it is computed elsewhere,
+        e.g. in a worker process.
+        """
+        self.__store(self.__path_of(func, self.key_of(func, *args, **kwargs)), result)
+
+    def call(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """
+        Call `func` with the arguments, or load its result if it has been computed before.
+        """
+        try:
+            return self.load(func, *args, **kwargs)
+        except KeyError:
+            pass
+
+        result = func(*args, **kwargs)
+        self.store(result, func, *args, **kwargs)
+
+        return result
+
+    def __store(self, path: str, result: Any) -> None:
+        arrays: dict[str, np.ndarray] = {}
+        structure = json.dumps(_flatten(result, arrays))
+
+        os.makedirs(self.__directory, exist_ok=True)
+
+        # Write to a temporary file first, so a concurrent reader never sees a partial result.
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(f, structure=np.array(structure), **arrays)
+        os.replace(temporary_path, path)
+
+        self.__evict()
+
+    def __evict(self) -> None:
+        with self.__lock:
+            entries = []
+            for entry in os.scandir(self.__directory):
+                if entry.name.endswith(".npz"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+
+            # Remove the least recently used results first.
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.__max_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+    def memoize(self, func: Callable[..., Any], /) -> Callable[..., Any]:
+        """
+        Wrap a pure function, so its results are loaded from the cache whenever possible.
+
+        e.g. `result_cache.memoize(find_single_components_in)(img, 130, 1500)`
+        """
+        return _Memoized(self, func)
+
+    def invalidate(self, func: Callable[..., Any] | None = None, /) -> int:
+        """
+        Remove the stored results of `func`, or of every function when it's None.
+
+        Returns:
+            the number of removed results.
+        """
+        if not os.path.isdir(self.__directory):
+            return 0
+
+        if isinstance(func, _Memoized):
+            func = func.func
+
+        prefix = "" if func is None else f"{self.__name_of(func)}-"
+        removed = 0
+
+        for name in os.listdir(self.__directory):
+            if name.startswith(prefix) and name.endswith(".npz"):
+                try:
+                    os.remove(f"{self.__directory}/{name}")
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+
+        return removed
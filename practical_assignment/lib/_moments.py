@@ -0,0 +1,100 @@
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+
+class ImageMoments(NamedTuple):
+    # Raw moments of the non-zero pixels, m00 is the number of pixels.
+    m00: float
+    m10: float
+    m01: float
+
+    # Central moments of the non-zero pixels, which are not normalized by the number of pixels.
+    mu20: float
+    mu02: float
+    mu11: float
+
+    # The inclusive extents of the non-zero pixels, -1 when there is no non-zero pixel.
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+    @property
+    def centroid(self) -> np.ndarray:
+        if self.m00 == 0:
+            return np.array([np.nan, np.nan])
+
+        return np.array([self.m10 / self.m00, self.m01 / self.m00])
+
+    @property
+    def inertia_tensor(self) -> np.ndarray:
+        return np.array([
+            [self.mu20, self.mu11],
+            [self.mu11, self.mu02],
+        ])
+
+
+def _binary_view_of(image_: np.ndarray, /) -> np.ndarray:
+    if image_.ndim != 2:
+        raise ValueError(
+            f"image must be a 2D numpy array, which has {image_.ndim} dimensions."
+        )
+
+    # uint8 images can be handed to OpenCV as is, since it treats every non-zero pixel as 1 in binary mode.
+    if image_.dtype == np.uint8:
+        return image_
+
+    if image_.dtype == np.bool_:
+        return image_.view(np.uint8)
+
+    return (image_ != 0).view(np.uint8)
+
+
+def moments_of(image_: np.ndarray, /) -> ImageMoments:
+    """
+    Compute the moments and extents of the non-zero pixels of a 2D image,
+    without building any coordinate grid.
+
+    Args:
+        image_: 2D numpy array, every non-zero pixel is part of the region.
+
+    Returns:
+        the moments of the region, see `ImageMoments`.
+    """
+    binary = _binary_view_of(image_)
+
+    # Both of them are a single pass over the image with no temporaries.
+    moments = cv2.moments(binary, binaryImage=True)
+    left, top, width, height = cv2.boundingRect(binary)
+
+    if moments["m00"] == 0:
+        left = top = right = bottom = -1
+    else:
+        right, bottom = left + width - 1, top + height - 1
+
+    return ImageMoments(
+        m00=moments["m00"],
+        m10=moments["m10"],
+        m01=moments["m01"],
+        mu20=moments["mu20"],
+        mu02=moments["mu02"],
+        mu11=moments["mu11"],
+        left=left,
+        top=top,
+        right=right,
+        bottom=bottom,
+    )
+
+
+def principal_axis_of(moments: ImageMoments, /) -> np.ndarray:
+    """
+    The principal axis of a region, picked from the eigenvectors of its inertia tensor.
+    """
+    # Solve for the eigenvectors and eigenvalues of the inertia tensor.
+    eigenvalues, eigenvectors = np.linalg.eig(moments.inertia_tensor)
+
+    # Select the one associated with the largest eigenvalue,
+    # picked the same way `find_principal_axes_from` always has.
+    return eigenvectors[0, :] if eigenvalues[0] > eigenvalues[1] else eigenvectors[1, :]
@@ -1,32 +1,357 @@
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+
 import cv2
 import numpy as np
-from matplotlib import pyplot as plt
 
 
-def show_images_in_row(images: [np.ndarray], /, *, fig_size: tuple[int, int] = (20, 5), is_gray: bool = False) -> None:
-    _, _axs = plt.subplots(1, len(images), figsize=fig_size)
-    for n, component in enumerate(images):
-        _axs[n].imshow(component, cmap="gray" if is_gray else None)
-        _axs[n].set_title(f'Image {n + 1}')
+def _pyplot():
+    # matplotlib is slow to import, and only needed once something is shown.
+    from matplotlib import pyplot
+
+    return pyplot
+
+
+def _displayable_of(image: np.ndarray) -> np.ndarray:
+    # An RGB uint8 version of an image, scaled as `imshow` shows it:
+    # single channel images are stretched from their minimum to their maximum, float images are in [0, 1].
+    if image.ndim == 2 or image.shape[2] == 1:
+        gray = cv2.normalize(image.reshape(image.shape[:2]).astype(np.float32), None, 0, 255, cv2.NORM_MINMAX)
+        return cv2.cvtColor(gray.astype(np.uint8), cv2.COLOR_GRAY2RGB)
+
+    if image.dtype != np.uint8:
+        image = (np.clip(image, 0, 1) * 255).astype(np.uint8)
+
+    return image[:, :, :3]
+
+
+def contact_sheet_of(
+        images: Sequence[np.ndarray],
+        /,
+        *,
+        thumbnail_height: int = 200,
+        columns: int | None = None,
+        gap: int = 4,
+        titles: bool = True,
+) -> np.ndarray:
+    """
+    Compose thumbnails of images into one RGB image, with OpenCV only.
+
+    Every image is scaled to `thumbnail_height` keeping its aspect ratio, and the thumbnails are laid out
+    in rows of `columns`, left to right, each cell as wide as the widest thumbnail of its column.
+
+    Args:
+        images: RGB or single channel images, the single channel ones are stretched to their full range.
+        thumbnail_height: height of the thumbnails in pixels.
+        columns: number of thumbnails in a row, defaults to all of them in one row.
+        gap: white pixels between and around the thumbnails.
+        titles: write "Image n" on the top left corner of each thumbnail, as `show_images_in_row` does.
+
+    Returns:
+        RGB uint8 array.
+    """
+    if not images:
+        raise ValueError("There should be at least 1 image.")
+    if thumbnail_height <= 0:
+        raise ValueError(f"thumbnail_height must be positive, which is {thumbnail_height}.")
+
+    columns = min(columns or len(images), len(images))
+    rows = -(-len(images) // columns)
+
+    thumbnails = []
+    for image in images:
+        displayable = _displayable_of(image)
+        height, width = displayable.shape[:2]
+        thumbnail_width = max(round(width * thumbnail_height / height), 1)
+
+        # INTER_AREA averages the pixels when shrinking, which does not alias as nearest neighbours do.
+        interpolation = cv2.INTER_AREA if height > thumbnail_height else cv2.INTER_LINEAR
+        thumbnails.append(cv2.resize(displayable, (thumbnail_width, thumbnail_height), interpolation=interpolation))
+
+    column_widths = [
+        max(thumbnail.shape[1] for thumbnail in thumbnails[column::columns])
+        for column in range(columns)
+    ]
+    column_lefts = np.cumsum([gap, *(width + gap for width in column_widths)])
+
+    sheet = np.full(
+        (rows * (thumbnail_height + gap) + gap, int(column_lefts[-1]), 3), 255, dtype=np.uint8
+    )
+
+    for n, thumbnail in enumerate(thumbnails):
+        row, column = divmod(n, columns)
+        top = gap + row * (thumbnail_height + gap)
+        left = int(column_lefts[column])
+        sheet[top:top + thumbnail_height, left:left + thumbnail.shape[1]] = thumbnail
+
+        if titles:
+            # A white outline keeps the title readable on any thumbnail.
+            for color, thickness in (((255, 255, 255), 3), ((0, 0, 0), 1)):
+                cv2.putText(
+                    sheet, f"Image {n + 1}", (left + 4, top + 16),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, thickness, cv2.LINE_AA,
+                )
+
+    return sheet
+
+
+def color_distribution_plot_of(result: np.ndarray, /, *, height: int = 200) -> np.ndarray:
+    """
+    Plot the 3 layers of a vertical color distribution as red, green and blue lines, with OpenCV only.
+
+    Args:
+        result: array of shape (3, N), as from `vertical_color_distribution_of`, with values in [0, 255].
+        height: height of the plot in pixels, it is N pixels wide.
+
+    Returns:
+        RGB uint8 array of shape (height, N, 3).
+    """
+    if result.shape[0] != 3:
+        raise ValueError("The analysis result should have 3 layers.")
+
+    plot = np.full((height, result.shape[1], 3), 255, dtype=np.uint8)
+    xs = np.arange(result.shape[1])
+
+    for layer, color in enumerate(((255, 0, 0), (0, 255, 0), (0, 0, 255))):
+        ys = (height - 1) * (1 - np.clip(result[layer], 0, 255) / 255)
+        points = np.stack([xs, ys], axis=1).round().astype(np.int32)
+        cv2.polylines(plot, [points], isClosed=False, color=color, thickness=1, lineType=cv2.LINE_AA)
+
+    return plot
+
+
+class RenderBackend(ABC):
+    """
+    Where `show_images_in_row` and `show_vertical_rgb_analysis_of` show their results, see `rendering_to`.
+    """
+
+    @abstractmethod
+    def show_images(self, images: Sequence[np.ndarray], /, *, fig_size: tuple[int, int], is_gray: bool) -> None:
+        pass
+
+    @abstractmethod
+    def show_color_distribution(self, result: np.ndarray, /, *, label: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        """
+        Wait until everything shown so far is done.
+        """
+
+    def close(self) -> None:
+        """
+        Finish everything shown so far, and release what the backend holds.
+        """
+        self.flush()
+
+
+class MatplotlibBackend(RenderBackend):
+    """
+    Show the results in matplotlib figures at full resolution, for interactive use in the notebooks.
+
+    Every figure is closed once shown, so none of them piles up when nothing displays them.
+    """
 
-    plt.show()
+    def show_images(self, images: Sequence[np.ndarray], /, *, fig_size: tuple[int, int], is_gray: bool) -> None:
+        plt = _pyplot()
+        fig, _axs = plt.subplots(1, len(images), figsize=fig_size, squeeze=False)
+        for n, component in enumerate(images):
+            _axs[0, n].imshow(component, cmap="gray" if is_gray else None)
+            _axs[0, n].set_title(f'Image {n + 1}')
+
+        plt.show()
+        plt.close(fig)
+
+    def show_color_distribution(self, result: np.ndarray, /, *, label: str) -> None:
+        plt = _pyplot()
+        colors = ('r', 'g', 'b')
+        fig = plt.figure(figsize=(20, 5))
+        plt.title(f"Color distribution of {label}")
+        for layer in range(3):
+            plt.plot(result[layer], color=colors[layer], label=f"Layer {colors[layer]}")
+
+        plt.legend()
+        plt.show()
+        plt.close(fig)
+
+
+class ContactSheetBackend(RenderBackend):
+    """
+    Write the results as downscaled contact sheets, see `contact_sheet_of`, without matplotlib,
+    for batch runs where nobody looks at the figures as they come.
+
+    The sheets are encoded and written by a background thread, so showing only costs the composition.
+    At most `max_pending` sheets wait to be written, showing more blocks until one of them is.
+
+    e.g.
+        with rendering_to(ContactSheetBackend("sheets")):
+            for board in boards:
+                show_images_in_row(find_single_components_in(board))
+
+    Args:
+        directory: directory the sheets are written to, as `{prefix}-{n:04d}.{extension}`, created if missing.
+        prefix: start of the file names.
+        extension: image format of the files, as `cv2.imwrite` reads it from the file name.
+        thumbnail_height: height of the thumbnails in pixels.
+        columns: number of thumbnails in a row, defaults to all of them in one row.
+        max_pending: number of sheets which can wait to be written.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            /,
+            *,
+            prefix: str = "sheet",
+            extension: str = "jpg",
+            thumbnail_height: int = 200,
+            columns: int | None = None,
+            max_pending: int = 8,
+    ):
+        os.makedirs(directory, exist_ok=True)
+
+        self.__directory = directory
+        self.__prefix = prefix
+        self.__extension = extension
+        self.__thumbnail_height = thumbnail_height
+        self.__columns = columns
+
+        self.__count = 0
+        self.__paths: list[str] = []
+        self.__error: Exception | None = None
+        self.__pending: queue.Queue[tuple[str, np.ndarray] | None] = queue.Queue(maxsize=max_pending)
+        self.__writer = threading.Thread(target=self.__write_pending, name="contact-sheet-writer", daemon=True)
+        self.__writer.start()
+
+    @property
+    def paths(self) -> list[str]:
+        """
+        The paths of the sheets shown so far, written or not yet.
+        """
+        return list(self.__paths)
+
+    def __write_pending(self) -> None:
+        while (task := self.__pending.get()) is not None:
+            path, sheet = task
+            try:
+                # OpenCV releases the GIL while encoding, so this runs alongside the composition of the next sheet.
+                if not cv2.imwrite(path, cv2.cvtColor(sheet, cv2.COLOR_RGB2BGR)):
+                    raise OSError(f"Could not write {path}.")
+            except Exception as error:
+                self.__error = self.__error or error
+            finally:
+                self.__pending.task_done()
+
+        self.__pending.task_done()
+
+    def __write(self, sheet: np.ndarray) -> None:
+        self.__raise_error()
+        if not self.__writer.is_alive():
+            raise ValueError("The backend is closed.")
+
+        path = os.path.join(self.__directory, f"{self.__prefix}-{self.__count:04d}.{self.__extension}")
+        self.__count += 1
+        self.__paths.append(path)
+        self.__pending.put((path, sheet))
+
+    def __raise_error(self) -> None:
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def show_images(self, images: Sequence[np.ndarray], /, *, fig_size: tuple[int, int], is_gray: bool) -> None:
+        self.__write(contact_sheet_of(images, thumbnail_height=self.__thumbnail_height, columns=self.__columns))
+
+    def show_color_distribution(self, result: np.ndarray, /, *, label: str) -> None:
+        self.__write(color_distribution_plot_of(result, height=self.__thumbnail_height))
+
+    def flush(self) -> None:
+        """
+        Wait until every sheet shown so far is written.
+
+        Raises:
+            OSError: when a sheet could not be written.
+        """
+        self.__pending.join()
+        self.__raise_error()
+
+    def close(self) -> None:
+        """
+        Write the sheets shown so far, and stop the writing thread.
+        """
+        if self.__writer.is_alive():
+            self.__pending.put(None)
+            self.__writer.join()
+
+        self.__raise_error()
+
+    def __enter__(self) -> "ContactSheetBackend":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# The backend the show functions use, the interactive matplotlib one unless `rendering_to` says otherwise.
+_render_backend: RenderBackend = MatplotlibBackend()
+
+
+@contextmanager
+def rendering_to(backend: RenderBackend, /) -> Iterator[RenderBackend]:
+    """
+    Show the results of `show_images_in_row` and `show_vertical_rgb_analysis_of` with `backend` within the block,
+    and close the backend when leaving it, which waits until it's done with them.
+    """
+    global _render_backend
+
+    previous_backend = _render_backend
+    _render_backend = backend
+    try:
+        yield backend
+    finally:
+        _render_backend = previous_backend
+        backend.close()
+
+
+def show_images_in_row(images: [np.ndarray], /, *, fig_size: tuple[int, int] = (20, 5), is_gray: bool = False) -> None:
+    _render_backend.show_images(images, fig_size=fig_size, is_gray=is_gray)
 
 
 def draw_central_line_on(
-        img: np.ndarray, /, *, a: [float, float], b: [float, float]
+        img: np.ndarray,
+        /,
+        *,
+        a: tuple[float, float] | np.ndarray,
+        b: tuple[float, float] | np.ndarray,
+        color: tuple[int, int, int] = (0, 0, 255),
+        thickness: int = 2,
 ) -> np.ndarray:
-    return cv2.line(img, (int(a[0]), int(a[1])), (int(b[0]), int(b[1])), (0, 0, 255), 2)
+    """
+    Draw the line from `a` to `b` on the image, in place.
+
+    `a` and `b` can also be arrays of shape (N, 2), to draw N lines in a single call.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+
+    if a.ndim == 1:
+        return cv2.line(img, (int(a[0]), int(a[1])), (int(b[0]), int(b[1])), color, thickness)
+
+    if a.shape != b.shape or a.shape[1:] != (2,):
+        raise ValueError(f"a and b must be arrays of shape (N, 2), which have shapes {a.shape} and {b.shape}.")
+
+    # Truncated towards 0, as `int` does for a single line.
+    lines = np.stack([a, b], axis=1).astype(np.int32)
+
+    return cv2.polylines(img, list(lines), isClosed=False, color=color, thickness=thickness)
 
 
 def show_vertical_rgb_analysis_of(result: np.ndarray, /, *, label: str) -> None:
     if result.shape[0] != 3:
         raise ValueError("The analysis result should have 3 layers.")
 
-    colors = ('r', 'g', 'b')
-    plt.figure(figsize=(20, 5))
-    plt.title(f"Color distribution of {label}")
-    for layer in range(3):
-        plt.plot(result[layer], color=colors[layer], label=f"Layer {colors[layer]}")
-
-    plt.legend()
-    plt.show()
+    _render_backend.show_color_distribution(result, label=label)
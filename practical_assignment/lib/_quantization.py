@@ -0,0 +1,179 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Final
+
+import cv2
+import numpy as np
+
+from ._color import ResistorColorFinder
+
+# Number of pixels assigned to their nearest palette color at a time,
+# which bounds the size of the (pixels, colors) distance temporaries.
+_ASSIGN_CHUNK_SIZE: Final[int] = 1 << 18
+
+# Number of palettes kept by the palette cache.
+_PALETTE_CACHE_SIZE: Final[int] = 64
+
+_palette_cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+
+def assign_to_palette(pixels: np.ndarray, palette: np.ndarray, /) -> np.ndarray:
+    """
+    Find the nearest palette color of every pixel.
+
+    Args:
+        pixels: array of shape (N, 3).
+        palette: array of shape (K, 3).
+
+    Returns:
+        the index of the nearest palette color of each pixel, as an array of shape (N,).
+    """
+    palette_ = palette.astype(np.float32)
+
+    # |p - c|^2 = |p|^2 - 2 p.c + |c|^2, where |p|^2 does not change the nearest c.
+    palette_norms = (palette_ ** 2).sum(axis=1)
+    labels = np.empty(len(pixels), dtype=np.intp)
+
+    for start in range(0, len(pixels), _ASSIGN_CHUNK_SIZE):
+        chunk = pixels[start:start + _ASSIGN_CHUNK_SIZE].astype(np.float32)
+        labels[start:start + _ASSIGN_CHUNK_SIZE] = np.argmin(palette_norms - 2 * (chunk @ palette_.T), axis=1)
+
+    return labels
+
+
+def _sample_pixels_of(pixels: np.ndarray, sample_size: int, rng: np.random.Generator) -> np.ndarray:
+    if len(pixels) <= sample_size:
+        return pixels
+
+    return pixels[rng.choice(len(pixels), size=sample_size, replace=False)]
+
+
+def _kmeans_palette_of(
+        pixels: np.ndarray, to: int, rng: np.random.Generator, *, sample_size: int = 20_000, **_
+) -> np.ndarray:
+    # Fit k-means on a random subsample only, the palette of an image is well represented by a few thousand pixels.
+    sample = _sample_pixels_of(pixels, sample_size, rng).astype(np.float32)
+
+    cv2.setRNGSeed(int(rng.integers(1 << 31)))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 0.2)
+    _, _, centers = cv2.kmeans(sample, to, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
+
+    return centers
+
+
+def _minibatch_kmeans_palette_of(
+        pixels: np.ndarray,
+        to: int,
+        rng: np.random.Generator,
+        *,
+        batch_size: int = 2048,
+        iterations: int = 50,
+        **_,
+) -> np.ndarray:
+    centers = _sample_pixels_of(pixels, to, rng).astype(np.float32)
+    counts = np.zeros(len(centers), dtype=np.float32)
+
+    for _ in range(iterations):
+        batch = _sample_pixels_of(pixels, batch_size, rng).astype(np.float32)
+        labels = assign_to_palette(batch, centers)
+
+        # Move each center towards the mean of its batch members,
+        # with a learning rate decreasing with the number of pixels the center has seen.
+        batch_counts = np.bincount(labels, minlength=len(centers)).astype(np.float32)
+        batch_sums = np.zeros_like(centers)
+        np.add.at(batch_sums, labels, batch)
+
+        seen = batch_counts > 0
+        counts[seen] += batch_counts[seen]
+        learning_rates = batch_counts[seen] / counts[seen]
+        centers[seen] += learning_rates[:, None] * (batch_sums[seen] / batch_counts[seen, None] - centers[seen])
+
+    return centers
+
+
+def _resistor_palette_of(pixels: np.ndarray, to: int, rng: np.random.Generator, **_) -> np.ndarray:
+    # The fixed palette of resistor reference colors, reduced to the `to` colors used the most by the pixels.
+    palette = ResistorColorFinder.reference_palette()
+    if to > len(palette):
+        raise ValueError(f"There are only {len(palette)} resistor reference colors, which is fewer than {to}.")
+
+    sample = _sample_pixels_of(pixels, 100_000, rng)
+
+    usage = np.bincount(assign_to_palette(sample, palette), minlength=len(palette))
+
+    # Stable sort, so ties are broken by color value and the result is deterministic.
+    return palette[np.sort(np.argsort(-usage, kind="stable")[:to])]
+
+
+QUANTIZERS: Final[dict[str, Callable[..., np.ndarray]]] = {
+    "sample": _kmeans_palette_of,
+    "minibatch": _minibatch_kmeans_palette_of,
+    "resistor": _resistor_palette_of,
+}
+
+
+def _fingerprint_of(img: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(img).data, digest_size=16).hexdigest()
+
+
+def palette_of(img: np.ndarray, /, *, to: int, method: str = "sample", seed: int = 0, **options) -> np.ndarray:
+    """
+    Find a palette of `to` colors for the image, with one of the `QUANTIZERS`.
+
+    The palettes are cached by the content of the image and the arguments,
+    so asking for the palette of the same image again costs one hash of it.
+
+    Args:
+        img: image of shape (..., 3).
+        to: number of colors of the palette.
+        method: one of:
+            "sample", k-means fitted on a random subsample of the pixels.
+            "minibatch", mini-batch k-means over random batches of the pixels.
+            "resistor", the `to` most used reference colors of `ResistorColorFinder`, of which there are 12.
+        seed: seed of the random sampling, the same seed always gives the same palette.
+        options: extra arguments of the quantizer, e.g. `sample_size`, `batch_size`, `iterations`.
+
+    Returns:
+        the palette as an uint8 array of shape (to, 3).
+    """
+    if method not in QUANTIZERS:
+        raise ValueError(f"Unknown quantization method {method}, which should be one of {tuple(QUANTIZERS)}.")
+
+    key = (_fingerprint_of(img), img.shape, img.dtype.str, to, method, seed, tuple(sorted(options.items())))
+
+    if (palette := _palette_cache.get(key)) is not None:
+        _palette_cache.move_to_end(key)
+        return palette
+
+    pixels = img.reshape((-1, 3))
+    palette = np.clip(
+        QUANTIZERS[method](pixels, to, np.random.default_rng(seed), **options), 0, 255
+    ).astype(np.uint8)
+    palette.flags.writeable = False
+
+    _palette_cache[key] = palette
+    if len(_palette_cache) > _PALETTE_CACHE_SIZE:
+        _palette_cache.popitem(last=False)
+
+    return palette
+
+
+def clear_palette_cache() -> None:
+    _palette_cache.clear()
+
+
+def quantize_with(img: np.ndarray, palette: np.ndarray, /) -> np.ndarray:
+    """
+    Replace every pixel of the image with its nearest palette color.
+    """
+    return palette[assign_to_palette(img.reshape((-1, 3)), palette)].reshape(img.shape)
+
+
+def mean_color_error_of(img: np.ndarray, reduced_img: np.ndarray, /) -> float:
+    """
+    The mean euclidean distance between the colors of the image and its reduced version.
+    """
+    diff = img.reshape((-1, 3)).astype(np.float32) - reduced_img.reshape((-1, 3)).astype(np.float32)
+
+    return float(np.sqrt((diff ** 2).sum(axis=1)).mean())
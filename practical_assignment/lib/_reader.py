@@ -0,0 +1,195 @@
+import os
+import time
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+from ._batch import _img_store_of, pool_context
+from ._box import rotate_image
+from ._calculations import (
+    central_line_of,
+    crop_img_to_fixed_size,
+    find_centroid_from,
+    find_color_bands_in,
+    vertical_color_distribution_of,
+)
+from ._color import ResistorColor, ResistorColorFinder
+from ._component_set import find_component_set_in
+from ._resistor_value import calculate_resistor_value
+
+
+class ReaderSettings(NamedTuple):
+    # Same as the arguments of `find_single_components_in`,
+    # the minimum size is large enough to skip the bits of wire which are cut off from their resistor.
+    bg_threshold: int = 245
+    min_size: int = 5000
+
+    # Size of the strip cut out along the body of the straightened resistor, see `crop_img_to_fixed_size`.
+    crop_width: int = 10
+    crop_height: int = 300
+
+    # Same as the arguments of `find_color_bands_in`.
+    window: int = 5
+    edge_threshold: float = 12.0
+    min_band_height: int = 3
+    body_tolerance: float = 20.0
+
+
+class ResistorReading(NamedTuple):
+    # The inclusive (left, top, right, bottom) box of the resistor in the image.
+    bbox: tuple[int, int, int, int]
+
+    # The (start, stop) rows of the bands in the strip, and their colors, from top to bottom.
+    bands: list[tuple[int, int]]
+    colors: list[ResistorColor]
+
+    # The value `calculate_resistor_value` reads from the colors, None when they can't be decoded.
+    value: str | None
+
+
+class ImageReadings(NamedTuple):
+    # The index of the image in the given paths.
+    index: int
+    path: str
+
+    readings: list[ResistorReading]
+
+    # Wall time the worker spent on the image, including loading it.
+    seconds: float
+
+
+# The reader of the worker process, sent once when the worker starts.
+_worker_reader: "ResistorReader | None" = None
+
+
+def _start_worker(reader: "ResistorReader") -> None:
+    global _worker_reader
+    _worker_reader = reader
+
+
+def _read_image_at(task: tuple[int, str, str | None]) -> ImageReadings:
+    index, path, img_cache_dir = task
+    start = time.perf_counter()
+
+    img = _img_store_of(img_cache_dir).load(path, channel_mode="BGR")
+    readings = _worker_reader.read(img)
+
+    return ImageReadings(index, path, readings, time.perf_counter() - start)
+
+
+class ResistorReader:
+    """
+    Read the values of the resistors in an image, from finding them to decoding their bands.
+
+    It chains `find_single_components_in`, `central_line_of`, `rotate_image`, `crop_img_to_fixed_size`,
+    `vertical_color_distribution_of`, `find_color_bands_in` and `calculate_resistor_value`,
+    with the settings fixed once and the color lookup table built up front instead of on the first band.
+
+    e.g.
+        reader = ResistorReader()
+        for resistor in reader.read(db.get_img_located_at("RESISTORS/RESISTORS-1.png", channel_mode="BGR")):
+            print(resistor.bbox, resistor.value)
+    """
+
+    def __init__(self, settings: ReaderSettings = ReaderSettings(), /):
+        self.__settings = settings
+        self.__images_per_second = 0.0
+
+        # Build the shared lookup table of the band colors now, so no read pays for it.
+        ResistorColorFinder.lut()
+
+    def __getstate__(self) -> ReaderSettings:
+        return self.__settings
+
+    def __setstate__(self, settings: ReaderSettings) -> None:
+        self.__init__(settings)
+
+    @property
+    def settings(self) -> ReaderSettings:
+        return self.__settings
+
+    @property
+    def images_per_second(self) -> float:
+        """
+        The throughput of the latest `read_many`, updated as its results arrive.
+        """
+        return self.__images_per_second
+
+    def read_component(
+            self, component: np.ndarray, component_binary: np.ndarray, /
+    ) -> tuple[list[tuple[int, int]], list[ResistorColor]]:
+        """
+        The bands of a single resistor, given its RGB crop and binary mask from `find_single_components_in`.
+        """
+        settings = self.__settings
+
+        # Straighten the resistor around its centroid, then cut a strip along its body.
+        rotated = rotate_image(component, central_line_of(component_binary), find_centroid_from(component_binary))
+        strip = crop_img_to_fixed_size(rotated, settings.crop_width, settings.crop_height)
+
+        if strip.size == 0:
+            return [], []
+
+        return find_color_bands_in(
+            vertical_color_distribution_of(strip),
+            window=settings.window,
+            edge_threshold=settings.edge_threshold,
+            min_band_height=settings.min_band_height,
+            body_tolerance=settings.body_tolerance,
+        )
+
+    def read(self, img: np.ndarray, /) -> list[ResistorReading]:
+        """
+        Read every resistor of a BGR image.
+        """
+        settings = self.__settings
+
+        # Same components as `find_single_components_in`, keeping where each one is.
+        readings = []
+        for component in find_component_set_in(img, settings.bg_threshold, settings.min_size):
+            bands, colors = self.read_component(component.crop, component.mask)
+
+            try:
+                value = calculate_resistor_value(colors)
+            except ValueError:
+                value = None
+
+            readings.append(ResistorReading(component.bbox, bands, colors, value))
+
+        return readings
+
+    def read_many(
+            self,
+            paths: Sequence[str],
+            /,
+            *,
+            processes: int | None = None,
+            img_cache_dir: str | None = None,
+    ) -> Iterator[ImageReadings]:
+        """
+        Read the resistors of many images in a pool of worker processes.
+
+        The workers load the images themselves, and results are yielded as soon as each image is done,
+        so they are not in the order of `paths`, use `ImageReadings.index` to tell them apart.
+        `images_per_second` is updated with every result.
+
+        Args:
+            paths: paths of the images.
+            processes: number of worker processes, defaults to the number of cores, and never more than the images.
+            img_cache_dir: directory of the on-disk tier of `_ImageStore`, e.g. `f"{db.cache_dir}/images"`,
+                to skip decoding images which have been decoded before.
+        """
+        if not paths:
+            return
+
+        processes = min(processes or os.cpu_count() or 1, len(paths))
+        tasks = [(index, path, img_cache_dir) for index, path in enumerate(paths)]
+
+        start = time.perf_counter()
+        self.__images_per_second = 0.0
+
+        with pool_context().Pool(processes=processes, initializer=_start_worker, initargs=(self,)) as pool:
+            for done, result in enumerate(pool.imap_unordered(_read_image_at, tasks), start=1):
+                self.__images_per_second = done / (time.perf_counter() - start)
+                yield result
@@ -1,62 +1,136 @@
+import functools
 from collections.abc import Sequence
+from typing import Final, NamedTuple
+
+import numpy as np
 
 from ._color import ResistorColor
 
+# The tables are indexed by `ResistorColor.value`.
+
+# Power of ten of the multiplier band.
+_MULTIPLIER_EXPONENTS: Final[np.ndarray] = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, -1, -2, 12])
+
+# Tolerance band in percent, colors without a tolerance mean 20%, as a missing band does.
+_TOLERANCES: Final[tuple[float, ...]] = (20, 1, 2, 20, 20, 0.5, 0.25, 0.1, 0.05, 20, 5, 10, 20)
+
+# Temperature coefficient band in ppm/K.
+_TEMPERATURE_COEFFICIENTS: Final[tuple[int, ...]] = (250, 100, 50, 15, 25, 20, 10, 5, 0, 0, 0, 0, 0)
+
+_TOLERANCE_TABLE: Final[np.ndarray] = np.array(_TOLERANCES, dtype=np.float64)
+_TEMPERATURE_COEFFICIENT_TABLE: Final[np.ndarray] = np.array(_TEMPERATURE_COEFFICIENTS, dtype=np.int32)
+
+# Which bands are the significant digits, the multiplier, the tolerance and the temperature coefficient,
+# for each number of bands. None is a band the resistor does not have.
+_BAND_LAYOUTS: Final[dict[int, tuple[slice, int, int | None, int | None]]] = {
+    3: (slice(0, 2), 2, None, None),
+    4: (slice(0, 2), 2, 3, None),
+    5: (slice(0, 3), 3, 4, None),
+    6: (slice(0, 3), 3, 4, 5),
+}
+
+RESISTOR_VALUE_DTYPE: Final[np.dtype] = np.dtype([
+    ("ohms", np.float64),
+    ("tolerance", np.float64),
+    ("ppm", np.int32),
+])
+
+_E6: Final[tuple[float, ...]] = (1.0, 1.5, 2.2, 3.3, 4.7, 6.8)
+_E12: Final[tuple[float, ...]] = (1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2)
+_E24: Final[tuple[float, ...]] = (
+    1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+    3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1,
+)
+
+
+def _e_series_of_size(size: int) -> tuple[float, ...]:
+    # The E48, E96 and E192 values are the 3 digits roundings of the geometric series,
+    # except 9.20 of E192, which the series would round to 9.19.
+    values = [round(10 ** (i / size), 2) for i in range(size)]
+
+    return tuple(9.2 if size == 192 and value == 9.19 else value for value in values)
+
+
+E_SERIES: Final[dict[str, tuple[float, ...]]] = {
+    "E6": _E6,
+    "E12": _E12,
+    "E24": _E24,
+    "E48": _e_series_of_size(48),
+    "E96": _e_series_of_size(96),
+    "E192": _e_series_of_size(192),
+}
 
-def __get_multiplier(color: ResistorColor) -> float:
-    if color == ResistorColor.GOLD:
-        return 0.1
-    elif color == ResistorColor.SILVER:
-        return 0.01
+
+def e_series_of_tolerance(tolerance: float, /) -> str:
+    """
+    The E series the resistors of a tolerance in percent are made in.
+    """
+    if tolerance >= 20:
+        return "E6"
+    elif tolerance >= 10:
+        return "E12"
+    elif tolerance >= 5:
+        return "E24"
+    elif tolerance >= 2:
+        return "E48"
+    elif tolerance >= 1:
+        return "E96"
     else:
-        return 10 ** color.value
-
-
-def __get_tolerance(color: ResistorColor) -> float:
-    match color:
-        case ResistorColor.BROWN:
-            return 1
-        case ResistorColor.RED:
-            return 2
-        case ResistorColor.GREEN:
-            return 0.5
-        case ResistorColor.BLUE:
-            return 0.25
-        case ResistorColor.VIOLET:
-            return 0.1
-        case ResistorColor.GRAY:
-            return 0.05
-        case ResistorColor.GOLD:
-            return 5
-        case ResistorColor.SILVER:
-            return 10
-        case _:
-            return 20
-
-
-def __get_temperature_coefficient(color: ResistorColor) -> float:
-    match color:
-        case ResistorColor.BLACK:
-            return 250
-        case ResistorColor.BROWN:
-            return 100
-        case ResistorColor.RED:
-            return 50
-        case ResistorColor.ORANGE:
-            return 15
-        case ResistorColor.YELLOW:
-            return 25
-        case ResistorColor.GREEN:
-            return 20
-        case ResistorColor.BLUE:
-            return 10
-        case ResistorColor.VIOLET:
-            return 5
-        case _:
-            return 0
+        return "E192"
 
 
-def calculate_resistor_value(colors: Sequence[ResistorColor]) -> str:
+def snap_to_e_series(ohms: float, /, *, series: str = "E24") -> float:
+    """
+    The closest value of an E series to `ohms`, closest by ratio, as the series are geometric.
+    """
+    if ohms <= 0:
+        raise ValueError(f"ohms must be positive, which is {ohms}.")
+    if series not in E_SERIES:
+        raise ValueError(f"series must be one of {', '.join(E_SERIES)}, which is {series}.")
+
+    exponent = int(np.floor(np.log10(ohms)))
+    mantissa = ohms / 10 ** exponent
+
+    # The first value of the next decade is a candidate too.
+    candidates = np.array((*E_SERIES[series], 10.0))
+    closest = candidates[np.argmin(np.abs(np.log(candidates / mantissa)))]
+
+    return float(round(closest * 10 ** exponent, max(2 - exponent, 0)))
+
+
+class ResistorValue(NamedTuple):
+    # The significant digits and the power of ten of the multiplier, ohms is `digits * 10 ** exponent`.
+    digits: int
+    exponent: int
+
+    # Tolerance in percent.
+    tolerance: float
+
+    # Temperature coefficient in ppm/K, 0 when the resistor does not have the band.
+    ppm: int
+
+    @property
+    def ohms(self) -> float:
+        # Dividing by a power of ten is exact to the nearest float, multiplying by 0.1 is not.
+        return self.digits * 10.0 ** self.exponent if self.exponent >= 0 else self.digits / 10 ** -self.exponent
+
+    @property
+    def e_series(self) -> str:
+        return e_series_of_tolerance(self.tolerance)
+
+    def snapped(self, series: str | None = None) -> float:
+        """
+        The closest standard value, in the given E series, or in the one of the tolerance by default.
+        """
+        return snap_to_e_series(self.ohms, series=series or self.e_series)
+
+    def __str__(self) -> str:
+        ohms = self.digits * 10 ** self.exponent if self.exponent >= 0 else self.ohms
+
+        return f"{ohms} ±{self.tolerance:g}% {self.ppm}ppm/K"
+
+
+def _ordered(colors: Sequence[ResistorColor]) -> Sequence[ResistorColor]:
     band_number = len(colors)
 
     if band_number < 3:
@@ -64,51 +138,95 @@ def calculate_resistor_value(colors: Sequence[ResistorColor]) -> str:
     elif band_number > 6:
         raise ValueError("The resistor should have at most 6 bands.")
 
-    ordered_colors = list(colors)
-
     # Check the order of the bands.
     if colors[0] == ResistorColor.GOLD or colors[1] == ResistorColor.GOLD:
-        ordered_colors = colors[::-1]
-
-    significant_digits = 0
-    multiplier = 0
-    tolerance = 0
-    temperature_coefficient = 0
-
-    match band_number:
-        case 3:
-            significant_digits = int(
-                f"{ordered_colors[0].value}"
-                f"{ordered_colors[1].value}"
-            )
-            multiplier = __get_multiplier(ordered_colors[2])
-            tolerance = __get_tolerance(ResistorColor.NONE)
-            temperature_coefficient = 0
-        case 4:
-            significant_digits = int(
-                f"{ordered_colors[0].value}"
-                f"{ordered_colors[1].value}"
-            )
-            multiplier = __get_multiplier(ordered_colors[2])
-            tolerance = __get_tolerance(ordered_colors[3])
-            temperature_coefficient = 0
-        case 5:
-            significant_digits = int(
-                f"{ordered_colors[0].value}"
-                f"{ordered_colors[1].value}"
-                f"{ordered_colors[2].value}"
-            )
-            multiplier = __get_multiplier(ordered_colors[3])
-            tolerance = __get_tolerance(ordered_colors[4])
-            temperature_coefficient = 0
-        case 6:
-            significant_digits = int(
-                f"{ordered_colors[0].value}"
-                f"{ordered_colors[1].value}"
-                f"{ordered_colors[2].value}"
-            )
-            multiplier = __get_multiplier(ordered_colors[3])
-            tolerance = __get_tolerance(ordered_colors[4])
-            temperature_coefficient = __get_temperature_coefficient(ordered_colors[5])
-
-    return f"{significant_digits * multiplier} ±{tolerance}% {temperature_coefficient}ppm/K"
+        return colors[::-1]
+
+    return colors
+
+
+@functools.lru_cache(maxsize=4096)
+def _resistor_value_of(colors: tuple[ResistorColor, ...]) -> ResistorValue:
+    ordered_colors = _ordered(colors)
+    digit_bands, multiplier_band, tolerance_band, temperature_coefficient_band = _BAND_LAYOUTS[len(colors)]
+
+    digits = 0
+    for color in ordered_colors[digit_bands]:
+        if color.value > 9:
+            raise ValueError(f"{color.name} can not be a significant digit.")
+        digits = digits * 10 + color.value
+
+    tolerance_color = ResistorColor.NONE if tolerance_band is None else ordered_colors[tolerance_band]
+    ppm = 0 if temperature_coefficient_band is None else _TEMPERATURE_COEFFICIENTS[
+        ordered_colors[temperature_coefficient_band].value
+    ]
+
+    return ResistorValue(
+        digits=digits,
+        exponent=int(_MULTIPLIER_EXPONENTS[ordered_colors[multiplier_band].value]),
+        tolerance=_TOLERANCES[tolerance_color.value],
+        ppm=ppm,
+    )
+
+
+def resistor_value_of(colors: Sequence[ResistorColor], /) -> ResistorValue:
+    """
+    Decode the bands of a resistor, from 3 to 6 of them, in either direction.
+
+    Decoded band tuples are cached, since a batch of resistors only has a handful of distinct values.
+
+    Raises:
+        ValueError: when there are too few or too many bands, or a significant digit band is not a digit.
+    """
+    return _resistor_value_of(tuple(colors))
+
+
+def calculate_resistor_value(colors: Sequence[ResistorColor]) -> str:
+    """
+    The value of a resistor, formatted as "ohms ±tolerance% ppm/K", see `resistor_value_of`.
+    """
+    return str(resistor_value_of(colors))
+
+
+def resistor_values_of(codes: np.ndarray, /) -> np.ndarray:
+    """
+    The vectorized `resistor_value_of`, for many resistors with the same number of bands.
+
+    Args:
+        codes: integer array of shape (N, bands) of `ResistorColor` values,
+            e.g. from `ResistorColorFinder.from_rgb_array`.
+
+    Returns:
+        structured array of shape (N,) with `RESISTOR_VALUE_DTYPE`,
+        where the ohms of the resistors with a non-digit significant band are nan.
+    """
+    codes = np.asarray(codes)
+    if codes.ndim != 2 or codes.shape[1] not in _BAND_LAYOUTS:
+        raise ValueError(f"codes must be an array of shape (N, 3 to 6 bands), which has shape {codes.shape}.")
+
+    # Reverse the rows read from the tolerance end.
+    is_reversed = (codes[:, 0] == ResistorColor.GOLD.value) | (codes[:, 1] == ResistorColor.GOLD.value)
+    ordered_codes = np.where(is_reversed[:, None], codes[:, ::-1], codes)
+
+    digit_bands, multiplier_band, tolerance_band, temperature_coefficient_band = _BAND_LAYOUTS[codes.shape[1]]
+    digit_codes = ordered_codes[:, digit_bands]
+    digit_count = digit_codes.shape[1]
+
+    digits = digit_codes @ (10 ** np.arange(digit_count - 1, -1, -1))
+    exponents = _MULTIPLIER_EXPONENTS[ordered_codes[:, multiplier_band]]
+
+    values = np.empty(len(codes), dtype=RESISTOR_VALUE_DTYPE)
+    values["ohms"] = np.where(
+        exponents >= 0, digits * 10.0 ** np.maximum(exponents, 0), digits / 10.0 ** np.maximum(-exponents, 0)
+    )
+    values["ohms"][(digit_codes > 9).any(axis=1)] = np.nan
+    values["tolerance"] = (
+        _TOLERANCE_TABLE[ResistorColor.NONE.value] if tolerance_band is None
+        else _TOLERANCE_TABLE[ordered_codes[:, tolerance_band]]
+    )
+    values["ppm"] = (
+        0 if temperature_coefficient_band is None
+        else _TEMPERATURE_COEFFICIENT_TABLE[ordered_codes[:, temperature_coefficient_band]]
+    )
+
+    return values
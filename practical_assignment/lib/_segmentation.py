@@ -0,0 +1,181 @@
+import functools
+from fractions import Fraction
+from typing import Final, NamedTuple
+
+import cv2
+import numpy as np
+
+# Number of pixels classified at once, which bounds the temporary indices into the LUT.
+_LUT_BLOCK_SIZE: Final[int] = 1 << 20
+
+
+class GreenRatios(NamedTuple):
+    """
+    The channel ratios of a green board pixel, found by the ratio histograms of part-3.
+
+    A pixel is green when `g / r > g_over_r`, `g / b > g_over_b` and `r / b < r_over_b`.
+    """
+    g_over_r: float = 1.02
+    g_over_b: float = 1.02
+    r_over_b: float = 0.88
+
+
+class GreenBoard(NamedTuple):
+    # 1 for the green pixels, 0 otherwise.
+    mask: np.ndarray
+
+    # The inclusive (left, top, right, bottom) box of the largest green region, None if nothing is green.
+    bbox: tuple[int, int, int, int] | None
+
+
+def _greater_ratio_table_of(ratio: float) -> np.ndarray:
+    # table[x, y] is whether `x / y > ratio`, in exact integer arithmetic: `x * denominator > numerator * y`.
+    # It agrees with the float division of part-3, including `x / 0`, which is inf for x > 0 and nan for x = 0.
+    fraction = Fraction(str(ratio))
+    values = np.arange(256, dtype=np.int64)
+
+    return values[:, None] * fraction.denominator > fraction.numerator * values[None, :]
+
+
+@functools.lru_cache(maxsize=8)
+def _green_lut_of(ratios: GreenRatios) -> np.ndarray:
+    # A 256x256x256 bool table indexed by [r, g, b], built from three 256x256 tables by broadcasting.
+    g_over_r = _greater_ratio_table_of(ratios.g_over_r).T
+    g_over_b = _greater_ratio_table_of(ratios.g_over_b)
+    # `r / b < ratio` is `b * ratio > r`, and is false when both are 0, as the nan of the float division.
+    r_over_b = _greater_ratio_table_of(1 / Fraction(str(ratios.r_over_b))).T
+
+    lut = g_over_r[:, :, None] & g_over_b[None, :, :] & r_over_b[:, None, :]
+    lut.flags.writeable = False
+
+    return lut.view(np.uint8)
+
+
+def classify_green_pixels_of(
+        pixels: np.ndarray,
+        /,
+        *,
+        ratios: GreenRatios = GreenRatios(),
+        channel_order: str = "RGB",
+        out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Whether each pixel is green, in one pass through a precomputed LUT, without any float temporaries.
+
+    Args:
+        pixels: uint8 array of shape (..., 3).
+        ratios: the ratios of a green pixel.
+        channel_order: "RGB" or "BGR", the channel order of `pixels`.
+        out: uint8 array of shape (...) to write to.
+
+    Returns:
+        uint8 array of shape (...), 1 for green pixels and 0 otherwise.
+    """
+    if pixels.dtype != np.uint8 or pixels.shape[-1:] != (3,):
+        raise ValueError(f"pixels must be a uint8 array of shape (..., 3), which is {pixels.dtype} of {pixels.shape}.")
+    if channel_order not in ("RGB", "BGR"):
+        raise ValueError(f"channel_order must be RGB or BGR, which is {channel_order}.")
+
+    red, blue = (0, 2) if channel_order == "RGB" else (2, 0)
+
+    lut = _green_lut_of(ratios).reshape(-1)
+    if out is None:
+        out = np.empty(pixels.shape[:-1], dtype=np.uint8)
+
+    flat_pixels = pixels.reshape(-1, 3)
+    flat_out = out.reshape(-1)
+    indices = np.empty(min(_LUT_BLOCK_SIZE, len(flat_pixels)), dtype=np.uint32)
+
+    for start in range(0, len(flat_pixels), _LUT_BLOCK_SIZE):
+        block = flat_pixels[start:start + _LUT_BLOCK_SIZE]
+        block_indices = indices[:len(block)]
+
+        # (r << 16) | (g << 8) | b
+        np.left_shift(block[:, red], 16, out=block_indices, dtype=np.uint32)
+        block_indices |= block[:, 1].astype(np.uint32) << 8
+        block_indices |= block[:, blue]
+
+        np.take(lut, block_indices, out=flat_out[start:start + len(block)])
+
+    return out
+
+
+def _largest_region_bbox_of(mask: np.ndarray) -> tuple[int, int, int, int] | None:
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if count <= 1:
+        return None
+
+    largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    left, top, width, height = stats[largest, :4]
+
+    return int(left), int(top), int(left + width - 1), int(top + height - 1)
+
+
+def find_green_board_in(
+        img: np.ndarray,
+        /,
+        *,
+        ratios: GreenRatios = GreenRatios(),
+        channel_order: str = "RGB",
+        pyramid_levels: int = 0,
+) -> GreenBoard:
+    """
+    Find the green pixels of a board by the channel ratios of part-3, and the box of the board.
+
+    With `pyramid_levels`, the image is classified `2 ** pyramid_levels` times smaller first,
+    and only the pixels along the boundaries of that coarse mask are classified again at full size,
+    the others take the class of their coarse pixel.
+    Details smaller than a coarse pixel which don't show up in the coarse mask are lost,
+    in exchange for classifying a small fraction of the pixels.
+    The box is then found in the coarse mask too, so it's only as precise as a coarse pixel.
+
+    Args:
+        img: uint8 image of shape (H, W, 3).
+        ratios: the ratios of a green pixel.
+        channel_order: "RGB" or "BGR", the channel order of `img`.
+        pyramid_levels: number of `cv2.pyrDown` levels of the coarse mask, 0 classifies every pixel.
+
+    Returns:
+        the mask of the green pixels, and the box of the largest green region.
+    """
+    if img.ndim != 3 or img.shape[2] != 3:
+        raise ValueError(f"image must be a 3-channel image, which has shape {img.shape}.")
+
+    if pyramid_levels <= 0:
+        mask = classify_green_pixels_of(img, ratios=ratios, channel_order=channel_order)
+        return GreenBoard(mask, _largest_region_bbox_of(mask))
+
+    coarse = np.ascontiguousarray(img)
+    for _ in range(pyramid_levels):
+        coarse = cv2.pyrDown(coarse)
+
+    coarse_mask = classify_green_pixels_of(coarse, ratios=ratios, channel_order=channel_order)
+
+    # The coarse pixels next to a pixel of the other class.
+    kernel = np.ones((3, 3), np.uint8)
+    coarse_boundary = cv2.morphologyEx(coarse_mask, cv2.MORPH_GRADIENT, kernel)
+
+    size = (img.shape[1], img.shape[0])
+    mask = cv2.resize(coarse_mask, size, interpolation=cv2.INTER_NEAREST)
+    boundary = np.flatnonzero(cv2.resize(coarse_boundary, size, interpolation=cv2.INTER_NEAREST))
+
+    # Refine the boundary with the full size pixels.
+    mask.reshape(-1)[boundary] = classify_green_pixels_of(
+        img.reshape(-1, 3)[boundary], ratios=ratios, channel_order=channel_order
+    )
+
+    coarse_bbox = _largest_region_bbox_of(coarse_mask)
+    if coarse_bbox is None:
+        return GreenBoard(mask, None)
+
+    # Every coarse pixel covers `scale` x `scale` pixels, except at the right and bottom edges.
+    scale = 2 ** pyramid_levels
+    left, top, right, bottom = coarse_bbox
+    bbox = (
+        left * scale,
+        top * scale,
+        min(right * scale + scale - 1, img.shape[1] - 1),
+        min(bottom * scale + scale - 1, img.shape[0] - 1),
+    )
+
+    return GreenBoard(mask, bbox)
@@ -0,0 +1,221 @@
+from collections.abc import Iterator
+
+import cv2
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from ._components import separate_components_of
+
+
+def tiles_of(
+        shape: tuple[int, ...], /, *, tile_size: int, halo: int = 0
+) -> Iterator[tuple[tuple[slice, slice], tuple[slice, slice], tuple[slice, slice]]]:
+    """
+    Split an image of the given shape into tiles of at most `tile_size` x `tile_size` pixels, in raster order.
+
+    Yields:
+        for each tile, three (rows, cols) slices:
+            the tile in the image,
+            the tile grown by `halo` pixels on every side (clipped to the image),
+            the tile within the grown tile.
+    """
+    height, width = shape[:2]
+
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            bottom, right = min(top + tile_size, height), min(left + tile_size, width)
+            outer_top, outer_left = max(top - halo, 0), max(left - halo, 0)
+            outer_bottom, outer_right = min(bottom + halo, height), min(right + halo, width)
+
+            yield (
+                (slice(top, bottom), slice(left, right)),
+                (slice(outer_top, outer_bottom), slice(outer_left, outer_right)),
+                (slice(top - outer_top, bottom - outer_top), slice(left - outer_left, right - outer_left)),
+            )
+
+
+def threshold_in_tiles(
+        img: np.ndarray, /, *, bg_threshold: int = 245, tile_size: int = 1024, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    The tiled version of the thresholding of `find_single_components_in`,
+    pixels darker than `bg_threshold` are 1 and the others are 0.
+
+    Args:
+        img: BGR or grayscale image, it can be memory-mapped.
+        out: uint8 array of the image's height and width to write to, it can be memory-mapped.
+    """
+    if out is None:
+        out = np.empty(img.shape[:2], dtype=np.uint8)
+
+    for tile, _, _ in tiles_of(img.shape, tile_size=tile_size):
+        img_tile = img[tile]
+        gray_tile = cv2.cvtColor(img_tile, cv2.COLOR_BGR2GRAY) if img_tile.ndim == 3 else img_tile
+        np.less(gray_tile, bg_threshold, out=out[tile].view(np.bool_))
+
+    return out
+
+
+def _seam_pairs_of(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    # The pairs of provisional labels which touch across a seam, including diagonally,
+    # `before` and `after` are the two lines of pixels on both sides of the seam.
+    pairs = [
+        np.stack((before, after)),
+        np.stack((before[1:], after[:-1])),
+        np.stack((before[:-1], after[1:])),
+    ]
+    pairs = np.concatenate(pairs, axis=1)
+
+    return pairs[:, (pairs[0] != 0) & (pairs[1] != 0)]
+
+
+def label_in_tiles(
+        binary: np.ndarray, /, *, tile_size: int = 1024, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Label the connected components (8-connected) of a binary image tile by tile,
+    with the same labels as `measure.label(binary, background=0)` on the whole image.
+
+    Each tile is labeled on its own, then the labels touching across tile seams are merged,
+    and the merged components are numbered in the raster order of their first pixel, as `measure.label` does.
+    Apart from the output, memory is bounded by the tile size and the number of components.
+
+    Args:
+        binary: 2D image, non-zero pixels are foreground, it can be memory-mapped.
+        out: int32 array of the image's shape to write to, it can be memory-mapped.
+
+    Returns:
+        the int32 labeled image, 0 is the background.
+    """
+    if binary.ndim != 2:
+        raise ValueError(f"image must be a 2D numpy array, which has {binary.ndim} dimensions.")
+
+    # skimage is slow to import, and only needed once something is labeled.
+    from skimage import measure
+
+    height, width = binary.shape
+    if out is None:
+        out = np.empty(binary.shape, dtype=np.int32)
+
+    # Label each tile with provisional labels, which are unique over the whole image,
+    # and remember the raster index of the first pixel of each provisional label.
+    first_pixels_of_tiles = []
+    provisional_count = 0
+
+    for tile, _, _ in tiles_of(binary.shape, tile_size=tile_size):
+        rows, cols = tile
+        local_labels = measure.label(binary[tile], background=0)
+
+        labels, first_indices = np.unique(local_labels.ravel(), return_index=True)
+        first_indices = first_indices[labels != 0]
+        first_ys, first_xs = np.divmod(first_indices, cols.stop - cols.start)
+        first_pixels_of_tiles.append((first_ys + rows.start) * width + first_xs + cols.start)
+
+        out[tile] = np.where(local_labels != 0, local_labels + provisional_count, 0)
+        provisional_count += len(first_indices)
+
+    first_pixels = np.concatenate([np.zeros(1, dtype=np.int64), *first_pixels_of_tiles])
+
+    # Find the provisional labels which touch across the seams between tiles.
+    pairs = [np.empty((2, 0), dtype=out.dtype)]
+    for seam_x in range(tile_size, width, tile_size):
+        pairs.append(_seam_pairs_of(out[:, seam_x - 1], out[:, seam_x]))
+    for seam_y in range(tile_size, height, tile_size):
+        pairs.append(_seam_pairs_of(out[seam_y - 1, :], out[seam_y, :]))
+    pairs = np.concatenate(pairs, axis=1)
+
+    # Merge them, the background (0) is a component of its own since it never touches anything.
+    graph = coo_matrix(
+        (np.ones(pairs.shape[1], dtype=np.int8), (pairs[0], pairs[1])),
+        shape=(provisional_count + 1, provisional_count + 1),
+    )
+    _, merged = connected_components(graph, directed=False)
+
+    # Number the merged components by their first pixel.
+    merged_first_pixels = np.full(merged.max() + 1, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(merged_first_pixels, merged, first_pixels)
+    final_of_merged = np.empty_like(merged)
+    final_of_merged[np.argsort(merged_first_pixels, kind="stable")] = np.arange(len(merged_first_pixels))
+
+    final_labels = final_of_merged[merged].astype(out.dtype)
+    for tile, _, _ in tiles_of(binary.shape, tile_size=tile_size):
+        out[tile] = final_labels[out[tile]]
+
+    return out
+
+
+def find_single_components_in_tiles(
+        img: np.ndarray, bg_threshold: int = 245, min_size: int = 100, *, tile_size: int = 1024
+) -> [np.ndarray, ...]:
+    """
+    The tiled version of `find_single_components_in`, with exactly the same results.
+    """
+    labeled_component_set = label_in_tiles(
+        threshold_in_tiles(img, bg_threshold=bg_threshold, tile_size=tile_size), tile_size=tile_size
+    )
+
+    return separate_components_of(img, labeled_component_set, min_size=min_size)
+
+
+def remove_shadow_in_tiles(
+        img: np.ndarray,
+        /,
+        *,
+        dilate_size: int = 7,
+        blur_size: int = 21,
+        tile_size: int = 1024,
+        halo: int | None = None,
+        out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    The tiled version of `remove_shadow_from`, with exactly the same results.
+
+    Every tile is processed with a halo around it, which must cover the reach of the dilation and the median blur.
+    The min-max normalization needs the extremes of the whole image,
+    so the differences are written to `out` first, and normalized in place in a second pass.
+
+    Args:
+        img: image of shape (H, W, C), or (H, W) for a single plane, it can be memory-mapped.
+        halo: size of the halo, defaults to the smallest one giving exact results.
+        out: uint8 array of the image's shape to write to, it can be memory-mapped.
+    """
+    least_halo = dilate_size // 2 + blur_size // 2
+    if halo is None:
+        halo = least_halo
+    elif halo < least_halo:
+        raise ValueError(f"The halo should be at least {least_halo} pixels for the given sizes.")
+
+    if out is None:
+        out = np.empty(img.shape, dtype=np.uint8)
+
+    # A single plane is a single channel, as `remove_shadow_from` takes it, through views of both arrays.
+    result = out
+    if img.ndim == 2:
+        img, out = img[..., np.newaxis], out[..., np.newaxis]
+
+    kernel = np.ones((dilate_size, dilate_size), np.uint8)
+    channels = img.shape[2]
+    lowest = np.full(channels, 255)
+    highest = np.zeros(channels, dtype=int)
+
+    for tile, outer, inner in tiles_of(img.shape, tile_size=tile_size, halo=halo):
+        for channel in range(channels):
+            plane = np.ascontiguousarray(img[outer][..., channel])
+            bg_img = cv2.medianBlur(cv2.dilate(plane, kernel), blur_size)
+            diff_img = 255 - cv2.absdiff(plane, bg_img)[inner]
+
+            out[tile][..., channel] = diff_img
+            lowest[channel] = min(lowest[channel], diff_img.min())
+            highest[channel] = max(highest[channel], diff_img.max())
+
+    # Same scale and shift `cv2.normalize` uses for NORM_MINMAX.
+    scales = np.where(highest > lowest, 255.0 / np.maximum(highest - lowest, 1), 0.0)
+    shifts = -lowest * scales
+
+    for tile, _, _ in tiles_of(img.shape, tile_size=tile_size):
+        for channel in range(channels):
+            out_plane = np.ascontiguousarray(out[tile][..., channel])
+            out[tile][..., channel] = cv2.convertScaleAbs(out_plane, alpha=scales[channel], beta=shifts[channel])
+
+    return result
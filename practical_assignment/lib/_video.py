@@ -0,0 +1,344 @@
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any, NamedTuple
+
+import cv2
+import numpy as np
+
+from ._component_set import ComponentSet, component_set_of
+from ._components import label_components_of
+
+
+class Frame(NamedTuple):
+    # Position of the frame in the video, frames dropped under backpressure leave gaps.
+    index: int
+
+    # Time of the frame in the video, in seconds.
+    timestamp: float
+
+    # BGR frame, a view of a buffer of the ring, which is reused once the next frame is pulled.
+    image: np.ndarray
+
+    # What every stage returned for the frame so far, by stage name.
+    outputs: dict[str, Any]
+
+
+class Stage(NamedTuple):
+    name: str
+
+    # Takes the frame with the outputs of the stages before it, and returns the output of the stage.
+    func: Callable[[Frame], Any]
+
+
+class StageStats(NamedTuple):
+    # "decode" for the decoding thread, the name of the stage otherwise.
+    name: str
+
+    frames: int
+    seconds: float
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else float("nan")
+
+
+class _FrameRing:
+    # A decoding thread, reading frames into a fixed ring of buffers, so no frame is allocated after the first few.
+    # A buffer goes from the free queue, to the decoder, to the filled queue, to the consumer, back to the free queue.
+
+    def __init__(self, capture: cv2.VideoCapture, buffers: int, drop_frames: bool, realtime: bool):
+        self.__capture = capture
+        self.__drop_frames = drop_frames
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        self.__frame_seconds = 1 / fps if realtime and fps > 0 else 0.0
+        self.__buffers: list[np.ndarray | None] = [None] * buffers
+
+        self.__free: queue.Queue[int] = queue.Queue()
+        for slot in range(buffers):
+            self.__free.put(slot)
+        self.__filled: queue.Queue[tuple[int, int, float] | None] = queue.Queue()
+
+        self.__stop = threading.Event()
+        self.__error: Exception | None = None
+        self.dropped = 0
+        self.decoded = 0
+        self.decode_seconds = 0.0
+
+        self.__decoder = threading.Thread(target=self.__decode, name="frame-decoder", daemon=True)
+        self.__decoder.start()
+
+    def __slot_to_decode_into(self) -> int | None:
+        while not self.__stop.is_set():
+            try:
+                return self.__free.get_nowait()
+            except queue.Empty:
+                pass
+
+            if self.__drop_frames:
+                # The consumer is behind, so the oldest frame it has not pulled yet is skipped,
+                # which keeps the frames it gets as recent as possible.
+                try:
+                    slot, _, _ = self.__filled.get_nowait()
+                    self.dropped += 1
+                    return slot
+                except queue.Empty:
+                    pass
+
+            try:
+                return self.__free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        return None
+
+    def __decode(self) -> None:
+        try:
+            index = 0
+            video_start = time.perf_counter()
+            while True:
+                # A live camera delivers the frames at its frame rate, so the video is too, when decoding in real time.
+                if self.__stop.wait(max(video_start + index * self.__frame_seconds - time.perf_counter(), 0)):
+                    break
+
+                # The next frame is grabbed before a buffer is taken for it,
+                # so no pending frame is dropped for a frame which does not exist, at the end of the video.
+                start = time.perf_counter()
+                grabbed = self.__capture.grab()
+                self.decode_seconds += time.perf_counter() - start
+                if not grabbed or (slot := self.__slot_to_decode_into()) is None:
+                    break
+
+                start = time.perf_counter()
+                timestamp = self.__capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                ok, image = self.__capture.retrieve(self.__buffers[slot])
+                self.decode_seconds += time.perf_counter() - start
+                if not ok:
+                    break
+
+                # OpenCV decodes into the given buffer when it has the frame's shape, so it's only allocated once.
+                self.__buffers[slot] = image
+                self.decoded += 1
+                self.__filled.put((slot, index, timestamp))
+                index += 1
+        except Exception as error:
+            self.__error = error
+        finally:
+            self.__filled.put(None)
+
+    def __iter__(self) -> Iterator[tuple[int, float, np.ndarray]]:
+        while (item := self.__filled.get()) is not None:
+            slot, index, timestamp = item
+            try:
+                yield index, timestamp, self.__buffers[slot]
+            finally:
+                self.__free.put(slot)
+
+        if self.__error is not None:
+            raise self.__error
+
+    def close(self) -> None:
+        self.__stop.set()
+        self.__decoder.join()
+
+
+class FramePipeline:
+    """
+    Run stages over the frames of a video, while a background thread decodes the next frames.
+
+    The frames are decoded into a ring of `buffers` reused arrays, so the decoder runs ahead by at most that many.
+    When the stages can't keep up, the decoder waits for them, or with `drop_frames`,
+    skips the oldest frame it decoded to keep up with the video instead, e.g. for a live camera.
+    With `realtime`, a video file is decoded no faster than its frame rate, as a camera would deliver it,
+    which frames of a video file can only be dropped with, since it decodes far faster than it plays otherwise.
+
+    Every stage is given the frame with the outputs of the stages before it, so stages can be composed
+    from the functions of the lib, and state kept across frames in stages such as `RunningBackground`.
+
+    e.g.
+        background = RunningBackground()
+        pipeline = FramePipeline([
+            Stage("flat", lambda frame: remove_shadow_from(frame.image, background_scale=0.5)),
+            Stage("foreground", lambda frame: background.update(frame.outputs["flat"])),
+            Stage("objects", lambda frame: moving_components_of(frame.image, frame.outputs["foreground"])),
+        ])
+        for frame in pipeline.run("../data/taxi.mp4"):
+            print(frame.index, len(frame.outputs["objects"]))
+        for stats in pipeline.stats:
+            print(stats.name, stats.fps)
+    """
+
+    def __init__(
+            self,
+            stages: Sequence[Stage],
+            /,
+            *,
+            buffers: int = 4,
+            drop_frames: bool = False,
+            realtime: bool = False,
+    ):
+        """
+        Args:
+            stages: run in order on every frame, their names should be unique.
+            buffers: number of frames decoded ahead of the stages.
+            drop_frames: skip frames instead of waiting for the stages when they fall behind,
+                for a camera or a stream, or a video file decoded in real time.
+            realtime: decode no faster than the frame rate of the video.
+        """
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names) or "decode" in names:
+            raise ValueError(f"The stage names should be unique and not 'decode', which are {', '.join(names)}.")
+        if buffers < 1:
+            raise ValueError(f"There should be at least one buffer, which are {buffers}.")
+
+        self.__stages = tuple(stages)
+        self.__buffers = buffers
+        self.__drop_frames = drop_frames
+        self.__realtime = realtime
+
+        self.__ring: _FrameRing | None = None
+        self.__decoded = 0
+        self.__decode_seconds = 0.0
+        self.__dropped = 0
+        self.__stage_frames = [0] * len(stages)
+        self.__stage_seconds = [0.0] * len(stages)
+
+    @property
+    def stats(self) -> list[StageStats]:
+        """
+        The frames and seconds of the decoder and of every stage, over every run so far.
+        """
+        ring = self.__ring
+        decoded = self.__decoded + (ring.decoded if ring is not None else 0)
+        decode_seconds = self.__decode_seconds + (ring.decode_seconds if ring is not None else 0.0)
+
+        return [
+            StageStats("decode", decoded, decode_seconds),
+            *(
+                StageStats(stage.name, frames, seconds)
+                for stage, frames, seconds in zip(self.__stages, self.__stage_frames, self.__stage_seconds)
+            ),
+        ]
+
+    @property
+    def dropped_frames(self) -> int:
+        """
+        The frames skipped under backpressure, over every run so far.
+        """
+        return self.__dropped + (self.__ring.dropped if self.__ring is not None else 0)
+
+    def run(self, source: str | int, /, *, max_frames: int | None = None) -> Iterator[Frame]:
+        """
+        Decode the video and yield every frame once it went through all the stages.
+
+        The image of a frame, and any output which is a view of it, is only valid until the next frame is pulled,
+        copy it to keep it longer.
+
+        Args:
+            source: path of a video, or index of a camera, as for `cv2.VideoCapture`.
+            max_frames: stop after yielding that many frames.
+        """
+        # A file is decoded far faster than it plays, so the decoder would drop nearly every frame.
+        if self.__drop_frames and not self.__realtime and isinstance(source, str) and os.path.isfile(source):
+            raise ValueError(f"Frames of the video file {source} can only be dropped when it's decoded in real time.")
+
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise ValueError(f"Could not open the video {source}.")
+
+        ring = self.__ring = _FrameRing(capture, self.__buffers, self.__drop_frames, self.__realtime)
+        try:
+            for count, (index, timestamp, image) in enumerate(ring):
+                if max_frames is not None and count >= max_frames:
+                    break
+
+                frame = Frame(index, timestamp, image, {})
+                for n, stage in enumerate(self.__stages):
+                    start = time.perf_counter()
+                    frame.outputs[stage.name] = stage.func(frame)
+                    self.__stage_seconds[n] += time.perf_counter() - start
+                    self.__stage_frames[n] += 1
+
+                yield frame
+        finally:
+            ring.close()
+            capture.release()
+            self.__ring = None
+            self.__decoded += ring.decoded
+            self.__decode_seconds += ring.decode_seconds
+            self.__dropped += ring.dropped
+
+
+class RunningBackground:
+    """
+    A background estimate kept across frames, updated with every frame instead of recomputed from many frames,
+    and the mask of what moves in front of it.
+    """
+
+    def __init__(self, *, alpha: float = 0.05, threshold: int = 30, selective: bool = True):
+        """
+        Args:
+            alpha: weight of the new frame in the running average, higher adapts faster to changes of the scene.
+            threshold: gray levels a pixel should differ from the background by to be foreground.
+            selective: only update the background where there is no foreground,
+                so slow objects do not fade into it.
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError(f"alpha should be in (0, 1], which is {alpha}.")
+
+        self.__alpha = alpha
+        self.__threshold = threshold
+        self.__selective = selective
+        self.__background: np.ndarray | None = None
+
+        # Buffers of the frame's size, reused by every update.
+        self.__gray: np.ndarray | None = None
+        self.__mask: np.ndarray | None = None
+
+    @property
+    def background(self) -> np.ndarray | None:
+        """
+        The gray uint8 background, None before the first frame.
+        """
+        return None if self.__background is None else cv2.convertScaleAbs(self.__background)
+
+    def reset(self) -> None:
+        self.__background = None
+
+    def update(self, img: np.ndarray, /) -> np.ndarray:
+        """
+        Compare a BGR or gray frame with the background, and blend it in.
+
+        Returns:
+            uint8 mask of the foreground, 255 where the frame differs from the background, 0 otherwise.
+            It's reused by the next update, copy it to keep it.
+        """
+        if img.ndim == 3:
+            gray = self.__gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=self.__gray)
+        else:
+            gray = img
+
+        if self.__background is None or self.__background.shape != gray.shape:
+            self.__background = gray.astype(np.float32)
+            self.__mask = np.zeros(gray.shape, dtype=np.uint8)
+            return self.__mask
+
+        mask = cv2.absdiff(gray, cv2.convertScaleAbs(self.__background), dst=self.__mask)
+        cv2.threshold(mask, self.__threshold, 255, cv2.THRESH_BINARY, dst=mask)
+
+        cv2.accumulateWeighted(
+            gray, self.__background, self.__alpha, mask=cv2.bitwise_not(mask) if self.__selective else None
+        )
+
+        return mask
+
+
+def moving_components_of(img: np.ndarray, foreground: np.ndarray, /, *, min_size: int = 100) -> ComponentSet:
+    """
+    The components of a BGR frame under a foreground mask, e.g. of `RunningBackground.update`,
+    as the `ComponentSet` `find_component_set_in` would find on a white background.
+    """
+    # The mask is the foreground, the inverted mask is dark where the components are, as the boards on white.
+    return component_set_of(img, label_components_of(cv2.bitwise_not(foreground), bg_threshold=128), min_size=min_size)
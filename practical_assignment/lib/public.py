@@ -1,21 +1,311 @@
-from typing import Final
+import importlib
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Final
 
-from ._box import find_bounding_box_from, rotate_image, find_single_components_in, rotate_img_by_angle
 from ._file import _FileAgent
-from ._presentation import show_images_in_row, draw_central_line_on, show_vertical_rgb_analysis_of
-from ._calculations import (
-    find_principal_axes_from,
-    find_centroid_from,
-    central_line_of,
-    crop_img_to_fixed_size,
-    vertical_color_distribution_of,
-    remove_shadow_from,
-)
-from ._color import ResistorColorFinder, ResistorColor
-from ._resistor_value import calculate_resistor_value
+from ._memoize import ResultCache
+from ._instrumentation import Profile, FunctionProfile, profiling, instrument_functions_in
+
+if TYPE_CHECKING:
+    # The lazy exports, for linters, type checkers and IDEs only, nothing of it is imported at runtime.
+    from ._box import (
+        find_bounding_box_from,
+        rotate_image,
+        find_single_components_in,
+        rotate_img_by_angle,
+    )
+    from ._component_set import (
+        COMPONENT_BOX_DTYPE,
+        COMPONENT_DTYPE,
+        Component,
+        ComponentSet,
+        component_set_of,
+        find_component_set_in,
+        find_component_boxes_in,
+    )
+    from ._video import (
+        Frame,
+        Stage,
+        StageStats,
+        FramePipeline,
+        RunningBackground,
+        moving_components_of,
+    )
+    from ._annotations import (
+        ANNOTATION_DTYPE,
+        AnnotatedImage,
+        AnnotationIndex,
+        annotation_xml_of,
+    )
+    from ._tiling import (
+        threshold_in_tiles,
+        label_in_tiles,
+        find_single_components_in_tiles,
+        remove_shadow_in_tiles,
+    )
+    from ._alignment import (
+        align,
+        align_many,
+        alignment_matrix_of,
+        warp_with,
+        estimate_angle_from_axis_of,
+        estimate_alignment_of,
+        angle_of,
+    )
+    from ._evaluation import (
+        Detections,
+        DetectionScore,
+        iou_matrix_of,
+        match_detections_of,
+        average_precision_of,
+        score_detections,
+    )
+    from ._classifier import (
+        COMPONENT_TYPES,
+        ClassifierSettings,
+        Classification,
+        ComponentClassifier,
+        fit_crop_to_size,
+        annotated_component_crops_of,
+    )
+    from ._locator import (
+        LocatorSettings,
+        Template,
+        TemplateMatch,
+        BoardPyramid,
+        TemplateLocator,
+        detections_of,
+    )
+    from ._segmentation import (
+        GreenRatios,
+        GreenBoard,
+        classify_green_pixels_of,
+        find_green_board_in,
+    )
+    from ._inspection import (
+        Inspection,
+        BoardInspector,
+    )
+    from ._reader import (
+        ReaderSettings,
+        ResistorReading,
+        ImageReadings,
+        ResistorReader,
+    )
+    from ._batch import (
+        BoardSettings,
+        BoardComponents,
+        find_components_in_boards,
+    )
+    from ._presentation import (
+        show_images_in_row,
+        draw_central_line_on,
+        show_vertical_rgb_analysis_of,
+        contact_sheet_of,
+        color_distribution_plot_of,
+        RenderBackend,
+        MatplotlibBackend,
+        ContactSheetBackend,
+        rendering_to,
+    )
+    from ._calculations import (
+        find_principal_axes_from,
+        find_centroid_from,
+        central_line_of,
+        crop_img_to_fixed_size,
+        vertical_color_distribution_of,
+        vertical_color_distribution_of_many,
+        smooth_color_distribution,
+        find_color_bands_in,
+        remove_shadow_from,
+        remove_shadow_from_many,
+        reduce_color,
+    )
+    from ._quantization import (
+        palette_of,
+        quantize_with,
+        mean_color_error_of,
+        clear_palette_cache,
+    )
+    from ._moments import (
+        ImageMoments,
+        moments_of,
+    )
+    from ._color import (
+        ResistorColorFinder,
+        ResistorColor,
+    )
+    from ._resistor_value import (
+        RESISTOR_VALUE_DTYPE,
+        E_SERIES,
+        ResistorValue,
+        calculate_resistor_value,
+        resistor_value_of,
+        resistor_values_of,
+        e_series_of_tolerance,
+        snap_to_e_series,
+    )
+
+# The exported names of each submodule, which is only imported when one of its names is first used,
+# so e.g. a worker process which only labels components never imports matplotlib.
+_LAZY_EXPORTS: Final[dict[str, tuple[str, ...]]] = {
+    "_box": (
+        "find_bounding_box_from",
+        "rotate_image",
+        "find_single_components_in",
+        "rotate_img_by_angle",
+    ),
+    "_component_set": (
+        "COMPONENT_BOX_DTYPE",
+        "COMPONENT_DTYPE",
+        "Component",
+        "ComponentSet",
+        "component_set_of",
+        "find_component_set_in",
+        "find_component_boxes_in",
+    ),
+    "_video": (
+        "Frame",
+        "Stage",
+        "StageStats",
+        "FramePipeline",
+        "RunningBackground",
+        "moving_components_of",
+    ),
+    "_annotations": (
+        "ANNOTATION_DTYPE",
+        "AnnotatedImage",
+        "AnnotationIndex",
+        "annotation_xml_of",
+    ),
+    "_tiling": (
+        "threshold_in_tiles",
+        "label_in_tiles",
+        "find_single_components_in_tiles",
+        "remove_shadow_in_tiles",
+    ),
+    "_alignment": (
+        "align",
+        "align_many",
+        "alignment_matrix_of",
+        "warp_with",
+        "estimate_angle_from_axis_of",
+        "estimate_alignment_of",
+        "angle_of",
+    ),
+    "_evaluation": (
+        "Detections",
+        "DetectionScore",
+        "iou_matrix_of",
+        "match_detections_of",
+        "average_precision_of",
+        "score_detections",
+    ),
+    "_classifier": (
+        "COMPONENT_TYPES",
+        "ClassifierSettings",
+        "Classification",
+        "ComponentClassifier",
+        "fit_crop_to_size",
+        "annotated_component_crops_of",
+    ),
+    "_locator": (
+        "LocatorSettings",
+        "Template",
+        "TemplateMatch",
+        "BoardPyramid",
+        "TemplateLocator",
+        "detections_of",
+    ),
+    "_segmentation": (
+        "GreenRatios",
+        "GreenBoard",
+        "classify_green_pixels_of",
+        "find_green_board_in",
+    ),
+    "_inspection": (
+        "Inspection",
+        "BoardInspector",
+    ),
+    "_reader": (
+        "ReaderSettings",
+        "ResistorReading",
+        "ImageReadings",
+        "ResistorReader",
+    ),
+    "_batch": (
+        "BoardSettings",
+        "BoardComponents",
+        "find_components_in_boards",
+    ),
+    "_presentation": (
+        "show_images_in_row",
+        "draw_central_line_on",
+        "show_vertical_rgb_analysis_of",
+        "contact_sheet_of",
+        "color_distribution_plot_of",
+        "RenderBackend",
+        "MatplotlibBackend",
+        "ContactSheetBackend",
+        "rendering_to",
+    ),
+    "_calculations": (
+        "find_principal_axes_from",
+        "find_centroid_from",
+        "central_line_of",
+        "crop_img_to_fixed_size",
+        "vertical_color_distribution_of",
+        "vertical_color_distribution_of_many",
+        "smooth_color_distribution",
+        "find_color_bands_in",
+        "remove_shadow_from",
+        "remove_shadow_from_many",
+        "reduce_color",
+    ),
+    "_quantization": (
+        "palette_of",
+        "quantize_with",
+        "mean_color_error_of",
+        "clear_palette_cache",
+    ),
+    "_moments": (
+        "ImageMoments",
+        "moments_of",
+    ),
+    "_color": (
+        "ResistorColorFinder",
+        "ResistorColor",
+    ),
+    "_resistor_value": (
+        "RESISTOR_VALUE_DTYPE",
+        "E_SERIES",
+        "ResistorValue",
+        "calculate_resistor_value",
+        "resistor_value_of",
+        "resistor_values_of",
+        "e_series_of_tolerance",
+        "snap_to_e_series",
+    ),
+}
+
+_MODULE_OF_EXPORT: Final[dict[str, str]] = {
+    name: module_name
+    for module_name, names in _LAZY_EXPORTS.items()
+    for name in names
+}
 
 __all__ = [
     "db",
+    "result_cache",
+    "ResultCache",
+    "Profile",
+    "FunctionProfile",
+    "profiling",
+    "ANNOTATION_DTYPE",
+    "AnnotatedImage",
+    "AnnotationIndex",
+    "annotation_xml_of",
     "find_bounding_box_from",
     "show_images_in_row",
     "find_principal_axes_from",
@@ -25,13 +315,132 @@ __all__ = [
     "rotate_image",
     "crop_img_to_fixed_size",
     "find_single_components_in",
+    "COMPONENT_BOX_DTYPE",
+    "COMPONENT_DTYPE",
+    "Component",
+    "ComponentSet",
+    "component_set_of",
+    "find_component_set_in",
+    "find_component_boxes_in",
+    "Frame",
+    "Stage",
+    "StageStats",
+    "FramePipeline",
+    "RunningBackground",
+    "moving_components_of",
     "vertical_color_distribution_of",
+    "vertical_color_distribution_of_many",
+    "smooth_color_distribution",
+    "find_color_bands_in",
     "show_vertical_rgb_analysis_of",
+    "contact_sheet_of",
+    "color_distribution_plot_of",
+    "RenderBackend",
+    "MatplotlibBackend",
+    "ContactSheetBackend",
+    "rendering_to",
     "remove_shadow_from",
+    "remove_shadow_from_many",
+    "reduce_color",
+    "palette_of",
+    "quantize_with",
+    "mean_color_error_of",
+    "clear_palette_cache",
     "rotate_img_by_angle",
+    "threshold_in_tiles",
+    "label_in_tiles",
+    "find_single_components_in_tiles",
+    "remove_shadow_in_tiles",
+    "align",
+    "align_many",
+    "alignment_matrix_of",
+    "warp_with",
+    "estimate_angle_from_axis_of",
+    "estimate_alignment_of",
+    "angle_of",
+    "Detections",
+    "DetectionScore",
+    "iou_matrix_of",
+    "match_detections_of",
+    "average_precision_of",
+    "score_detections",
+    "COMPONENT_TYPES",
+    "ClassifierSettings",
+    "Classification",
+    "ComponentClassifier",
+    "fit_crop_to_size",
+    "annotated_component_crops_of",
+    "LocatorSettings",
+    "Template",
+    "TemplateMatch",
+    "BoardPyramid",
+    "TemplateLocator",
+    "detections_of",
+    "GreenRatios",
+    "GreenBoard",
+    "classify_green_pixels_of",
+    "find_green_board_in",
+    "Inspection",
+    "BoardInspector",
+    "ReaderSettings",
+    "ResistorReading",
+    "ImageReadings",
+    "ResistorReader",
+    "BoardSettings",
+    "BoardComponents",
+    "find_components_in_boards",
     "ResistorColorFinder",
     "ResistorColor",
     "calculate_resistor_value",
+    "RESISTOR_VALUE_DTYPE",
+    "E_SERIES",
+    "ResistorValue",
+    "resistor_value_of",
+    "resistor_values_of",
+    "e_series_of_tolerance",
+    "snap_to_e_series",
+    "ImageMoments",
+    "moments_of",
 ]
 
 db: Final[_FileAgent] = _FileAgent(data_dir="data_dir")
+
+# The results of the lib functions memoized through it are stored next to the decoded images.
+result_cache: Final[ResultCache] = ResultCache(directory=f"{db.cache_dir}/results")
+
+_export_lock = threading.Lock()
+
+
+def _export_loaded_modules() -> None:
+    # Export the names of every submodule imported so far, including the ones imported by other submodules,
+    # and instrument them together, so calls between lib functions are recorded no matter which is used first.
+    loaded = {
+        name: getattr(sys.modules[f"{__package__}.{module_name}"], name)
+        for name, module_name in _MODULE_OF_EXPORT.items()
+        if name not in globals() and f"{__package__}.{module_name}" in sys.modules
+    }
+
+    globals().update(loaded)
+
+    # Every exported function records its calls while profiling, and costs a single check otherwise.
+    instrument_functions_in(globals(), list(loaded))
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _MODULE_OF_EXPORT.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with _export_lock:
+        if name not in globals():
+            importlib.import_module(f".{module_name}", __package__)
+            _export_loaded_modules()
+
+    return globals()[name]
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
+
+
+_export_loaded_modules()
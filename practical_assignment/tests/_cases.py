@@ -0,0 +1,587 @@
+"""
+The calls the regression suite makes to the functions exported by `lib.public`, and the images it makes them on.
+
+Every case prepares its inputs from an RGB image first, so only the call itself is timed.
+"""
+import functools
+import hashlib
+import math
+import tempfile
+from collections.abc import Callable
+from enum import Enum
+from typing import Any, NamedTuple
+
+import cv2
+import numpy as np
+
+from lib import public
+from lib._components import label_components_of
+
+# Real images of the data directory every image case runs on.
+REAL_IMAGES = (
+    "BOARDS/BOARD3-1.jpg",
+    "COMPONENTS/RESISTOR-1.jpg",
+    "RESISTORS/RESISTORS-1.png",
+)
+
+# Frames of the synthetic video the frame pipeline runs on, see `synthetic_video`.
+_video_dir = tempfile.TemporaryDirectory(prefix="regression-video-")
+
+# Bands of a resistor this many rows apart or less, with the same color, are compared as one.
+_BAND_GAP = 3
+
+# Exported functions which are not timed, and why.
+EXCLUDED = {
+    "profiling": "instruments the other functions, it's what the suite would measure with",
+    "show_images_in_row": "shows matplotlib figures, see contact_sheet_of for the rendering",
+    "show_vertical_rgb_analysis_of": "shows matplotlib figures, see color_distribution_plot_of for the rendering",
+    "rendering_to": "only switches the render backend",
+}
+
+
+class Sample(NamedTuple):
+    # e.g. "BOARDS/BOARD3-1.jpg" or "synthetic 5MP".
+    name: str
+    megapixels: float
+
+    # Only the real images and the smallest synthetic size are checked against the golden results.
+    has_golden: bool
+
+    load: Callable[[], np.ndarray]
+
+
+class ImageCase(NamedTuple):
+    name: str
+
+    # The arguments of `call`, from an RGB image.
+    prepare: Callable[[np.ndarray], tuple]
+    call: Callable[..., Any]
+
+    # Larger samples are skipped, for the functions which are too slow to run on whole boards.
+    max_megapixels: float = math.inf
+
+    # Turns the result into what is compared with the golden one, for the results which are interpolated,
+    # or found on an interpolated image, since its rounding differs between builds of OpenCV and CPUs.
+    summary: Callable[[Any], Any] | None = None
+
+    # How far the floats of the summary can be from the golden ones.
+    tolerance: float | None = None
+
+
+class FixedCase(NamedTuple):
+    name: str
+
+    # The arguments of `call`, which do not depend on an image.
+    prepare: Callable[[], tuple]
+    call: Callable[..., Any]
+
+
+def synthetic_board_of(megapixels: float, /, *, seed: int = 0) -> np.ndarray:
+    """
+    An RGB 4:3 image of `megapixels` which looks enough like the photos of boards for every function to have work:
+    a white background under a shadow, a green board, and components of every color and orientation,
+    as many per megapixel at every size.
+    """
+    width = int(round(math.sqrt(megapixels * 1e6 * 4 / 3)))
+    height = int(round(width * 3 / 4))
+    rng = np.random.default_rng(seed)
+
+    # The shadow darkens the background towards the bottom right.
+    shadow = (255 - 40 * np.linspace(0, 1, width, dtype=np.float32)[None, :]
+              * np.linspace(0, 1, height, dtype=np.float32)[:, None]).astype(np.uint8)
+    img = cv2.merge([shadow, shadow, shadow])
+
+    cv2.rectangle(
+        img, (width // 8, height // 8), (width * 7 // 8, height * 7 // 8), (40, 120, 60), thickness=-1
+    )
+
+    unit = width / 100
+    for _ in range(int(40 * megapixels)):
+        center = (float(rng.uniform(0, width)), float(rng.uniform(0, height)))
+        size = (float(rng.uniform(1, 4) * unit), float(rng.uniform(0.5, 1.5) * unit))
+        color = tuple(int(channel) for channel in rng.integers(0, 230, 3))
+        box = cv2.boxPoints((center, size, float(rng.uniform(0, 180)))).astype(np.int32)
+        cv2.fillConvexPoly(img, box, color, lineType=cv2.LINE_AA)
+
+    return img
+
+
+@functools.cache
+def synthetic_video() -> str:
+    """
+    The `cv2.VideoCapture` pattern of the PNG frames of two boxes moving over a still background,
+    which decode to the same pixels everywhere, unlike the frames of a compressed video.
+    """
+    width, height = 320, 240
+    background = np.linspace(150, 230, width, dtype=np.float32)[None, :].repeat(height, axis=0).astype(np.uint8)
+
+    for index in range(48):
+        frame = cv2.merge([background, background, background])
+        cv2.rectangle(frame, (10 + 5 * index, 40), (30 + 5 * index, 60), (40, 40, 200), thickness=-1)
+        cv2.rectangle(frame, (250 - 3 * index, 100 + 2 * index), (280 - 3 * index, 116 + 2 * index), (200, 90, 30), -1)
+        cv2.imwrite(f"{_video_dir.name}/{index:03d}.png", frame)
+
+    return f"{_video_dir.name}/%03d.png"
+
+
+def real_samples() -> list[Sample]:
+    return [
+        Sample(
+            location,
+            math.prod(public.db.get_img_located_at(location).shape[:2]) / 1e6,
+            True,
+            functools.partial(public.db.get_img_located_at, location, channel_mode="RGB", writable=True),
+        )
+        for location in REAL_IMAGES
+    ]
+
+
+def synthetic_samples(sizes: list[float], /) -> list[Sample]:
+    smallest = min(sizes)
+
+    return [
+        Sample(f"synthetic {size:g}MP", size, size == smallest, functools.partial(synthetic_board_of, size))
+        for size in sizes
+    ]
+
+
+def _binary_of(img: np.ndarray) -> np.ndarray:
+    # 1 for the foreground of the white background, as `label_components_of` thresholds it.
+    return (cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) < 245).view(np.uint8)
+
+
+def _quarters_of(img: np.ndarray) -> list[np.ndarray]:
+    height, width = img.shape[0] // 2, img.shape[1] // 2
+
+    return [
+        np.ascontiguousarray(img[top:top + height, left:left + width])
+        for top in (0, height)
+        for left in (0, width)
+    ]
+
+
+def _central_line_and_centroid_of(img: np.ndarray) -> tuple:
+    binary = _binary_of(img)
+
+    return public.central_line_of(binary), public.find_centroid_from(binary)
+
+
+def _defective(img: np.ndarray) -> np.ndarray:
+    # The image with a few components missing, for the inspector to find.
+    test = img.copy()
+    height, width = img.shape[:2]
+    for n in range(4):
+        left, top = width * (2 * n + 1) // 10, height * (2 * n + 1) // 10
+        test[top:top + height // 20, left:left + width // 20] = 255
+
+    return test
+
+
+def _template_of(img: np.ndarray) -> public.Template:
+    height, width = img.shape[:2]
+    crop = img[height * 2 // 5:height * 3 // 5, width * 2 // 5:width * 3 // 5]
+
+    return public.Template("center", cv2.cvtColor(crop, cv2.COLOR_RGB2BGR))
+
+
+def _thumbnails_of(value: Any) -> Any:
+    # The means of the channels of every image, and of a grid of blocks of it, which only move by a fraction
+    # of a gray level when single pixels are rounded the other way.
+    if isinstance(value, np.ndarray):
+        pixels = value.reshape(*value.shape[:2], -1).astype(np.float32)
+        return {
+            "shape": list(value.shape),
+            "dtype": value.dtype.str,
+            "means": np.round(pixels.mean(axis=(0, 1), dtype=np.float64), 3).tolist(),
+            "thumbnail": np.round(
+                cv2.resize(pixels.mean(axis=2), (8, 8), interpolation=cv2.INTER_AREA).astype(np.float64), 3
+            ).tolist(),
+        }
+    elif isinstance(value, (list, tuple)):
+        return [_thumbnails_of(item) for item in value]
+
+    return value
+
+
+def _alignment_summary_of(matrix: np.ndarray) -> dict[str, Any]:
+    # What the matrix does instead of the statistics of its items, which mix degrees and pixels.
+    return {
+        "angle": public.angle_of(matrix),
+        "scale_percent": float(np.hypot(matrix[0, 0], matrix[0, 1]) * 100),
+        "shift": matrix[:, 2].tolist(),
+    }
+
+
+def _readings_summary_of(readings: list[public.ResistorReading]) -> list[dict[str, Any]]:
+    # The bands are found on a rotated strip, where a band can move by a row, or split in two,
+    # so the touching bands of the same color are merged, and their rows are floats compared with a tolerance.
+    summaries = []
+    for reading in readings:
+        bands: list[list[float]] = []
+        colors: list[str] = []
+        for (start, stop), color in zip(reading.bands, reading.colors):
+            if colors and colors[-1] == color.name and start - bands[-1][1] <= _BAND_GAP:
+                bands[-1][1] = float(stop)
+            else:
+                bands.append([float(start), float(stop)])
+                colors.append(color.name)
+
+        summaries.append({"bbox": list(reading.bbox), "bands": bands, "colors": colors, "value": reading.value})
+
+    return summaries
+
+
+def _seeded(func: Callable[..., Any]) -> Callable[..., Any]:
+    # The OpenCV k-means starts from random centers.
+    @functools.wraps(func)
+    def seeded(*args, **kwargs):
+        cv2.setRNGSeed(0)
+        return func(*args, **kwargs)
+
+    return seeded
+
+
+IMAGE_CASES = [
+    ImageCase(
+        "find_bounding_box_from",
+        lambda img: (_binary_of(img),),
+        lambda labeled: public.find_bounding_box_from(labeled, label=1),
+    ),
+    ImageCase("find_principal_axes_from", lambda img: (_binary_of(img),), public.find_principal_axes_from),
+    ImageCase("find_centroid_from", lambda img: (_binary_of(img),), public.find_centroid_from),
+    ImageCase("central_line_of", lambda img: (_binary_of(img),), public.central_line_of),
+    ImageCase(
+        "draw_central_line_on",
+        lambda img: (img.copy(), *_central_line_and_centroid_of(img)[0]),
+        lambda img, a, b: public.draw_central_line_on(img, a=a, b=b),
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase(
+        "rotate_image",
+        lambda img: (img, *_central_line_and_centroid_of(img)),
+        public.rotate_image,
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase("crop_img_to_fixed_size", lambda img: (img, 10, 300), public.crop_img_to_fixed_size),
+    ImageCase("find_single_components_in", lambda img: (img, 245, 100), public.find_single_components_in),
+    ImageCase("find_component_set_in", lambda img: (img, 245, 100), public.find_component_set_in),
+    ImageCase("find_component_boxes_in", lambda img: (img, 245, 100), public.find_component_boxes_in),
+    ImageCase(
+        "component_set_of",
+        lambda img: (img, label_components_of(img, bg_threshold=245)),
+        lambda img, labeled: public.component_set_of(img, labeled, min_size=100),
+    ),
+    ImageCase(
+        "moving_components_of",
+        lambda img: (img, _binary_of(img) * np.uint8(255)),
+        public.moving_components_of,
+    ),
+    ImageCase("vertical_color_distribution_of", lambda img: (img,), public.vertical_color_distribution_of),
+    ImageCase(
+        "vertical_color_distribution_of_many",
+        lambda img: (_quarters_of(img),),
+        public.vertical_color_distribution_of_many,
+    ),
+    ImageCase(
+        "smooth_color_distribution",
+        lambda img: (public.vertical_color_distribution_of(img),),
+        public.smooth_color_distribution,
+    ),
+    ImageCase(
+        "find_color_bands_in",
+        lambda img: (public.vertical_color_distribution_of(img),),
+        public.find_color_bands_in,
+    ),
+    ImageCase(
+        "contact_sheet_of",
+        lambda img: ([img, cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)],),
+        public.contact_sheet_of,
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase(
+        "color_distribution_plot_of",
+        lambda img: (public.vertical_color_distribution_of(img),),
+        public.color_distribution_plot_of,
+    ),
+    ImageCase("remove_shadow_from", lambda img: (img,), public.remove_shadow_from),
+    ImageCase("remove_shadow_from_many", lambda img: (_quarters_of(img),), public.remove_shadow_from_many),
+    ImageCase("reduce_color", lambda img: (img,), _seeded(lambda img: public.reduce_color(img, to=8)), 3),
+    ImageCase("palette_of", lambda img: (img,), lambda img: public.palette_of(img, to=8)),
+    ImageCase("quantize_with", lambda img: (img, public.palette_of(img, to=8)), public.quantize_with),
+    ImageCase(
+        "mean_color_error_of",
+        lambda img: (img, public.quantize_with(img, public.palette_of(img, to=8))),
+        public.mean_color_error_of,
+    ),
+    ImageCase(
+        "rotate_img_by_angle",
+        lambda img: (img, 30.0),
+        public.rotate_img_by_angle,
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase("threshold_in_tiles", lambda img: (img,), public.threshold_in_tiles),
+    ImageCase("label_in_tiles", lambda img: (_binary_of(img),), public.label_in_tiles),
+    ImageCase("find_single_components_in_tiles", lambda img: (img, 245, 100), public.find_single_components_in_tiles),
+    ImageCase("remove_shadow_in_tiles", lambda img: (img,), public.remove_shadow_in_tiles),
+    ImageCase(
+        "align",
+        lambda img: (img,),
+        lambda img: public.align(img, angle=10.0),
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase(
+        "align_many",
+        lambda img: (_quarters_of(img),),
+        lambda imgs: public.align_many(imgs, angles=[0.0, 10.0, 20.0, 30.0]),
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase(
+        "alignment_matrix_of",
+        lambda img: (img.shape,),
+        lambda shape: public.alignment_matrix_of(shape, angle=10.0),
+    ),
+    ImageCase(
+        "warp_with",
+        lambda img: (img, cv2.getRotationMatrix2D((img.shape[1] / 2, img.shape[0] / 2), 10.0, 1.0)),
+        lambda img, matrix: public.warp_with(img, matrix, (img.shape[1], img.shape[0])),
+        summary=_thumbnails_of,
+        tolerance=1.0,
+    ),
+    ImageCase("estimate_angle_from_axis_of", lambda img: (_binary_of(img),), public.estimate_angle_from_axis_of),
+    ImageCase(
+        "estimate_alignment_of",
+        lambda img: (public.rotate_img_by_angle(img, 5.0), img),
+        public.estimate_alignment_of,
+        25,
+        summary=_alignment_summary_of,
+        tolerance=1.0,
+    ),
+    ImageCase(
+        "angle_of",
+        lambda img: (cv2.getRotationMatrix2D((img.shape[1] / 2, img.shape[0] / 2), 10.0, 1.0),),
+        public.angle_of,
+    ),
+    ImageCase("classify_green_pixels_of", lambda img: (img,), public.classify_green_pixels_of),
+    ImageCase("find_green_board_in", lambda img: (img,), public.find_green_board_in),
+    ImageCase("moments_of", lambda img: (_binary_of(img),), public.moments_of),
+    ImageCase("fit_crop_to_size", lambda img: (img, 64), public.fit_crop_to_size),
+    ImageCase(
+        "ResistorColorFinder.from_rgb_array",
+        lambda img: (img,),
+        public.ResistorColorFinder.from_rgb_array,
+    ),
+    ImageCase(
+        "BoardInspector.inspect",
+        lambda img: (public.BoardInspector(img), _defective(img)),
+        lambda inspector, test: inspector.inspect(test),
+    ),
+    ImageCase(
+        "ResistorReader.read",
+        lambda img: (public.ResistorReader(), cv2.cvtColor(img, cv2.COLOR_RGB2BGR)),
+        lambda reader, img: reader.read(img),
+        summary=_readings_summary_of,
+        tolerance=2.0,
+    ),
+    ImageCase(
+        "TemplateLocator.locate",
+        lambda img: (public.TemplateLocator(), cv2.cvtColor(img, cv2.COLOR_RGB2BGR), [_template_of(img)]),
+        lambda locator, board, templates: (locator.clear_pyramid_cache(), locator.locate(board, templates))[1],
+        25,
+    ),
+]
+
+
+def _annotated_boxes() -> tuple[public.AnnotatedImage, list[str], np.ndarray]:
+    annotations = public.db.annotations
+    image_id = annotations.image_id_of("BOARDS/BOARD3-1.jpg")
+    boxes = annotations.boxes_of_image(image_id)
+
+    return (
+        annotations.images[image_id],
+        [annotations.labels[label_id] for label_id in boxes["label"]],
+        np.stack([boxes["xmin"], boxes["ymin"], boxes["xmax"], boxes["ymax"]], axis=1),
+    )
+
+
+@functools.cache
+def _shifted_detections() -> tuple[np.ndarray, np.ndarray, public.Detections]:
+    # The annotated boxes shifted by a few pixels, some of them dropped, and a few false ones added.
+    _, labels, boxes = _annotated_boxes()
+    rng = np.random.default_rng(0)
+
+    kept = rng.random(len(boxes)) < 0.8
+    detected = boxes[kept] + rng.integers(-6, 7, (int(kept.sum()), 4))
+    false_boxes = np.array([[0, 0, 50, 50], [100, 100, 180, 160], [3000, 2000, 3100, 2100]])
+
+    return boxes, np.array(labels), public.Detections(
+        boxes=np.concatenate([detected, false_boxes]),
+        scores=rng.random(len(detected) + len(false_boxes)),
+        labels=np.array([*np.array(labels)[kept], "resistor", "cap1", "resistor"]),
+    )
+
+
+def _ious_and_scores() -> tuple[np.ndarray, np.ndarray]:
+    ground_truth, _, detections = _shifted_detections()
+
+    return public.iou_matrix_of(detections.boxes, ground_truth), detections.scores
+
+
+def _true_positives_and_scores() -> tuple[np.ndarray, np.ndarray, int]:
+    ground_truth, _, detections = _shifted_detections()
+
+    return public.match_detections_of(*_ious_and_scores()), detections.scores, len(ground_truth)
+
+
+def _components_in_boards(paths: list[str]) -> list[public.BoardComponents]:
+    # In the order of the paths, and without the wall times.
+    return [
+        board_components._replace(seconds=0.0)
+        for board_components in sorted(
+            public.find_components_in_boards(paths, processes=1), key=lambda board: board.index
+        )
+    ]
+
+
+def _moving_objects_in(path: str) -> list[tuple[int, np.ndarray]]:
+    # A fresh background per run, so every run sees the same frames from the start.
+    background = public.RunningBackground()
+    pipeline = public.FramePipeline([
+        public.Stage("foreground", lambda frame: background.update(frame.image)),
+        public.Stage("objects", lambda frame: public.moving_components_of(frame.image, frame.outputs["foreground"])),
+    ])
+
+    return [(frame.index, frame.outputs["objects"].records) for frame in pipeline.run(path)]
+
+
+_FOUR_BANDS = (
+    public.ResistorColor.YELLOW, public.ResistorColor.VIOLET, public.ResistorColor.RED, public.ResistorColor.GOLD,
+)
+
+FIXED_CASES = [
+    FixedCase("annotation_xml_of", _annotated_boxes, public.annotation_xml_of),
+    FixedCase(
+        "iou_matrix_of",
+        lambda: (_shifted_detections()[2].boxes, _shifted_detections()[0]),
+        public.iou_matrix_of,
+    ),
+    FixedCase("match_detections_of", _ious_and_scores, public.match_detections_of),
+    FixedCase("average_precision_of", _true_positives_and_scores, public.average_precision_of),
+    FixedCase("score_detections", lambda: ([_shifted_detections()],), public.score_detections),
+    FixedCase(
+        "detections_of",
+        lambda: ([
+            public.TemplateMatch("resistor", (10, 20, 40, 35), (25.0, 27.5), 90.0, 0.35, 0.9),
+            public.TemplateMatch("cap1", (100, 120, 130, 160), (115.0, 140.0), 0.0, 0.35, 0.7),
+        ],),
+        public.detections_of,
+    ),
+    FixedCase(
+        "find_components_in_boards",
+        lambda: ([f"{public.db.boards_dir}/BOARD1-{n}.jpg" for n in (1, 2, 3)],),
+        _components_in_boards,
+    ),
+    FixedCase("FramePipeline.run", lambda: (synthetic_video(),), _moving_objects_in),
+    FixedCase("annotated_component_crops_of", lambda: (public.db,), public.annotated_component_crops_of),
+    FixedCase("clear_palette_cache", lambda: (), public.clear_palette_cache),
+    FixedCase("calculate_resistor_value", lambda: (_FOUR_BANDS,), public.calculate_resistor_value),
+    FixedCase("resistor_value_of", lambda: (_FOUR_BANDS,), public.resistor_value_of),
+    FixedCase(
+        "resistor_values_of",
+        lambda: (np.random.default_rng(0).integers(0, len(public.ResistorColor), (10_000, 5)),),
+        public.resistor_values_of,
+    ),
+    FixedCase("e_series_of_tolerance", lambda: (2.0,), public.e_series_of_tolerance),
+    FixedCase("snap_to_e_series", lambda: (4_650.0,), public.snap_to_e_series),
+]
+
+
+def fingerprint_of(value: Any) -> Any:
+    """
+    A JSON summary of a result, to compare it with the golden one.
+
+    Integer arrays are summarized by a digest and string arrays listed, so they must match exactly,
+    float arrays by their statistics, which are compared with a tolerance.
+    The results which depend on the rounding of OpenCV are summarized by their cases first, see `ImageCase.summary`.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.names is not None:
+            return {name: fingerprint_of(value[name]) for name in value.dtype.names}
+
+        fingerprint = {"shape": list(value.shape), "dtype": value.dtype.str}
+        if value.dtype.kind in "biu":
+            fingerprint["digest"] = hashlib.blake2b(np.ascontiguousarray(value).data, digest_size=16).hexdigest()
+        elif value.dtype.kind in "SU":
+            fingerprint["items"] = value.ravel().tolist()
+        elif value.size:
+            finite = value[np.isfinite(value)].astype(np.float64)
+            fingerprint["nan"] = int(value.size - finite.size)
+            if finite.size:
+                fingerprint.update(
+                    mean=float(finite.mean()), std=float(finite.std()), min=float(finite.min()), max=float(finite.max())
+                )
+
+        return fingerprint
+    elif isinstance(value, public.ComponentSet):
+        masks = [mask.ravel() for mask in value.masks]
+        return {
+            "records": fingerprint_of(value.records),
+            "masks": fingerprint_of(np.concatenate(masks) if masks else np.empty(0, dtype=np.uint8)),
+        }
+    elif isinstance(value, Enum):
+        return value.name
+    elif isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {name: fingerprint_of(item) for name, item in value._asdict().items()}
+    elif isinstance(value, (list, tuple)):
+        return [fingerprint_of(item) for item in value]
+    elif isinstance(value, dict):
+        return {str(key): fingerprint_of(item) for key, item in value.items()}
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    else:
+        return {"type": type(value).__name__}
+
+
+def mismatches_of(
+        actual: Any, golden: Any, /, *, path: str = "result", rel_tol: float = 1e-5, abs_tol: float = 1e-9
+) -> list[str]:
+    """
+    Where a fingerprint differs from the golden one, floats within `rel_tol` or `abs_tol`.
+    """
+    if isinstance(golden, float) and isinstance(actual, (int, float)):
+        if math.isnan(golden) and math.isnan(actual):
+            return []
+        if math.isclose(actual, golden, rel_tol=rel_tol, abs_tol=abs_tol):
+            return []
+        return [f"{path}: {actual} is not {golden}"]
+    elif isinstance(golden, dict) and isinstance(actual, dict):
+        if actual.keys() != golden.keys():
+            return [f"{path}: has {sorted(actual)} instead of {sorted(golden)}"]
+        return [
+            mismatch
+            for key in golden
+            for mismatch in mismatches_of(
+                actual[key], golden[key], path=f"{path}.{key}", rel_tol=rel_tol, abs_tol=abs_tol
+            )
+        ]
+    elif isinstance(golden, list) and isinstance(actual, list):
+        if len(actual) != len(golden):
+            return [f"{path}: has {len(actual)} items instead of {len(golden)}"]
+        return [
+            mismatch
+            for n, (actual_item, golden_item) in enumerate(zip(actual, golden))
+            for mismatch in mismatches_of(
+                actual_item, golden_item, path=f"{path}[{n}]", rel_tol=rel_tol, abs_tol=abs_tol
+            )
+        ]
+    elif actual != golden:
+        return [f"{path}: {actual} is not {golden}"]
+
+    return []
@@ -0,0 +1,324 @@
+"""
+Measure the cases of `_cases`, check them against the golden results and the speed baselines,
+and report how their time and memory scale with the size of the synthetic images.
+"""
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+import cv2
+import numpy as np
+
+from ._cases import Sample, fingerprint_of, mismatches_of
+
+# A function is only too slow when it's slower than its baseline by both the ratio and this many seconds,
+# so the noise of the functions taking microseconds does not fail the suite.
+MIN_SLOWDOWN_SECONDS = 0.005
+
+# Timed runs of every case when the baselines are checked or updated, the median of them is compared.
+# Large samples are run fewer times, they are both slow and less noisy.
+BASELINE_REPEAT = 7
+LARGE_BASELINE_REPEAT = 3
+
+# Samples kept per case in the baselines, the most recent ones, so every update adds to them.
+BASELINE_SAMPLES = 21
+
+# A function whose time grows faster than the size of the image to this power is reported as super-linear.
+SUPER_LINEAR_EXPONENT = 1.15
+
+
+class Measurement(NamedTuple):
+    case: str
+
+    # None for the cases which do not depend on an image.
+    sample: str | None
+    megapixels: float | None
+
+    seconds: float
+    peak_bytes: int
+
+
+def _machine() -> dict[str, Any]:
+    # The baselines only hold on the machine they were measured on.
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def _load_json(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def _dump_json(value: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(path, "w") as f:
+        json.dump(value, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def scaling_exponent_of(megapixels: list[float], values: list[float]) -> float | None:
+    """
+    The power of the size the values grow with, the slope of their log-log line, None with less than 2 sizes.
+    """
+    points = [(size, value) for size, value in zip(megapixels, values) if value > 0]
+    if len({size for size, _ in points}) < 2:
+        return None
+
+    slope, _ = np.polyfit(np.log([size for size, _ in points]), np.log([value for _, value in points]), 1)
+
+    return float(slope)
+
+
+class Recorder:
+    """
+    What the regression suite measured, and the golden results and baselines it compares with.
+
+    Args:
+        golden_path: JSON of the fingerprints of the results, kept in the repository.
+        baseline_path: JSON of the seconds of every case on a machine.
+        results_dir: where the measurements and scaling curves are written.
+        update_golden: store the results as the golden ones instead of checking them.
+        check_baselines: fail the cases which got slower than their baselines, and the ones without any.
+        update_baselines: add the times to the baselines.
+        max_slowdown: how many times the median of its baseline a case can take.
+    """
+
+    def __init__(
+            self,
+            *,
+            golden_path: str,
+            baseline_path: str,
+            results_dir: str,
+            update_golden: bool = False,
+            check_baselines: bool = False,
+            update_baselines: bool = False,
+            max_slowdown: float = 1.5,
+    ):
+        self.__golden_path = golden_path
+        self.__baseline_path = baseline_path
+        self.__results_dir = results_dir
+        self.__update_golden = update_golden
+        self.__check_baselines = check_baselines
+        self.__update_baselines = update_baselines
+        self.__max_slowdown = max_slowdown
+
+        self.__golden: dict[str, Any] = _load_json(golden_path)
+        self.__golden_changed = False
+
+        baselines = _load_json(baseline_path)
+        self.__same_machine = baselines.get("machine") == _machine()
+        # Baselines stored before they kept more than one sample per case hold a single number.
+        self.__baselines: dict[str, list[float]] = {
+            key: samples if isinstance(samples, list) else [samples]
+            for key, samples in (baselines.get("seconds", {}) if self.__same_machine else {}).items()
+        }
+        self.__baselines_changed = False
+
+        self.__measurements: list[Measurement] = []
+
+    @property
+    def measurements(self) -> list[Measurement]:
+        return list(self.__measurements)
+
+    @property
+    def same_machine(self) -> bool:
+        """
+        Whether the stored baselines were measured on this machine, they are ignored otherwise.
+        """
+        return self.__same_machine
+
+    def check(
+            self,
+            case: str,
+            sample: Sample | None,
+            call: Callable[..., Any],
+            args: tuple,
+            /,
+            *,
+            summary: Callable[[Any], Any] | None = None,
+            tolerance: float | None = None,
+    ) -> list[str]:
+        """
+        Time a case, trace its peak memory, and compare its result and time with the golden ones and the baselines.
+
+        Args:
+            summary: turns the result into what is compared with the golden one, the whole result when None.
+            tolerance: how far the floats of the result can be from the golden ones,
+                besides the relative tolerance of `mismatches_of`.
+
+        Returns:
+            what does not match, empty when everything does.
+        """
+        key = case if sample is None else f"{case} @ {sample.name}"
+
+        # The times are only compared when asked for, otherwise a single run is enough for the report.
+        if self.__check_baselines or self.__update_baselines:
+            repeat = BASELINE_REPEAT if sample is None or sample.megapixels <= 5 else LARGE_BASELINE_REPEAT
+        else:
+            repeat = 1
+
+        gc.collect()
+        times = []
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = call(*args)
+            times.append(time.perf_counter() - start)
+        seconds = statistics.median(times)
+
+        peak_bytes = self.__peak_bytes_of(call, args)
+
+        self.__measurements.append(Measurement(
+            case,
+            None if sample is None else sample.name,
+            None if sample is None else sample.megapixels,
+            seconds,
+            peak_bytes,
+        ))
+
+        failures = []
+        if sample is None or sample.has_golden:
+            failures.extend(self.__check_golden(
+                key, fingerprint_of(result if summary is None else summary(result)), tolerance
+            ))
+        failures.extend(self.__check_baseline(key, times))
+
+        return failures
+
+    @staticmethod
+    def __peak_bytes_of(call: Callable[..., Any], args: tuple) -> int:
+        # A separate call, since tracing slows down every allocation.
+        # NumPy reports its buffers to tracemalloc, the ones OpenCV returns included.
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start_bytes, _ = tracemalloc.get_traced_memory()
+            call(*args)
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return peak_bytes - start_bytes
+
+    def __check_golden(self, key: str, fingerprint: Any, tolerance: float | None) -> list[str]:
+        # Round trip through JSON, so tuples compare as the lists they are stored as.
+        fingerprint = json.loads(json.dumps(fingerprint))
+
+        if self.__update_golden:
+            self.__golden[key] = fingerprint
+            self.__golden_changed = True
+            return []
+
+        if key not in self.__golden:
+            return [f"{key} has no golden result, store it with --update-golden."]
+
+        if tolerance is None:
+            mismatches = mismatches_of(fingerprint, self.__golden[key])
+        else:
+            mismatches = mismatches_of(fingerprint, self.__golden[key], abs_tol=tolerance)
+
+        return [f"{key} does not match its golden result: {mismatch}" for mismatch in mismatches[:10]]
+
+    def __check_baseline(self, key: str, times: list[float]) -> list[str]:
+        failures = []
+        seconds = statistics.median(times)
+
+        if self.__check_baselines:
+            if key not in self.__baselines:
+                failures.append(f"{key} has no baseline, store one with --update-baselines.")
+            else:
+                baseline = statistics.median(self.__baselines[key])
+                if seconds > baseline * self.__max_slowdown and seconds - baseline > MIN_SLOWDOWN_SECONDS:
+                    failures.append(
+                        f"{key} took a median of {seconds:.4f}s over {len(times)} runs, "
+                        f"{seconds / baseline:.2f} times the median of its baseline of {baseline:.4f}s, "
+                        f"more than the allowed {self.__max_slowdown:g} times."
+                    )
+
+        if self.__update_baselines:
+            self.__baselines[key] = [*self.__baselines.get(key, []), *times][-BASELINE_SAMPLES:]
+            self.__baselines_changed = True
+
+        return failures
+
+    def scaling(self) -> dict[str, dict[str, Any]]:
+        """
+        For every image case measured on more than one synthetic size,
+        its seconds and peak bytes per size, and the powers of the size they grow with.
+        """
+        curves: dict[str, dict[str, Any]] = {}
+
+        for measurement in self.__measurements:
+            if measurement.sample is None or not measurement.sample.startswith("synthetic"):
+                continue
+
+            curve = curves.setdefault(measurement.case, {"megapixels": [], "seconds": [], "peak_bytes": []})
+            curve["megapixels"].append(measurement.megapixels)
+            curve["seconds"].append(measurement.seconds)
+            curve["peak_bytes"].append(measurement.peak_bytes)
+
+        for curve in curves.values():
+            curve["time_exponent"] = scaling_exponent_of(curve["megapixels"], curve["seconds"])
+            curve["memory_exponent"] = scaling_exponent_of(curve["megapixels"], curve["peak_bytes"])
+            curve["super_linear"] = (curve["time_exponent"] or 0) > SUPER_LINEAR_EXPONENT
+
+        return {case: curve for case, curve in curves.items() if curve["time_exponent"] is not None}
+
+    def save(self) -> list[str]:
+        """
+        Write the measurements and the scaling curves, and the golden results and baselines when they changed.
+
+        Returns:
+            the written paths.
+        """
+        written = []
+
+        if self.__golden_changed:
+            _dump_json(self.__golden, self.__golden_path)
+            written.append(self.__golden_path)
+
+        if self.__baselines_changed:
+            _dump_json({"machine": _machine(), "seconds": self.__baselines}, self.__baseline_path)
+            written.append(self.__baseline_path)
+
+        if not self.__measurements:
+            return written
+
+        scaling = self.scaling()
+        report_path = os.path.join(self.__results_dir, "regression.json")
+        _dump_json({
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "machine": _machine(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "measurements": [measurement._asdict() for measurement in self.__measurements],
+            "scaling": scaling,
+        }, report_path)
+        written.append(report_path)
+
+        if scaling:
+            curves_path = os.path.join(self.__results_dir, "scaling.csv")
+            with open(curves_path, "w") as f:
+                f.write("case,megapixels,seconds,peak_bytes\n")
+                for case, curve in sorted(scaling.items()):
+                    for row in zip(curve["megapixels"], curve["seconds"], curve["peak_bytes"]):
+                        f.write(f"{case},{row[0]:g},{row[1]:.6f},{row[2]}\n")
+            written.append(curves_path)
+
+        return written
@@ -0,0 +1,113 @@
+"""
+Options and reporting of the regression suite, see `test_regression.py`.
+
+Run from the `practical_assignment` directory:
+    python -m pytest tests
+    python -m pytest tests --sizes 1,5,10,25,50          # scaling curves up to 50MP
+    python -m pytest tests --update-golden               # after an intended change of the results
+    python -m pytest tests --update-baselines            # add samples to the speed baselines of this machine
+    python -m pytest tests --check-baselines             # also fail the functions which got slower
+
+A plain run only checks the results, which does not depend on the load of the machine.
+"""
+import os
+
+import pytest
+
+from ._cases import FIXED_CASES, IMAGE_CASES, real_samples, synthetic_samples
+from ._regression import Recorder
+
+# The practical_assignment directory, the `db` data directory is relative to it.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_recorder_key = pytest.StashKey[Recorder]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("regression")
+    group.addoption(
+        "--sizes", default="1,4",
+        help="comma separated megapixels of the synthetic images, e.g. 1,5,10,25,50",
+    )
+    group.addoption(
+        "--update-golden", action="store_true",
+        help="store the results as the golden ones instead of checking them",
+    )
+    group.addoption(
+        "--check-baselines", action="store_true",
+        help="fail the functions slower than their baselines on this machine, and the ones without any",
+    )
+    group.addoption(
+        "--update-baselines", action="store_true",
+        help="add the times to the baselines of this machine",
+    )
+    group.addoption(
+        "--max-slowdown", type=float, default=1.5,
+        help="how many times the median of its baseline a function can take before it fails, with --check-baselines",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    os.chdir(ROOT)
+
+    recorder = config.stash[_recorder_key] = Recorder(
+        golden_path=os.path.join(ROOT, "tests", "golden.json"),
+        baseline_path=os.path.join(ROOT, "benchmarks", "results", "baselines.json"),
+        results_dir=os.path.join(ROOT, "benchmarks", "results"),
+        update_golden=config.getoption("update_golden"),
+        check_baselines=config.getoption("check_baselines"),
+        update_baselines=config.getoption("update_baselines"),
+        max_slowdown=config.getoption("max_slowdown"),
+    )
+
+    if config.getoption("check_baselines") and not recorder.same_machine:
+        raise pytest.UsageError(
+            "The speed baselines were measured on another machine, or never, "
+            "store the ones of this machine with --update-baselines first."
+        )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if {"sample", "case"} <= set(metafunc.fixturenames):
+        sizes = [float(size) for size in metafunc.config.getoption("sizes").split(",")]
+        samples = real_samples() + synthetic_samples(sizes)
+
+        # Sample-major, so every image is loaded once and all of its cases run one after the other.
+        metafunc.parametrize(
+            ("sample", "case"),
+            [(sample, case) for sample in samples for case in IMAGE_CASES],
+            ids=[f"{sample.name}-{case.name}" for sample in samples for case in IMAGE_CASES],
+        )
+    elif "fixed_case" in metafunc.fixturenames:
+        metafunc.parametrize("fixed_case", FIXED_CASES, ids=[case.name for case in FIXED_CASES])
+
+
+@pytest.fixture(scope="session")
+def recorder(pytestconfig: pytest.Config) -> Recorder:
+    return pytestconfig.stash[_recorder_key]
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    recorder = session.config.stash.get(_recorder_key, None)
+    if recorder is not None:
+        recorder.save()
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    recorder = config.stash.get(_recorder_key, None)
+    if recorder is None or not recorder.measurements:
+        return
+
+    scaling = recorder.scaling()
+    if not scaling:
+        return
+
+    terminalreporter.section("scaling with the megapixels")
+    terminalreporter.write_line(f"{'case':<40} {'time exponent':>14} {'memory exponent':>16}")
+    for case, curve in sorted(scaling.items(), key=lambda item: -item[1]["time_exponent"]):
+        memory_exponent = curve["memory_exponent"]
+        terminalreporter.write_line(
+            f"{case:<40} {curve['time_exponent']:>14.2f} "
+            f"{'-' if memory_exponent is None else f'{memory_exponent:.2f}':>16}"
+            f"{'  super-linear' if curve['super_linear'] else ''}"
+        )
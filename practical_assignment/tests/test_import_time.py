@@ -0,0 +1,67 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# The practical_assignment directory, where the notebooks and the benchmarks import `lib` from.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Third-party modules only the plotting and labeling functions need.
+HEAVY_MODULES = ("matplotlib", "skimage", "PIL")
+
+# Generous, so a slow CI machine does not fail it, but far below the eager import of every submodule.
+IMPORT_SECONDS_BUDGET = 2.0
+
+
+def _run_python(code: str) -> str:
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    env.pop("LIB_PROFILE", None)
+
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def _loaded_heavy_modules_after(statement: str) -> list[str]:
+    output = _run_python(
+        f"import sys\n"
+        f"{statement}\n"
+        f"print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    )
+
+    return output.split()
+
+
+def test_import_does_not_load_heavy_modules():
+    assert _loaded_heavy_modules_after("import lib.public") == []
+
+
+def test_headless_functions_do_not_load_matplotlib():
+    loaded = _loaded_heavy_modules_after(
+        "from lib.public import db, remove_shadow_from, ResistorReader, find_components_in_boards"
+    )
+
+    assert "matplotlib" not in loaded
+
+
+def test_exports_are_resolved_on_first_use():
+    output = _run_python(
+        "import lib.public as public, lib._calculations as calculations\n"
+        "print(public.central_line_of is calculations.central_line_of, 'central_line_of' in dir(public))"
+    )
+
+    assert output.split() == ["True", "True"]
+
+
+def test_import_time():
+    seconds = [
+        float(_run_python(
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "import lib.public\n"
+            "print(time.perf_counter() - start)"
+        ))
+        for _ in range(5)
+    ]
+
+    assert statistics.median(seconds) < IMPORT_SECONDS_BUDGET, seconds
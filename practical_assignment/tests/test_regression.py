@@ -0,0 +1,47 @@
+"""
+Every function exported by `lib.public`, on the real images and on synthetic ones of growing sizes,
+checked against its golden result, and on request its speed baseline, see `conftest.py` for the options.
+"""
+import functools
+import inspect
+
+import numpy as np
+import pytest
+
+from lib import public
+from ._cases import EXCLUDED, FIXED_CASES, IMAGE_CASES, FixedCase, ImageCase, Sample
+from ._regression import Recorder
+
+
+@functools.lru_cache(maxsize=1)
+def _image_of(sample: Sample) -> np.ndarray:
+    # The cases run sample by sample, so only the image of the current one is kept.
+    return sample.load()
+
+
+def test_image_case(sample: Sample, case: ImageCase, recorder: Recorder):
+    if sample.megapixels > case.max_megapixels:
+        pytest.skip(f"{case.name} only runs on images up to {case.max_megapixels:g}MP.")
+
+    args = case.prepare(_image_of(sample))
+    failures = recorder.check(case.name, sample, case.call, args, summary=case.summary, tolerance=case.tolerance)
+
+    assert not failures, "\n".join(failures)
+
+
+def test_fixed_case(fixed_case: FixedCase, recorder: Recorder):
+    args = fixed_case.prepare()
+    failures = recorder.check(fixed_case.name, None, fixed_case.call, args)
+
+    assert not failures, "\n".join(failures)
+
+
+def test_every_exported_function_is_covered():
+    # Methods are covered as "Class.method".
+    covered = {case.name.split(".")[0] for case in [*IMAGE_CASES, *FIXED_CASES]}
+    uncovered = sorted(
+        name for name in public.__all__
+        if inspect.isfunction(getattr(public, name)) and name not in covered and name not in EXCLUDED
+    )
+
+    assert not uncovered, f"{', '.join(uncovered)} are in no regression case, nor excluded."